@@ -1,158 +1,843 @@
-import OpenGL.GL as gl
-import OpenGL.GLUT as glut
-import OpenGL.GLU as glu
+import time
+STARTUP_TIME = time.perf_counter()  # for the --timing report
+import os
+import sys
 import math
 import random
 import numpy as np
-import time
+import heapq
+import struct
+import csv
+import json
+import mmap
+import ctypes
+import copy
+import queue
+import threading
+import traceback
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict, deque
+
+# OpenGL, GLUT and GLU load on first use, so headless tools never pay for them
+gl = glut = glu = None
+
+def import_gl():
+    global gl, glut, glu
+    if gl is None:
+        import OpenGL.GL as gl
+    if glut is None:
+        import OpenGL.GLUT as glut
+    if glu is None:
+        import OpenGL.GLU as glu
+
+# --- Startup timing: milestones measured from the first line of the script ---
+SHOW_TIMING = False
+startup_timing = {}
+
+def mark_startup(name):
+    if name not in startup_timing:
+        startup_timing[name] = (time.perf_counter() - STARTUP_TIME) * 1000.0
+        if SHOW_TIMING:
+            print(f"{name}: {startup_timing[name]:.1f} ms after start")
+
+# GLUT special key codes, usable before GLUT is imported (recordings store these)
+KEY_F5 = 5
+KEY_F9 = 9
+KEY_LEFT = 100
+KEY_RIGHT = 102
 
 GROUND_SIZE = 600  # half-size, so land is -600 to +600
 
+# Pond
+POND_X, POND_Z, POND_RADIUS = -200, 0, 60
+
 # Window dimensions
 WINDOW_WIDTH = 1200
 WINDOW_HEIGHT = 900
 
-# Camera variables
-cam_pos = [0.0, 50.0, 400.0]  # x, y, z
-cam_yaw = 0.0  # horizontal angle (degrees)
-cam_pitch = 20.0  # vertical angle (degrees, up/down)
-cam_speed = 10.0
+# Mouse look
 mouse_last_x = WINDOW_WIDTH // 2
 mouse_last_y = WINDOW_HEIGHT // 2
 mouse_sensitivity = 0.12
-move_forward = move_backward = move_left = move_right = False
 
 # Sun/Moon properties
 SUN_RADIUS = 30
 MOON_RADIUS = 20
+SKY_SEGMENTS = (32, 24, 16, 12)  # sun and moon tessellations, one per quality level
 STAR_COUNT = 200  # Increased for denser night sky
 
+# Sky: a fixed dome colored from a table of sky colors around the day
+DAY_LENGTH = 240.0  # simulated seconds per full day; 0 = the sun only moves with the arrow keys
+SKY_RADIUS = 1500  # dome around the camera, inside the far plane
+SKY_RINGS = 8  # dome rows from just below the horizon to the zenith
+SKY_SLICES = 24
+SKY_TABLE_SIZE = 256  # table entries around the day
+# Sun angle (0 sunrise, 90 noon, 180 sunset), horizon color, zenith color, star brightness
+SKY_KEYS = (
+    (0, (0.95, 0.6, 0.4), (0.3, 0.4, 0.7), 0.0),  # sunrise
+    (15, (0.75, 0.88, 0.98), (0.4, 0.65, 0.95), 0.0),
+    (165, (0.75, 0.88, 0.98), (0.4, 0.65, 0.95), 0.0),
+    (180, (0.95, 0.5, 0.35), (0.3, 0.3, 0.6), 0.0),  # sunset
+    (192, (0.3, 0.18, 0.3), (0.06, 0.06, 0.2), 0.5),  # dusk
+    (205, (0.05, 0.05, 0.15), (0.01, 0.01, 0.06), 1.0),  # night
+    (335, (0.05, 0.05, 0.15), (0.01, 0.01, 0.06), 1.0),
+    (348, (0.3, 0.18, 0.3), (0.06, 0.06, 0.2), 0.5),  # dawn
+)
+OVERCAST = 0.8  # how far rain pulls the sky toward grey
+
+# --- Primitive meshes, built on the CPU as flat GL_TRIANGLES vertex lists ---
+def sphere_triangles(radius, slices, stacks):
+    # Unit sphere as a flat GL_TRIANGLES vertex list, scaled by radius
+    theta = np.linspace(0, np.pi, stacks + 1)
+    phi = np.linspace(0, 2 * np.pi, slices + 1)
+    ring = np.stack([
+        np.sin(theta)[:, None] * np.cos(phi)[None, :],
+        np.cos(theta)[:, None] * np.ones_like(phi)[None, :],
+        np.sin(theta)[:, None] * np.sin(phi)[None, :],
+    ], axis=-1) * radius
+    a, b = ring[:-1, :-1], ring[:-1, 1:]
+    c, d = ring[1:, :-1], ring[1:, 1:]
+    quads = np.stack([a, c, b, b, c, d], axis=2)
+    return quads.reshape(-1, 3).astype(np.float32)
+
+def cylinder_triangles(base, top, height, slices):
+    # Same shape as gluCylinder: along +z from 0 to height, open at both ends
+    phi = np.linspace(0, 2 * np.pi, slices + 1)
+    ring = np.stack([np.cos(phi), np.sin(phi), np.zeros_like(phi)], axis=-1)
+    bottom = ring * (base, base, 1)
+    upper = ring * (top, top, 1) + (0, 0, height)
+    a, b = bottom[:-1], bottom[1:]
+    c, d = upper[:-1], upper[1:]
+    quads = np.stack([a, b, c, c, b, d], axis=1)
+    return quads.reshape(-1, 3).astype(np.float32)
+
+def disk_triangles(radius, slices):
+    # Same shape as gluDisk with no hole: a fan in the z=0 plane
+    phi = np.linspace(0, 2 * np.pi, slices + 1)
+    ring = np.stack([np.cos(phi), np.sin(phi), np.zeros_like(phi)], axis=-1) * radius
+    center = np.zeros((slices, 3))
+    tris = np.stack([center, ring[:-1], ring[1:]], axis=1)
+    return tris.reshape(-1, 3).astype(np.float32)
+
+def torus_triangles(inner, outer, sides, rings):
+    # Same shape as glutSolidTorus: tube radius inner, swept around z at radius outer
+    theta = np.linspace(0, 2 * np.pi, rings + 1)[:, None]
+    phi = np.linspace(0, 2 * np.pi, sides + 1)[None, :]
+    grid = np.stack([
+        (outer + inner * np.cos(phi)) * np.cos(theta),
+        (outer + inner * np.cos(phi)) * np.sin(theta),
+        inner * np.sin(phi) * np.ones_like(theta),
+    ], axis=-1)
+    a, b = grid[:-1, :-1], grid[:-1, 1:]
+    c, d = grid[1:, :-1], grid[1:, 1:]
+    quads = np.stack([a, c, b, b, c, d], axis=2)
+    return quads.reshape(-1, 3).astype(np.float32)
+
+def cube_triangles(size=1.0):
+    # Same shape as glutSolidCube: centered on the origin
+    corners = np.array([[x, y, z] for x in (-0.5, 0.5) for y in (-0.5, 0.5) for z in (-0.5, 0.5)]) * size
+    faces = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+    tris = [corners[[f[0], f[1], f[2], f[0], f[2], f[3]]] for f in faces]
+    return np.concatenate(tris).astype(np.float32)
+
+def skydome_triangles(radius, rings, slices):
+    # Hemisphere from a little below the horizon to the zenith, as x, y, z, s, t vertices.
+    # t picks the texture row (horizon 0.25, zenith 0.75); s is set by the texture matrix.
+    elevation = np.linspace(-0.1, np.pi / 2, rings + 1)[:, None]
+    phi = np.linspace(0, 2 * np.pi, slices + 1)[None, :]
+    ones = np.ones_like(phi)
+    grid = np.stack([
+        radius * np.cos(elevation) * np.cos(phi),
+        radius * np.sin(elevation) * ones,
+        radius * np.cos(elevation) * np.sin(phi),
+        0 * elevation * ones,
+        (0.25 + 0.5 * np.clip(elevation / (np.pi / 2), 0, 1)) * ones,
+    ], axis=-1)
+    a, b = grid[:-1, :-1], grid[:-1, 1:]
+    c, d = grid[1:, :-1], grid[1:, 1:]
+    quads = np.stack([a, c, b, b, c, d], axis=2)
+    return quads.reshape(-1, 5).astype(np.float32)
+
+# --- GPU resources: meshes uploaded once, owned and counted in one place ---
+class Mesh:
+    def __init__(self, vbo, count, nbytes, mode, textured=False):
+        self.vbo = vbo
+        self.count = count  # vertices
+        self.nbytes = nbytes
+        self.mode = mode
+        self.textured = textured  # x, y, z, s, t interleaved
+
+class ResourceManager:
+    def __init__(self):
+        self.meshes = {}  # name -> Mesh
+        self.display_lists = {}  # list id -> estimated bytes
+
+    def add_mesh(self, name, vertices, mode=None):
+        if name in self.meshes:
+            self.release_mesh(name)
+        vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+        vbo = gl.glGenBuffers(1)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, vbo)
+        gl.glBufferData(gl.GL_ARRAY_BUFFER, vertices.nbytes, vertices, gl.GL_STATIC_DRAW)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
+        mesh = Mesh(vbo, len(vertices), vertices.nbytes, gl.GL_TRIANGLES if mode is None else mode,
+                    vertices.shape[1] == 5)
+        self.meshes[name] = mesh
+        return mesh
+
+    def draw(self, name):
+        mesh = self.meshes[name]
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, mesh.vbo)
+        gl.glEnableClientState(gl.GL_VERTEX_ARRAY)
+        if mesh.textured:
+            gl.glEnableClientState(gl.GL_TEXTURE_COORD_ARRAY)
+            gl.glVertexPointer(3, gl.GL_FLOAT, 20, None)
+            gl.glTexCoordPointer(2, gl.GL_FLOAT, 20, ctypes.c_void_p(12))
+        else:
+            gl.glVertexPointer(3, gl.GL_FLOAT, 0, None)
+        gl.glDrawArrays(mesh.mode, 0, mesh.count)
+        if mesh.textured:
+            gl.glDisableClientState(gl.GL_TEXTURE_COORD_ARRAY)
+        gl.glDisableClientState(gl.GL_VERTEX_ARRAY)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
+
+    def release_mesh(self, name):
+        mesh = self.meshes.pop(name)
+        gl.glDeleteBuffers(1, [mesh.vbo])
+
+    def new_list(self, nbytes=0):
+        list_id = gl.glGenLists(1)
+        self.display_lists[list_id] = nbytes
+        return list_id
+
+    def delete_list(self, list_id):
+        if self.display_lists.pop(list_id, None) is not None:
+            gl.glDeleteLists(list_id, 1)
+
+    def release_all(self):
+        for name in list(self.meshes):
+            self.release_mesh(name)
+        for list_id in list(self.display_lists):
+            self.delete_list(list_id)
+
+    def stats(self):
+        return {
+            "meshes": len(self.meshes),
+            "display_lists": len(self.display_lists),
+            "bytes": sum(m.nbytes for m in self.meshes.values()) + sum(self.display_lists.values()),
+        }
+
+    def build_primitives(self):
+        # Everything the scene draws with a fixed shape, tessellated once
+        self.add_mesh("cube", cube_triangles(1.0))
+        self.add_mesh("skydome", skydome_triangles(SKY_RADIUS, SKY_RINGS, SKY_SLICES))
+        self.add_mesh("cylinder", cylinder_triangles(1.0, 0.8, 1.0, 8))
+        self.add_mesh("trunk", cylinder_triangles(16, 16 * 0.8, 6 * 32, 16))
+        self.add_mesh("pond", np.concatenate([
+            cylinder_triangles(60, 60, 8, 40),
+            disk_triangles(60, 40),
+            disk_triangles(60, 40) + np.float32((0, 0, 8)),
+        ]))
+        self.add_mesh("pot_body", cylinder_triangles(0.12, 0.12, 0.25, 16))
+        self.add_mesh("pot_handle", torus_triangles(0.025, 0.07, 8, 12))
+        for segments in SKY_SEGMENTS:
+            self.add_mesh(f"sun_{segments}", sphere_triangles(SUN_RADIUS, segments, segments))
+            self.add_mesh(f"moon_{segments}", sphere_triangles(MOON_RADIUS, segments, segments))
+
+resources = ResourceManager()
+
+# --- Vertex batches: geometry gathered into NumPy arrays, drawn with one call per GL state ---
+RENDERERS = ("batched", "immediate")  # immediate is the old one-call-per-vertex path, kept for comparison
+RENDERER = "batched"
+BATCH_STRIDE = 6 * 4  # interleaved x, y, z, r, g, b floats
+
+def fan_order(n):
+    # A convex polygon (or triangle fan) as a triangle list
+    i = np.arange(1, n - 1)
+    return np.stack([np.zeros_like(i), i, i + 1], axis=1).ravel()
+
+def quad_order(n):
+    first = np.arange(0, n, 4)[:, None]
+    return (first + np.array([0, 1, 2, 0, 2, 3])).ravel()
+
+class VertexBatch:
+    def __init__(self, use_vbo=True):
+        # Display lists record client arrays, so batches drawn inside one pass use_vbo=False
+        self.use_vbo = use_vbo
+        self.vbo = None
+        self.groups = {}  # (mode, point size or line width) -> list of (vertices, colors)
+        self.draw_calls = 0
+        self.vertices = 0
+
+    def add(self, mode, vertices, color, size=1.0):
+        # color is one RGB for the whole shape or one per vertex
+        vertices = np.asarray(vertices, dtype=np.float32)
+        if len(vertices) == 0:
+            return
+        if vertices.shape[1] == 2:
+            vertices = np.column_stack([vertices, np.zeros(len(vertices), dtype=np.float32)])
+        colors = np.asarray(color, dtype=np.float32)
+        # Everything collapses onto points, lines and triangles, so shapes of a kind share one draw
+        order = None
+        if mode in (gl.GL_POLYGON, gl.GL_TRIANGLE_FAN):
+            mode, order = gl.GL_TRIANGLES, fan_order(len(vertices))
+        elif mode == gl.GL_QUADS:
+            mode, order = gl.GL_TRIANGLES, quad_order(len(vertices))
+        elif mode in (gl.GL_LINE_STRIP, gl.GL_LINE_LOOP):
+            ends = np.arange(len(vertices) if mode == gl.GL_LINE_LOOP else len(vertices) - 1)
+            mode, order = gl.GL_LINES, np.stack([ends, (ends + 1) % len(vertices)], axis=1).ravel()
+        if order is not None:
+            vertices = vertices[order]
+            if colors.ndim == 2:
+                colors = colors[order]
+        self.groups.setdefault((mode, size), []).append((vertices, colors))
+
+    def flush(self):
+        if not self.groups:
+            return
+        total = sum(len(v) for chunks in self.groups.values() for v, _ in chunks)
+        data = np.empty((total, 6), dtype=np.float32)
+        draws = []
+        start = 0
+        for (mode, size), chunks in self.groups.items():
+            first = start
+            for vertices, colors in chunks:
+                end = start + len(vertices)
+                data[start:end, :3] = vertices
+                data[start:end, 3:] = colors
+                start = end
+            draws.append((mode, size, first, start - first))
+        self.groups = {}
+        if self.use_vbo:
+            if self.vbo is None:
+                self.vbo = gl.glGenBuffers(1)
+            gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.vbo)
+            gl.glBufferData(gl.GL_ARRAY_BUFFER, data.nbytes, data, gl.GL_STREAM_DRAW)
+            gl.glVertexPointer(3, gl.GL_FLOAT, BATCH_STRIDE, None)
+            gl.glColorPointer(3, gl.GL_FLOAT, BATCH_STRIDE, gl.GLvoidp(12))
+        else:
+            # Raw addresses, so the interleaved array is used in place rather than copied per column
+            gl.glVertexPointer(3, gl.GL_FLOAT, BATCH_STRIDE, gl.GLvoidp(data.ctypes.data))
+            gl.glColorPointer(3, gl.GL_FLOAT, BATCH_STRIDE, gl.GLvoidp(data.ctypes.data + 12))
+        gl.glEnableClientState(gl.GL_VERTEX_ARRAY)
+        gl.glEnableClientState(gl.GL_COLOR_ARRAY)
+        for mode, size, first, count in draws:
+            if mode == gl.GL_POINTS:
+                gl.glPointSize(size)
+            elif mode == gl.GL_LINES:
+                gl.glLineWidth(size)
+            gl.glDrawArrays(mode, first, count)
+        gl.glDisableClientState(gl.GL_COLOR_ARRAY)
+        gl.glDisableClientState(gl.GL_VERTEX_ARRAY)
+        if self.use_vbo:
+            gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
+        gl.glLineWidth(1)
+        self.draw_calls += len(draws)
+        self.vertices += total
+
+    def release(self):
+        if self.vbo is not None:
+            gl.glDeleteBuffers(1, [self.vbo])
+            self.vbo = None
+
+class ImmediateBatch:
+    # Same interface, but every vertex goes straight to glVertex as before
+    def __init__(self, use_vbo=True):
+        self.draw_calls = 0
+        self.vertices = 0
+
+    def add(self, mode, vertices, color, size=1.0):
+        if len(vertices) == 0:
+            return
+        if mode == gl.GL_POINTS:
+            gl.glPointSize(size)
+        else:
+            gl.glLineWidth(size)
+        colors = np.asarray(color, dtype=np.float32)
+        if colors.ndim == 1:
+            gl.glColor3f(*colors.tolist())
+        gl.glBegin(mode)
+        for i, vertex in enumerate(np.asarray(vertices, dtype=np.float32).tolist()):
+            if colors.ndim == 2:
+                gl.glColor3f(*colors[i].tolist())
+            if len(vertex) == 2:
+                gl.glVertex2f(*vertex)
+            else:
+                gl.glVertex3f(*vertex)
+        gl.glEnd()
+        gl.glLineWidth(1)
+        self.draw_calls += 1
+        self.vertices += len(vertices)
+
+    def flush(self):
+        pass
+
+    def release(self):
+        pass
+
+def new_batch(use_vbo=True):
+    return ImmediateBatch(use_vbo) if RENDERER == "immediate" else VertexBatch(use_vbo)
+
+# --- GL call counting: wraps the GL modules so every Python-to-GL call is tallied ---
+class CountingModule:
+    def __init__(self, module, counter):
+        self._module = module
+        self._counter = counter
+
+    def __getattr__(self, name):
+        value = getattr(self._module, name)
+        if name.startswith("gl") and callable(value):
+            counter, function = self._counter, value
+
+            def value(*args, **kwargs):
+                counter.calls += 1
+                return function(*args, **kwargs)
+        setattr(self, name, value)  # looked up once per name
+        return value
+
+class GLCallCounter:
+    def __init__(self):
+        self.enabled = False
+        self.calls = 0
+        self.last_frame = 0  # calls made during the last finished frame
+
+    def enable(self, on=True):
+        global gl, glu, glut
+        import_gl()
+        if on and not self.enabled:
+            gl, glu, glut = (CountingModule(module, self) for module in (gl, glu, glut))
+        elif not on and self.enabled:
+            gl, glu, glut = gl._module, glu._module, glut._module
+        self.enabled = on
+        self.calls = 0
+
+    def end_frame(self):
+        self.last_frame = self.calls
+        self.calls = 0
+        return self.last_frame
+
+gl_calls = GLCallCounter()
+
 # Celestial
+def sky_tables(size=SKY_TABLE_SIZE):
+    # Sky colors at size even steps around the day, as (horizon, zenith) texture rows,
+    # for a clear and an overcast sky, plus the star brightness at each step
+    angles = np.arange(size) * 360.0 / size
+    keys = [key[0] for key in SKY_KEYS]
+    def lookup(values):
+        values = np.asarray(values, dtype=np.float64)
+        return np.stack([np.interp(angles, keys, values[:, i], period=360) for i in range(values.shape[1])], axis=-1)
+    clear = np.stack([lookup([key[1] for key in SKY_KEYS]), lookup([key[2] for key in SKY_KEYS])])
+    grey = clear.mean(axis=-1, keepdims=True) * 0.85
+    overcast = clear + (grey - clear) * OVERCAST
+    stars = np.interp(angles, keys, [key[3] for key in SKY_KEYS], period=360)
+    return clear.astype(np.float32), overcast.astype(np.float32), stars.astype(np.float32)
+
 class CelestialBodyManager:
+    # Draws the sky for a sun angle kept by the world; the dome, stars and color tables are
+    # built once, so a frame costs the same at any time of day
     def __init__(self):
-        self.sun_position = 0
+        self.sun_position = 0  # last angle drawn, 0 = sunrise
         self.is_day = True
-        self.stars = [
-            (random.uniform(-GROUND_SIZE, GROUND_SIZE), random.uniform(600, 900), random.uniform(-GROUND_SIZE, GROUND_SIZE))
-            for _ in range(STAR_COUNT)
-        ]
-
-    def update_background_color(self):
-        if not self.is_day:
-            gl.glClearColor(0.05, 0.05, 0.15, 1.0)  # Night sky
-        elif current_season == 2:
-            gl.glClearColor(0.7, 0.7, 0.7, 1.0)  # Light grey for rain
-        else:
-            gl.glClearColor(0.53, 0.81, 0.98, 1.0)  # Sky blue
+        self.stars = np.empty((0, 3), dtype=np.float32)  # filled in with the rest of the world content
+        self.clear, self.overcast, self.star_brightness = sky_tables()
+        self.textures = []  # clear, overcast
 
-    def toggle_day_night(self):
-        self.sun_position += 5
-        if self.sun_position >= 180:
-            self.sun_position = 0
-            self.is_day = not self.is_day
+    def upload(self):
+        # Needs a GL context: stars become a static point buffer, the tables two textures
+        resources.add_mesh("stars", self.stars, gl.GL_POINTS)
+        if self.textures:
+            gl.glDeleteTextures(self.textures)
+        self.textures = []
+        for table in (self.clear, self.overcast):
+            texture = gl.glGenTextures(1)
+            gl.glBindTexture(gl.GL_TEXTURE_2D, texture)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_LINEAR)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_S, gl.GL_REPEAT)  # the day wraps around
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_T, gl.GL_CLAMP_TO_EDGE)
+            gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGB, SKY_TABLE_SIZE, 2, 0, gl.GL_RGB, gl.GL_FLOAT, table)
+            self.textures.append(texture)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
 
-    def draw_sun_or_moon(self):
-        angle = self.sun_position
+    def update_background_color(self, row, overcast):
+        # Below the dome's lower edge the clear color shows, so it follows the horizon
+        table = self.overcast if overcast else self.clear
+        gl.glClearColor(*table[0, row].tolist(), 1.0)
+
+    def sun_xyz(self):
+        # The moon rises opposite the sun
+        angle = self.sun_position if self.is_day else self.sun_position - 180
         radius = 800  # Set radius to 800 units to move sun further from center
         x = math.cos(math.radians(angle)) * radius + 100  # Offset to the right
         y = math.sin(math.radians(angle)) * 400  # Allow sun to go below ground
         z = 0
+        return x, y, z
+
+    def draw_dome(self, eye, overcast):
+        # Centered on the camera, drawn first and without depth so everything else covers it.
+        # The texture matrix slides s to the sun angle; t runs from horizon to zenith.
+        gl.glDepthMask(gl.GL_FALSE)
+        gl.glDisable(gl.GL_DEPTH_TEST)
+        gl.glEnable(gl.GL_TEXTURE_2D)
+        gl.glTexEnvi(gl.GL_TEXTURE_ENV, gl.GL_TEXTURE_ENV_MODE, gl.GL_REPLACE)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, self.textures[overcast])
+        gl.glMatrixMode(gl.GL_TEXTURE)
+        gl.glLoadIdentity()
+        gl.glTranslatef(self.sun_position / 360.0 + 0.5 / SKY_TABLE_SIZE, 0, 0)
+        gl.glMatrixMode(gl.GL_MODELVIEW)
+        gl.glPushMatrix()
+        gl.glTranslatef(*eye)
+        resources.draw("skydome")
+        gl.glPopMatrix()
+        gl.glMatrixMode(gl.GL_TEXTURE)
+        gl.glLoadIdentity()
+        gl.glMatrixMode(gl.GL_MODELVIEW)
+        gl.glTexEnvi(gl.GL_TEXTURE_ENV, gl.GL_TEXTURE_ENV_MODE, gl.GL_MODULATE)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
+        gl.glDisable(gl.GL_TEXTURE_2D)
+        gl.glEnable(gl.GL_DEPTH_TEST)
+        gl.glDepthMask(gl.GL_TRUE)
+
+    def draw_sun_or_moon(self, segments=SKY_SEGMENTS[0]):
+        x, y, z = self.sun_xyz()
         gl.glPushMatrix()
         gl.glTranslatef(x, y, z)
         if self.is_day:
-            gl.glColor3f(1.0, 1.0, 0.0)
-            glut.glutSolidSphere(SUN_RADIUS, 32, 32)
+            resources.draw(f"sun_{segments}")
         else:
-            gl.glColor3f(0.9, 0.9, 1.0)
-            glut.glutSolidSphere(MOON_RADIUS, 32, 32)
+            resources.draw(f"moon_{segments}")
         gl.glPopMatrix()
 
-    def draw_stars(self):
-        gl.glColor3f(1.0, 1.0, 1.0)
+    def draw_stars(self, brightness):
+        # Added onto the dome, so they fade in with the dusk instead of showing as grey dots
+        gl.glEnable(gl.GL_BLEND)
+        gl.glBlendFunc(gl.GL_ONE, gl.GL_ONE)
+        gl.glColor3f(brightness, brightness, brightness)
         gl.glPointSize(2.0)
-        gl.glBegin(gl.GL_POINTS)
-        for x, y, z in self.stars:
-            gl.glVertex3f(x, y, z)
-        gl.glEnd()
+        resources.draw("stars")
+        gl.glDisable(gl.GL_BLEND)
 
-    def update_and_draw(self):
+    def submit(self, queue, season, sun_position, eye, frustum=None):
         # Sun is up from 0 to 180, moon from 180 to 360
-        if 0 <= self.sun_position < 180:
-            self.is_day = True
-        else:
-            self.is_day = False
-        self.update_background_color()
-        self.draw_sun_or_moon()
-        if not self.is_day:
-            self.draw_stars()
+        self.sun_position = sun_position
+        self.is_day = 0 <= sun_position < 180
+        row = int(sun_position * SKY_TABLE_SIZE / 360) % SKY_TABLE_SIZE
+        overcast = season == 2
+        self.update_background_color(row, overcast)
+        queue.submit("sky", self.draw_dome, eye, overcast, layer=LAYER_BACKDROP, primitive="triangles")
+        brightness = float(self.star_brightness[row])
+        if brightness > 0:
+            queue.submit("stars", self.draw_stars, brightness, layer=LAYER_SKY, primitive="points")
+        sun_color = (1.0, 1.0, 0.0) if self.is_day else (0.9, 0.9, 1.0)
+        radius = SUN_RADIUS if self.is_day else MOON_RADIUS
+        if frustum is None or frustum.sphere_visible(*self.sun_xyz(), radius, far=False):
+            queue.submit("sun", self.draw_sun_or_moon, governor.settings["sky_segments"], layer=LAYER_SKY,
+                         primitive="triangles", color=sun_color)
 
 celestial_manager = CelestialBodyManager()
 
 # Ground
-def draw_ground():
-    if current_season == 3:
-        gl.glColor3f(1.0, 1.0, 1.0)  # White for winter
-    else:
-        gl.glColor3f(0.0, 0.8, 0.0)
-    gl.glBegin(gl.GL_QUADS)
-    gl.glVertex3f(-GROUND_SIZE, 0, -GROUND_SIZE)
-    gl.glVertex3f(GROUND_SIZE, 0, -GROUND_SIZE)
-    gl.glVertex3f(GROUND_SIZE, 0, GROUND_SIZE)
-    gl.glVertex3f(-GROUND_SIZE, 0, GROUND_SIZE)
-    gl.glEnd()
+def ground_color(season):
+    if season == 3:
+        return (1.0, 1.0, 1.0)  # White for winter
+    return (0.0, 0.8, 0.0)
 
-# Grass
-class GrassBlade:
-    def __init__(self, x, z, height, width, color):
-        self.x = x
-        self.z = z
-        self.height = height
-        self.width = width
-        self.color = color
-        self.bend = 0
+GROUND_QUAD = np.array([(-GROUND_SIZE, 0, -GROUND_SIZE), (GROUND_SIZE, 0, -GROUND_SIZE),
+                        (GROUND_SIZE, 0, GROUND_SIZE), (-GROUND_SIZE, 0, GROUND_SIZE)], dtype=np.float32)
 
-    def draw(self):
-        gl.glColor3f(*self.color)
-        gl.glBegin(gl.GL_LINES)
-        gl.glVertex3f(self.x, 0, self.z)
-        gl.glVertex3f(self.x + self.bend, self.height, self.z)
-        gl.glEnd()
+def draw_ground(batch, color):
+    batch.add(gl.GL_QUADS, GROUND_QUAD, color)
+
+# --- Wind: gust fronts sweep a coarse grid; grass, leaves and weather sample it ---
+WIND_GRID = 16  # simulated cells per side over the whole ground
+WIND_SAMPLE_GRID = 64  # the simulated grid is smoothed up to this for lookups
+WIND_GUSTS = 4  # overlapping gust fronts
+WIND_BASE = 20.0  # steady breeze, units per second
+WIND_GUST = 60.0  # extra speed at the peak of a gust
+WIND_RIPPLES = 4  # random cross waves carried by the breeze; break gust fronts into patches
+
+def grid_centers(size):
+    return ((np.arange(size) + 0.5) * (2 * GROUND_SIZE / size) - GROUND_SIZE).astype(np.float32)
+
+def wind_cell_index(x, z, size=WIND_SAMPLE_GRID):
+    # Flat index of the sample grid cell each position falls in
+    scale = np.float32(size / (2 * GROUND_SIZE))
+    i = (x * scale + np.float32(size / 2)).astype(np.int32)
+    j = (z * scale + np.float32(size / 2)).astype(np.int32)
+    np.clip(i, 0, size - 1, out=i)
+    np.clip(j, 0, size - 1, out=j)
+    j *= size
+    j += i
+    return j
+
+def interpolation_matrix(fine, coarse):
+    # Linear interpolation from coarse grid points to fine ones, along one axis
+    u = np.clip((grid_centers(fine) + GROUND_SIZE) / (2 * GROUND_SIZE / coarse) - 0.5, 0, coarse - 1)
+    i = np.minimum(u.astype(np.intp), coarse - 2)
+    matrix = np.zeros((fine, coarse), dtype=np.float32)
+    rows = np.arange(fine)
+    matrix[rows, i] = 1 - (u - i)
+    matrix[rows, i + 1] = u - i
+    return matrix
+
+class WindField:
+    def __init__(self, rng, size=WIND_GRID, sample_size=WIND_SAMPLE_GRID):
+        self.size = size
+        self.sample_size = sample_size
+        self.cx, self.cz = np.meshgrid(grid_centers(size), grid_centers(size))  # rows run along z, columns along x
+        self.vx = np.zeros((size, size), dtype=np.float32)  # wind velocity, units per second
+        self.vz = np.zeros((size, size), dtype=np.float32)
+        self.upsample = interpolation_matrix(sample_size, size)
+        self.time = 0.0
+        # Prevailing heading, then one row per wave: heading, wavelength, speed, phase, strength.
+        # Gust fronts come first and roughly follow the prevailing wind; ripples point anywhere
+        heading = rng.uniform(0, 2 * math.pi)
+        waves = np.column_stack([
+            np.concatenate([heading + rng.uniform(-0.6, 0.6, WIND_GUSTS), rng.uniform(0, 2 * math.pi, WIND_RIPPLES)]),
+            rng.uniform(300, 900, WIND_GUSTS + WIND_RIPPLES),
+            np.concatenate([rng.uniform(60, 150, WIND_GUSTS), np.zeros(WIND_RIPPLES)]),
+            rng.uniform(0, 2 * math.pi, WIND_GUSTS + WIND_RIPPLES),
+            np.concatenate([rng.uniform(0.4, 1.0, WIND_GUSTS), rng.uniform(0.05, 0.15, WIND_RIPPLES)]),
+        ])
+        self.set_params(heading, waves)
+
+    def set_params(self, heading, waves):
+        self.heading = float(heading)
+        self.waves = np.array(waves, dtype=np.float64)
+        # Everything that does not change over time is worked out once, per grid point
+        angle, wavelength, speed, phase, strength = self.waves.T
+        k = 2 * math.pi / wavelength
+        # Phase of each wave at each grid point, one flattened row per wave
+        self.projection = (np.outer(np.cos(angle) * k, self.cx.ravel())
+                           + np.outer(np.sin(angle) * k, self.cz.ravel())).astype(np.float32)
+        # Ripples drift with the prevailing breeze, so their speed is the breeze along their heading
+        speed = speed.copy()
+        speed[WIND_GUSTS:] = WIND_BASE * np.cos(angle[WIND_GUSTS:] - self.heading)
+        self.omega = k * speed
+        gusts = slice(0, WIND_GUSTS)
+        self.gust_x = (np.cos(angle[gusts]) * strength[gusts] * WIND_GUST).astype(np.float32)
+        self.gust_z = (np.sin(angle[gusts]) * strength[gusts] * WIND_GUST).astype(np.float32)
+        self.ripple_strength = strength[WIND_GUSTS:].astype(np.float32)
+        self.update(self.time)
+
+    def update(self, t):
+        # Cost depends only on the grid sizes, never on how many things sample them
+        self.time = t
+        base_x = WIND_BASE * math.cos(self.heading)
+        base_z = WIND_BASE * math.sin(self.heading)
+        # Every wave in one pass: one row of travelling sines per wave
+        sines = np.sin(self.projection - (self.omega * t - self.waves[:, 3]).astype(np.float32)[:, None])
+        # Fronts are sharpened so calm spells separate the gusts
+        pulse = np.maximum(sines[:WIND_GUSTS], 0)
+        pulse *= pulse * pulse
+        # Ripples add up to smooth noise that breaks each front into patches
+        patch = (1 + np.dot(self.ripple_strength, sines[WIND_GUSTS:])).reshape(self.size, self.size)
+        np.dot(self.gust_x, pulse, out=self.vx.reshape(-1))
+        np.dot(self.gust_z, pulse, out=self.vz.reshape(-1))
+        self.vx *= patch
+        self.vz *= patch
+        self.vx += base_x
+        self.vz += base_z
+        # Smooth onto the finer lookup grid, so samplers need a single read each
+        self.sample_x = (self.upsample @ self.vx @ self.upsample.T).ravel()
+        self.sample_z = (self.upsample @ self.vz @ self.upsample.T).ravel()
+
+    def mirror(self, wind):
+        # The sample grids are rebuilt every update, never written in place, so sharing them is safe
+        self.time = wind.time
+        self.sample_x = wind.sample_x
+        self.sample_z = wind.sample_z
 
-    def update(self, wind_strength, wind_direction):
-        self.bend += wind_strength * wind_direction
-        self.bend += random.uniform(-0.5, 0.5)
-        self.bend = max(min(self.bend, self.height // 2), -self.height // 2)
+# Grass
+GRASS_HEIGHT = 18
+GRASS_FLEX = 0.08  # tip offset per unit of wind speed
+GRASS_RESPONSE = 0.15  # fraction of the way a blade moves toward its wind bend each tick
+GRASS_FLUTTER = 0.15  # how much blades shiver around the bend, relative to it
+GRASS_CHUNKS = 8  # chunks per side; each chunk picks its own detail level
+# Detail levels, nearest first: (up to this far from the camera, share of blades drawn, line width)
+GRASS_LOD = ((350.0, 1.0, 1), (700.0, 0.25, 2), (math.inf, 0.0625, 3))
+
+def grass_chunk_index(x, z):
+    size = 2 * GROUND_SIZE / GRASS_CHUNKS
+    i = np.clip(((x + GROUND_SIZE) / size).astype(np.intp), 0, GRASS_CHUNKS - 1)
+    j = np.clip(((z + GROUND_SIZE) / size).astype(np.intp), 0, GRASS_CHUNKS - 1)
+    return j * GRASS_CHUNKS + i
 
 class GrassField:
-    def __init__(self, blade_count=4000):
-        self.blades = []
-        self.wind_strength = 0
-        self.wind_direction = 0
-        self.initialize_blades(blade_count)
+    def __init__(self, blade_count=4000, seed=None, blades=None):
+        self.rng = np.random.default_rng(seed)
+        if blades is None:
+            self.initialize_blades(blade_count)
+        else:
+            self.set_blades(*blades)
 
     def initialize_blades(self, blade_count=4000):
-        self.blades = []
-        for _ in range(blade_count):
-            x = random.randint(-GROUND_SIZE, GROUND_SIZE)
-            z = random.randint(-GROUND_SIZE, GROUND_SIZE)
-            # Skip grass if inside pond radius
-            pond_x, pond_z, pond_r = -200, 0, 60
-            dist = ((x - pond_x)**2 + (z - pond_z)**2)**0.5
-            if dist < pond_r + 8:
+        x = self.rng.integers(-GROUND_SIZE, GROUND_SIZE + 1, blade_count)
+        z = self.rng.integers(-GROUND_SIZE, GROUND_SIZE + 1, blade_count)
+        # Skip grass if inside pond radius
+        pond_x, pond_z, pond_r = POND_X, POND_Z, POND_RADIUS
+        dist = np.hypot(x - pond_x, z - pond_z)
+        keep = dist >= pond_r + 8
+        count = int(np.count_nonzero(keep))
+        color = np.zeros((count, 3), dtype=np.float32)
+        color[:, 1] = self.rng.uniform(0.4, 1.0, count)
+        self.set_blades(x[keep].astype(np.float32), z[keep].astype(np.float32), color)
+
+    def set_blades(self, x, z, color):
+        # Everything else is derived from blade positions and colors, so only those are cached.
+        # Blades are grouped by chunk; within a chunk their order is random, so any prefix is an even thinning
+        chunk = grass_chunk_index(x, z)
+        order = np.argsort(chunk, kind="stable")
+        self.x = x[order]
+        self.z = z[order]
+        self.color = color[order]
+        count = len(self.x)
+        self.chunk_start = np.searchsorted(chunk[order], np.arange(GRASS_CHUNKS * GRASS_CHUNKS + 1))
+        centers = grid_centers(GRASS_CHUNKS)
+        cx, cz = np.meshgrid(centers, centers)
+        self.chunk_centers = np.stack([cx.ravel(), np.full(cx.size, GRASS_HEIGHT / 2), cz.ravel()], axis=1).astype(np.float32)
+        self.chunk_radius = math.hypot(GROUND_SIZE / GRASS_CHUNKS * math.sqrt(2), GRASS_HEIGHT / 2)
+        self.height = np.full(count, GRASS_HEIGHT, dtype=np.float32)
+        # Blades never move, so their wind grid lookups are fixed; bends are kept per wind cell
+        self.wind_cell = wind_cell_index(self.x, self.z)
+        cells = WIND_SAMPLE_GRID * WIND_SAMPLE_GRID
+        self.bend_x = np.zeros(cells, dtype=np.float32)
+        self.bend_z = np.zeros(cells, dtype=np.float32)
+        self.bend_max = GRASS_HEIGHT // 2
+        cx, cz = np.meshgrid(grid_centers(WIND_SAMPLE_GRID), grid_centers(WIND_SAMPLE_GRID))
+        self.flutter_phase = (cx * 0.07 + cz * 0.13).ravel().astype(np.float32)
+        # Line vertices: even rows are blade roots, odd rows are blade tips
+        self.vertices = np.zeros((2 * count, 3), dtype=np.float32)
+        self.vertices[0::2, 0] = self.x
+        self.vertices[0::2, 2] = self.z
+        self.vertices[1::2, 0] = self.x
+        self.vertices[1::2, 1] = self.height
+        self.vertices[1::2, 2] = self.z
+        self.colors = np.repeat(self.color, 2, axis=0)
+        self.lod_key = None
+        self.lod_batches = []  # (line width, vertex indices), or None to draw everything at full detail
+        self.active = None  # blades drawn last frame, whose tips follow the wind; None is all of them
+
+    def __len__(self):
+        return len(self.x)
+
+    def update(self, wind):
+        # Bends ease toward the wind per wind cell; only blades being drawn have their tips moved
+        flutter = 1 + GRASS_FLUTTER * np.sin(self.flutter_phase + np.float32(wind.time * 6))
+        for bend, cells in ((self.bend_x, wind.sample_x), (self.bend_z, wind.sample_z)):
+            target = np.clip(cells * flutter * GRASS_FLEX, -self.bend_max, self.bend_max)
+            bend += (target - bend) * GRASS_RESPONSE
+        self.move_tips()
+
+    def move_tips(self):
+        if self.active is None:
+            np.add(self.x, np.take(self.bend_x, self.wind_cell), out=self.vertices[1::2, 0])
+            np.add(self.z, np.take(self.bend_z, self.wind_cell), out=self.vertices[1::2, 2])
+        else:
+            blades, tips, cells = self.active
+            self.vertices[tips, 0] = self.x[blades] + np.take(self.bend_x, cells)
+            self.vertices[tips, 2] = self.z[blades] + np.take(self.bend_z, cells)
+
+    def lod_levels(self, frustum=None, eye=None):
+        # Detail level per chunk from its distance to the camera; -1 for chunks out of view
+        levels = np.zeros(len(self.chunk_centers), dtype=np.int8)
+        if eye is not None:
+            distance = np.linalg.norm(self.chunk_centers - np.asarray(eye, dtype=np.float32), axis=1)
+            levels[:] = np.searchsorted([limit for limit, _, _ in GRASS_LOD[:-1]], distance)
+        if frustum is not None:
+            levels[~frustum.spheres_visible(self.chunk_centers, self.chunk_radius, "grass")] = -1
+        return levels
+
+    def build_lod(self, levels, density=1.0):
+        # Blade ranges per detail level: the first share of each chunk, as line vertex indices
+        self.lod_batches = []
+        if (levels == 0).all() and density >= 1:
+            self.lod_batches, self.active = None, None
+            return
+        starts, counts = self.chunk_start[:-1], np.diff(self.chunk_start)
+        drawn = []
+        for level, (_, share, width) in enumerate(GRASS_LOD):
+            chunks = np.flatnonzero(levels == level)
+            lengths = np.ceil(counts[chunks] * share * density).astype(np.intp)
+            total = int(lengths.sum())
+            if total == 0:
                 continue
-            height = 18
-            width = random.randint(10, 30)
-            green = random.uniform(0.4, 1.0)
-            color = (0, green, 0)
-            self.blades.append(GrassBlade(x, z, height, width, color))
+            # Concatenated aranges: each chunk's start, repeated for its blades, plus the running offset
+            offsets = np.repeat(starts[chunks] - np.cumsum(lengths) + lengths, lengths)
+            blades = offsets + np.arange(total)
+            indices = np.empty(2 * total, dtype=np.uint32)
+            indices[0::2] = 2 * blades
+            indices[1::2] = 2 * blades + 1
+            self.lod_batches.append((width, indices))
+            drawn.append(blades)
+        blades = np.concatenate(drawn) if drawn else np.empty(0, dtype=np.intp)
+        self.active = (blades, 2 * blades + 1, self.wind_cell[blades])
+        self.move_tips()  # blades coming into view catch up with the wind straight away
+
+    def draw(self, frustum=None, eye=None, density=1.0):
+        # density thins every chunk further, for the quality governor
+        if len(self.vertices) == 0:
+            return
+        levels = self.lod_levels(frustum, eye)
+        key = (levels.tobytes(), density)
+        if key != self.lod_key:
+            self.lod_key = key
+            self.build_lod(levels, density)
+        if self.lod_batches == []:
+            return
+        gl.glEnableClientState(gl.GL_VERTEX_ARRAY)
+        gl.glEnableClientState(gl.GL_COLOR_ARRAY)
+        gl.glVertexPointer(3, gl.GL_FLOAT, 0, self.vertices)
+        gl.glColorPointer(3, gl.GL_FLOAT, 0, self.colors)
+        if self.lod_batches is None:
+            gl.glDrawArrays(gl.GL_LINES, 0, len(self.vertices))
+        else:
+            # Thinned chunks draw wider lines, so a far patch keeps roughly the same coverage
+            for width, indices in self.lod_batches:
+                gl.glLineWidth(width)
+                gl.glDrawElements(gl.GL_LINES, len(indices), gl.GL_UNSIGNED_INT, indices)
+            gl.glLineWidth(1)
+        gl.glDisableClientState(gl.GL_COLOR_ARRAY)
+        gl.glDisableClientState(gl.GL_VERTEX_ARRAY)
 
-    def update_and_draw(self):
-        for blade in self.blades:
-            blade.update(self.wind_strength, self.wind_direction)
-            blade.draw()
-        self.wind_strength *= 0.5
+grass_field = None  # built with the rest of the world content when the window opens
 
-grass_field = GrassField(4000)
+# --- World content: grass and stars built once per seed, cached on disk ---
+GRASS_COUNT = 4000
+WORLD_CACHE_DIR = ".world_cache"
+WORLD_CACHE_VERSION = 1
+
+def generate_stars(rng, count=STAR_COUNT):
+    stars = np.empty((count, 3), dtype=np.float32)
+    stars[:, 0] = rng.uniform(-GROUND_SIZE, GROUND_SIZE, count)
+    stars[:, 1] = rng.uniform(600, 900, count)
+    stars[:, 2] = rng.uniform(-GROUND_SIZE, GROUND_SIZE, count)
+    return stars
+
+def world_cache_path(seed, blade_count):
+    return os.path.join(WORLD_CACHE_DIR, f"world-v{WORLD_CACHE_VERSION}-{seed}-{blade_count}.npz")
+
+def build_world_content(seed=None, blade_count=GRASS_COUNT):
+    # Returns (grass, stars); a seeded build is loaded from the cache when one exists
+    path = world_cache_path(seed, blade_count) if seed is not None else None
+    if path and os.path.exists(path):
+        try:
+            with np.load(path) as cached:
+                blades = (cached["grass_x"], cached["grass_z"], cached["grass_color"])
+                return GrassField(seed=seed, blades=blades), cached["stars"]
+        except (OSError, KeyError, ValueError):
+            pass  # unreadable cache: rebuild and overwrite it
+    grass = GrassField(blade_count, seed)
+    stars = generate_stars(np.random.default_rng(None if seed is None else seed + 1))
+    if path:
+        try:
+            os.makedirs(WORLD_CACHE_DIR, exist_ok=True)
+            np.savez(path, grass_x=grass.x, grass_z=grass.z, grass_color=grass.color, stars=stars)
+        except OSError:
+            pass  # read-only directory: just run without a cache
+    return grass, stars
 
 # Tree
 
@@ -160,212 +845,475 @@ def draw_cylinder(x, y, z, height, radius, color):
     gl.glPushMatrix()
     gl.glTranslatef(x, y, z)
     gl.glColor3f(*color)
-    quad = glu.gluNewQuadric()
-    glu.gluCylinder(quad, radius, radius * 0.8, height, 8, 1)
+    gl.glScalef(radius, radius, height)
+    resources.draw("cylinder")
     gl.glPopMatrix()
 
+POND_COLOR = (0.0, 0.5, 1.0)
+
 def draw_pond():
-    pond_radius = 60
-    pond_height = 8
-    gl.glColor3f(0.0, 0.5, 1.0)
     gl.glPushMatrix()
-    gl.glTranslatef(-200, 0, 0)  # y=0 so bottom is at ground
+    gl.glTranslatef(POND_X, 0, POND_Z)  # y=0 so bottom is at ground
     gl.glRotatef(-90, 1, 0, 0)
-    quad = glu.gluNewQuadric()
-    glu.gluCylinder(quad, pond_radius, pond_radius, pond_height, 40, 1)
-    glu.gluDisk(quad, 0, pond_radius, 40, 1)  # top
-    gl.glTranslatef(0, 0, pond_height)
-    glu.gluDisk(quad, 0, pond_radius, 40, 1)  # bottom
+    resources.draw("pond")  # side wall plus a disk at z=0 and z=pond_height
     gl.glPopMatrix()
 
 # Character
 
-player_facing = 0.0  # degrees
-walk_anim_phase = 0.0
-walk_anim_speed = 0.18  # radians per frame
-last_time = time.time()
-
-def draw_minecraft_player(x, y, z, facing):
-    head_size = 8
-    body_w, body_h, body_d = 6, 12, 4
-    arm_w, arm_h, arm_d = 2.5, 10, 2.5
-    leg_w, leg_h, leg_d = 2.5, 10, 2.5
-    global walk_anim_phase
-    swing = math.sin(walk_anim_phase) * 30
-    gl.glPushMatrix()
-    gl.glTranslatef(x, y, z)
-    gl.glRotatef(facing, 0, 1, 0)
-    # Head
-    gl.glColor3f(0.0, 0.0, 0.0)  # Black head
-    gl.glPushMatrix()
-    gl.glTranslatef(0, body_h + head_size/2, 0)
-    glut.glutSolidCube(head_size)
-    gl.glPopMatrix()
-    # Body
-    gl.glColor3f(1.0, 0.0, 0.0)  # Red body
-    gl.glPushMatrix()
-    gl.glTranslatef(0, body_h/2, 0)
-    gl.glScalef(body_w, body_h, body_d)
-    glut.glutSolidCube(1)
-    gl.glPopMatrix()
-    # Left Arm
-    gl.glColor3f(0.55, 0.27, 0.07)  # Brown arms
-    gl.glPushMatrix()
-    gl.glTranslatef(-(body_w/2 + arm_w/2), body_h - arm_h/2, 0)
-    gl.glRotatef(swing, 1, 0, 0)
-    gl.glScalef(arm_w, arm_h, arm_d)
-    glut.glutSolidCube(1)
-    gl.glPopMatrix()
-    # Right Arm
-    gl.glColor3f(0.55, 0.27, 0.07)  # Brown arms
-    gl.glPushMatrix()
-    gl.glTranslatef((body_w/2 + arm_w/2), body_h - arm_h/2, 0)
-    gl.glRotatef(-swing, 1, 0, 0)
-    gl.glScalef(arm_w, arm_h, arm_d)
-    glut.glutSolidCube(1)
-    gl.glPopMatrix()  # End right arm
-    # Left Leg (closer to center)
-    gl.glColor3f(0.0, 0.0, 0.0)  # Black legs
-    gl.glPushMatrix()
-    gl.glTranslatef(-body_w/6, -leg_h/2, 0)
-    gl.glRotatef(-swing, 1, 0, 0)
-    gl.glScalef(leg_w, leg_h, leg_d)
-    glut.glutSolidCube(1)
-    gl.glPopMatrix()
-    # Right Leg (closer to center)
-    gl.glColor3f(0.0, 0.0, 0.0)  # Black legs
-    gl.glPushMatrix()
-    gl.glTranslatef(body_w/6, -leg_h/2, 0)
-    gl.glRotatef(swing, 1, 0, 0)
-    gl.glScalef(leg_w, leg_h, leg_d)
-    glut.glutSolidCube(1)
-    gl.glPopMatrix()
-    gl.glPopMatrix()
+walk_anim_speed = 0.18 * 60  # radians per second
 
-# Rain
-class Raindrop:
-    def __init__(self):
-        self.x = random.uniform(-GROUND_SIZE, GROUND_SIZE)
-        self.y = random.uniform(200, 400)
-        self.z = random.uniform(-GROUND_SIZE, GROUND_SIZE)
-        self.speed = 8
-    def update(self):
-        self.y -= self.speed
-        return self.y > 0
-
-def draw_rain(raindrops):
-    gl.glColor3f(0.5, 0.5, 1.0)
-    gl.glBegin(gl.GL_LINES)
-    for drop in raindrops:
-        gl.glVertex3f(drop.x, drop.y, drop.z)
-        gl.glVertex3f(drop.x, drop.y - 15, drop.z)
-    gl.glEnd()
-
-# Snow
-class Snowflake:
-    def __init__(self):
-        self.x = random.uniform(-GROUND_SIZE, GROUND_SIZE)
-        self.y = random.uniform(200, 400)
-        self.z = random.uniform(-GROUND_SIZE, GROUND_SIZE)
-        self.speed = random.uniform(2, 4)
-    def update(self):
-        self.y -= self.speed
-        if self.y < 0:
-            self.x = random.uniform(-GROUND_SIZE, GROUND_SIZE)
-            self.y = random.uniform(200, 400)
-            self.z = random.uniform(-GROUND_SIZE, GROUND_SIZE)
-            self.speed = random.uniform(2, 4)
-        return True
+# Body parts of the blocky character: color, size (w, h, d), offset from the feet pivot,
+# and which way the part swings with the walk (0 = it doesn't)
+CHARACTER_PARTS = (
+    ((0.0, 0.0, 0.0), (8, 8, 8), (0, 16, 0), 0),  # Black head
+    ((1.0, 0.0, 0.0), (6, 12, 4), (0, 6, 0), 0),  # Red body
+    ((0.55, 0.27, 0.07), (2.5, 10, 2.5), (-4.25, 7, 0), 1),  # Brown left arm
+    ((0.55, 0.27, 0.07), (2.5, 10, 2.5), (4.25, 7, 0), -1),  # Brown right arm
+    ((0.0, 0.0, 0.0), (2.5, 10, 2.5), (-1, -5, 0), -1),  # Black left leg (closer to center)
+    ((0.0, 0.0, 0.0), (2.5, 10, 2.5), (1, -5, 0), 1),  # Black right leg
+)
+CHARACTER_MESHES = [cube_triangles() * np.array(size, dtype=np.float32) for _, size, _, _ in CHARACTER_PARTS]
+CHARACTER_RADIUS = 20  # bounding sphere around the body, for culling
+
+def character_part(mesh, offset, direction, pos, facing_cos, facing_sin, swing_cos=None, swing_sin=None):
+    # Same transform as translate(pos) rotate(facing, y) translate(offset) rotate(swing, x),
+    # done for every character at once
+    x = np.broadcast_to(mesh[:, 0], (len(pos), len(mesh)))
+    y, z = mesh[:, 1], mesh[:, 2]
+    if direction:
+        swing_sin = swing_sin * direction
+        y, z = y * swing_cos - z * swing_sin, y * swing_sin + z * swing_cos
+    else:
+        y, z = np.broadcast_to(y, x.shape), np.broadcast_to(z, x.shape)
+    x, y, z = x + offset[0], y + offset[1], z + offset[2]
+    out = np.empty((len(pos), len(mesh), 3), dtype=np.float32)
+    out[:, :, 0] = x * facing_cos + z * facing_sin + pos[:, 0:1]
+    out[:, :, 1] = y + pos[:, 1:2]
+    out[:, :, 2] = z * facing_cos - x * facing_sin + pos[:, 2:3]
+    return out.reshape(-1, 3)
+
+def draw_characters(batch, pos, facing, phase):
+    # One submission per body part type, covering every character
+    if len(pos) == 0:
+        return
+    facing = np.radians(facing)[:, None]
+    swing = np.radians(np.sin(phase) * 30)[:, None]
+    facing_cos, facing_sin = np.cos(facing), np.sin(facing)
+    swing_cos, swing_sin = np.cos(swing), np.sin(swing)
+    for (color, _, offset, direction), mesh in zip(CHARACTER_PARTS, CHARACTER_MESHES):
+        vertices = character_part(mesh, offset, direction, pos, facing_cos, facing_sin, swing_cos, swing_sin)
+        batch.add(gl.GL_TRIANGLES, vertices, color)
+
+def draw_minecraft_player(batch, x, y, z, facing, walk_anim_phase=0.0):
+    draw_characters(batch, np.array([[x, y, z]], dtype=np.float32), np.array([facing]), np.array([walk_anim_phase]))
+
+# --- Particles: fixed-capacity pools whose slots are recycled in place ---
+RAIN_CAPACITY = 50000
+SNOW_CAPACITY = 50000
+LEAF_CAPACITY = 4096
+RAIN_COUNT = 100  # live raindrops while it rains
+SNOW_COUNT = 100  # live snowflakes while it snows
+RAIN_STREAK = 15  # length of a raindrop line, along its direction of travel
+LEAF_DRIFT = 0.6  # how readily leaves are carried by the wind; rain and snow go with it fully
+LEAVES_PER_TREE = 30  # live leaves per tree while it drops its leaves
+
+class ParticlePool:
+    def __init__(self, capacity, rng):
+        self.capacity = capacity
+        self.rng = rng
+        self.pos = np.zeros((capacity, 3), dtype=np.float32)
+        self.speed = np.zeros(capacity, dtype=np.float32)  # fall speed, units per second
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.drift_x = np.zeros(capacity, dtype=np.float32)  # sideways wind velocity, last tick
+        self.drift_z = np.zeros(capacity, dtype=np.float32)
+        self.count = 0
+        self.high = 0  # every live slot is below this index
+
+    def acquire(self, n):
+        # Reuse the lowest free slots so live particles stay packed at the front
+        n = min(n, self.capacity - self.count)
+        if n <= 0:
+            return np.empty(0, dtype=np.intp)
+        idx = np.flatnonzero(~self.alive[:min(self.capacity, self.high + n)])[:n]
+        self.alive[idx] = True
+        self.count += len(idx)
+        self.high = max(self.high, int(idx[-1]) + 1)
+        return idx
+
+    def release(self, idx):
+        idx = idx[self.alive[idx]]
+        self.alive[idx] = False
+        self.count -= len(idx)
+        live = np.flatnonzero(self.alive[:self.high])
+        self.high = int(live[-1]) + 1 if len(live) else 0
+
+    def clear(self):
+        self.alive[:] = False
+        self.count = 0
+        self.high = 0
+
+    def live_indices(self):
+        return np.flatnonzero(self.alive[:self.high])
+
+    def visible_indices(self, frustum=None, radius=0.0, category="particles"):
+        idx = self.live_indices()
+        if frustum is not None and len(idx):
+            idx = idx[frustum.spheres_visible(self.pos[idx], radius, category)]
+        return idx
+
+    def thin(self, idx, share):
+        # About share of idx, always the same slots, so drops don't flicker as the view moves
+        if share >= 1.0:
+            return idx
+        return idx[(idx * 0.6180339887) % 1.0 < share]
+
+    def fall(self, dt):
+        # Move every slot up to the high-water mark; dead slots are simply ignored
+        y = self.pos[:self.high, 1]
+        y -= self.speed[:self.high] * dt
+        return np.flatnonzero(self.alive[:self.high] & (y <= 0))
+
+    def blow(self, dt, wind, factor=1.0):
+        # Carry every slot below high along with the wind at its position
+        n = self.high
+        if wind is None or n == 0:
+            return
+        idx = wind_cell_index(self.pos[:n, 0], self.pos[:n, 2], wind.sample_size)
+        for axis, drift, cells in ((0, self.drift_x, wind.sample_x), (2, self.drift_z, wind.sample_z)):
+            np.take(cells, idx, out=drift[:n])
+            drift[:n] *= factor
+            self.pos[:n, axis] += drift[:n] * dt
+
+    # Per-particle arrays saved in world snapshots; only the slots below high are stored
+    snapshot_fields = ("pos", "speed", "alive")
+
+    def snapshot(self):
+        return {name: getattr(self, name)[:self.high].copy() for name in self.snapshot_fields}
+
+    def mirror(self, pool):
+        # Copy another pool's live slots in place, for the renderer's world view
+        n = pool.high
+        for name in self.snapshot_fields + ("drift_x", "drift_z"):
+            getattr(self, name)[:n] = getattr(pool, name)[:n]
+        self.high = n
+        self.count = pool.count
+
+    def restore(self, arrays):
+        self.clear()
+        for name in self.snapshot_fields:
+            src = arrays[name]
+            getattr(self, name)[:len(src)] = src
+        self.high = len(arrays["alive"])
+        self.count = int(np.count_nonzero(self.alive[:self.high]))
 
-def draw_snow(snowflakes):
-    gl.glColor3f(1.0, 1.0, 1.0)
-    gl.glPointSize(3.0)
-    gl.glBegin(gl.GL_POINTS)
-    for flake in snowflakes:
-        gl.glVertex3f(flake.x, flake.y, flake.z)
-    gl.glEnd()
+RAIN_COLOR = (0.5, 0.5, 1.0)
+SNOW_COLOR = (1.0, 1.0, 1.0)
+
+class RainPool(ParticlePool):
+    def __init__(self, capacity=RAIN_CAPACITY, rng=None, target=RAIN_COUNT):
+        super().__init__(capacity, rng)
+        self.target = target
+        self.lines = np.zeros((2 * capacity, 3), dtype=np.float32)
+
+    def respawn(self, idx):
+        n = len(idx)
+        self.pos[idx, 0] = self.rng.uniform(-GROUND_SIZE, GROUND_SIZE, n)
+        self.pos[idx, 1] = self.rng.uniform(200, 400, n)
+        self.pos[idx, 2] = self.rng.uniform(-GROUND_SIZE, GROUND_SIZE, n)
+        self.speed[idx] = 8 * 60  # units per second
+
+    def update(self, dt, wind=None):
+        self.blow(dt, wind)
+        landed = self.fall(dt)
+        if len(landed):
+            self.respawn(landed)
+        if self.count < self.target:
+            self.respawn(self.acquire(self.target - self.count))
+        elif self.count > self.target:
+            self.release(self.live_indices()[self.target:])
+
+    def draw(self, batch, frustum=None, share=1.0):
+        idx = self.thin(self.visible_indices(frustum, 15, "rain"), share)
+        n = len(idx)
+        if n == 0:
+            return
+        lines = self.lines[:2 * n]
+        lines[0::2] = self.pos[idx]
+        # The line trails back along the drop's travel, so wind slants it
+        velocity = np.column_stack([self.drift_x[idx], -self.speed[idx], self.drift_z[idx]])
+        velocity *= (RAIN_STREAK / np.linalg.norm(velocity, axis=1))[:, None]
+        lines[1::2] = self.pos[idx] + velocity
+        batch.add(gl.GL_LINES, lines, RAIN_COLOR)
+
+class SnowPool(ParticlePool):
+    def __init__(self, capacity=SNOW_CAPACITY, rng=None, target=SNOW_COUNT):
+        super().__init__(capacity, rng)
+        self.target = target
+
+    def respawn(self, idx):
+        n = len(idx)
+        self.pos[idx, 0] = self.rng.uniform(-GROUND_SIZE, GROUND_SIZE, n)
+        self.pos[idx, 1] = self.rng.uniform(200, 400, n)
+        self.pos[idx, 2] = self.rng.uniform(-GROUND_SIZE, GROUND_SIZE, n)
+        self.speed[idx] = self.rng.uniform(2, 4, n) * 60  # units per second
+
+    def update(self, dt, wind=None):
+        self.blow(dt, wind)
+        landed = self.fall(dt)
+        if len(landed):
+            self.respawn(landed)
+        if self.count < self.target:
+            self.respawn(self.acquire(self.target - self.count))
+        elif self.count > self.target:
+            self.release(self.live_indices()[self.target:])
+
+    def draw(self, batch, frustum=None, share=1.0):
+        idx = self.thin(self.visible_indices(frustum, 2, "snow"), share)
+        if len(idx) == 0:
+            return
+        points = self.pos[:self.high] if len(idx) == self.high else self.pos[idx]
+        batch.add(gl.GL_POINTS, points, SNOW_COLOR, 3.0)
 
 # Falling leaves
-class Leaf:
-    def __init__(self, x, y, z):
-        self.x = x
-        self.y = y
-        self.z = z
-        self.speed = 2
-        self.swing = random.uniform(-1, 1)
-        if current_season == 3:
-            self.color = [1.0, 1.0, 1.0]
+LEAF_SEGMENTS = 8  # slices and stacks of the leaf sphere at full quality
+leaf_meshes = {}  # segments -> sphere vertices
+
+def leaf_mesh(segments):
+    if segments not in leaf_meshes:
+        leaf_meshes[segments] = sphere_triangles(5, segments, segments)
+    return leaf_meshes[segments]
+
+class LeafPool(ParticlePool):
+    def __init__(self, capacity=LEAF_CAPACITY, rng=None):
+        super().__init__(capacity, rng)
+        self.swing = np.zeros(capacity, dtype=np.float32)  # sideways sway, units per second
+        self.color = np.zeros((capacity, 3), dtype=np.float32)
+        self.owner = np.full(capacity, -1, dtype=np.int32)  # index of the tree that dropped it
+
+    snapshot_fields = ParticlePool.snapshot_fields + ("swing", "color", "owner")
+
+    def spawn(self, owner, x, y, z, season=1):
+        idx = self.acquire(1)
+        if len(idx) == 0:
+            return
+        self.pos[idx] = (x, y, z)
+        self.speed[idx] = 2 * 60  # units per second
+        self.swing[idx] = self.rng.uniform(-1, 1) * 60
+        if season == 3:
+            self.color[idx] = (1.0, 1.0, 1.0)
         else:
-            self.color = [0.0, 0.4, 0.0]  # Dark green
-    def update(self):
-        self.y -= self.speed
-        self.x += math.sin(self.y / 20) * self.swing
-        return self.y > 0
-
-def draw_falling_leaves(leaves):
-    for leaf in leaves:
-        gl.glColor3f(*leaf.color)
-        gl.glPushMatrix()
-        gl.glTranslatef(leaf.x, leaf.y, leaf.z)
-        glut.glutSolidSphere(5, 8, 8)
-        gl.glPopMatrix()
+            self.color[idx] = (0.0, 0.4, 0.0)  # Dark green
+        self.owner[idx] = owner
 
-# Global state
-raindrops = []
-snowflakes = []
-falling_leaves = []
-current_season = 1  # 1: Summer, 2: Rainy, 3: Winter
-character_pos = [-120, 10, 0]
-character_direction = 1
-leaves_falling = False
-leaves_falling_start_time = None  # Track when leaves started falling
+    def owner_counts(self, owners):
+        idx = self.live_indices()
+        return np.bincount(self.owner[idx], minlength=owners)
 
-tree_regrow_pending = False  # Track if regrow is pending
+    def release_owner(self, owner):
+        idx = self.live_indices()
+        self.release(idx[self.owner[idx] == owner])
 
-tree_regrow_start_time = None  # Track when regrow started
+    def update(self, dt, wind=None):
+        self.blow(dt, wind, LEAF_DRIFT)
+        landed = self.fall(dt)
+        n = self.high
+        self.pos[:n, 0] += np.sin(self.pos[:n, 1] / 20) * self.swing[:n] * dt
+        if len(landed):
+            self.release(landed)
+
+    def drawn_indices(self, frustum=None, per_tree=LEAVES_PER_TREE):
+        # Spawning stays the same (it draws from the world's random stream); fewer are drawn:
+        # each tree's first per_tree live leaves, ranked by slot within their owner
+        idx = self.live_indices()
+        if per_tree < LEAVES_PER_TREE and len(idx):
+            order = np.argsort(self.owner[idx], kind="stable")
+            owners = self.owner[idx[order]]
+            starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+            rank = np.arange(len(idx)) - np.repeat(starts, np.diff(np.r_[starts, len(idx)]))
+            idx = idx[order[rank < per_tree]]
+        if frustum is not None and len(idx):
+            idx = idx[frustum.spheres_visible(self.pos[idx], 5, "leaves")]
+        return idx
+
+    def draw(self, batch, frustum=None, per_tree=LEAVES_PER_TREE, segments=LEAF_SEGMENTS):
+        idx = self.drawn_indices(frustum, per_tree)
+        if len(idx) == 0:
+            return
+        # Every leaf is the same small sphere, so build them all into one triangle list
+        mesh = leaf_mesh(segments)
+        vertices = (self.pos[idx, None, :] + mesh[None, :, :]).reshape(-1, 3)
+        batch.add(gl.GL_TRIANGLES, vertices, np.repeat(self.color[idx], len(mesh), axis=0))
 
 # Player movement
 player_height = 24 + 12  # body + half head
-player_pos = [0.0, player_height / 2, 200.0]  # Start offset from center tree
-player_speed = 6.0
-move_player_forward = move_player_backward = move_player_left = move_player_right = False
 
-# Camera movement
+# --- Speed boost toggle ---
+player_speed_normal = 6.0 * 6  # units per second
+player_speed_fast = 12.0 * 6
 
-is_first_person = False
+# --- NPC gardeners: the whole crowd lives in arrays, stepped together ---
+NPC_COUNT = 24
+NPC_SPEED = (20.0, 32.0)  # slowest and fastest walkers, units per second
+NPC_PAUSE = (1.0, 4.0)  # seconds spent at each waypoint
+NPC_MARGIN = 6  # same clearance from the pond, trunks and ground edge as the player
 
-# --- Speed boost toggle ---
-player_speed_boosted = False
-player_speed_normal = 6.0
-player_speed_fast = 12.0
+class Crowd:
+    def __init__(self, count=NPC_COUNT, rng=None, trees=()):
+        self.rng = rng or np.random.default_rng()
+        self.set_trees(trees)
+        self.pos = np.zeros((count, 3))
+        self.pos[:, 1] = player_height / 2
+        self.pos[:, [0, 2]] = self.random_points(count)
+        self.facing = self.rng.uniform(0, 360, count)  # degrees
+        self.phase = np.zeros(count)  # walk animation, radians
+        self.speed = self.rng.uniform(*NPC_SPEED, count)
+        self.wait = self.rng.uniform(0, NPC_PAUSE[1], count)  # seconds before walking on
+        # Straight route to the next waypoint: unit direction, heading and distance left
+        self.dir_x = np.zeros(count)
+        self.dir_z = np.zeros(count)
+        self.heading = np.zeros(count)
+        self.remaining = np.zeros(count)
+        self.pick_routes(np.arange(count))
+        self.prev_pos = self.pos.copy()  # state at the start of the last tick
+        self.prev_facing = self.facing.copy()
+
+    def __len__(self):
+        return len(self.pos)
+
+    def set_trees(self, trees):
+        # Half the waypoints are under some tree's canopy
+        self.spots = np.array([(t.x, t.z, 32 * t.size) for t in trees]).reshape(-1, 3)
+        # Circles nobody walks through: the pond and every trunk
+        self.obstacles = np.array([(POND_X, POND_Z, POND_RADIUS + NPC_MARGIN)]
+                                  + [(t.x, t.z, 12 * t.size + NPC_MARGIN) for t in trees])
+
+    def random_points(self, n):
+        points = self.rng.uniform(-GROUND_SIZE + NPC_MARGIN, GROUND_SIZE - NPC_MARGIN, (n, 2))
+        inside = self.blocked(points, points)
+        while inside.any():
+            points[inside] = self.rng.uniform(-GROUND_SIZE + NPC_MARGIN, GROUND_SIZE - NPC_MARGIN, (int(inside.sum()), 2))
+            inside = self.blocked(points, points)
+        return points
+
+    def blocked(self, start, end):
+        # Whether each straight route passes through an obstacle: closest point of the segment to every center
+        offset = (end - start)[:, None, :]
+        to_center = self.obstacles[None, :, :2] - start[:, None, :]
+        length = np.maximum((offset * offset).sum(axis=2), 1e-9)
+        t = np.clip((to_center * offset).sum(axis=2) / length, 0, 1)
+        gap = to_center - offset * t[:, :, None]
+        return ((gap * gap).sum(axis=2) < self.obstacles[:, 2]**2).any(axis=1)
 
-# --- Add trees_saved counter ---
-trees_saved = 0
+    def pick_routes(self, idx):
+        n = len(idx)
+        start = self.pos[idx][:, [0, 2]]
+        targets = self.random_points(n)
+        if len(self.spots):
+            to_tree = self.rng.random(n) < 0.5
+            spots = self.spots[self.rng.integers(0, len(self.spots), int(to_tree.sum()))]
+            angle = self.rng.uniform(0, 2 * math.pi, len(spots))
+            reach = spots[:, 2] * self.rng.uniform(0.6, 1.0, len(spots))
+            near = spots[:, :2] + np.column_stack([np.cos(angle), np.sin(angle)]) * reach[:, None]
+            targets[to_tree] = np.clip(near, -GROUND_SIZE + NPC_MARGIN, GROUND_SIZE - NPC_MARGIN)
+        # Routes through the pond or a trunk go somewhere else instead,
+        # so walking never has to check for collisions
+        blocked = self.blocked(start, targets)
+        while blocked.any():
+            targets[blocked] = self.random_points(int(blocked.sum()))
+            blocked = self.blocked(start, targets)
+        offset = targets - start
+        distance = np.hypot(offset[:, 0], offset[:, 1])
+        self.remaining[idx] = distance
+        distance = np.maximum(distance, 1e-9)
+        self.dir_x[idx] = offset[:, 0] / distance
+        self.dir_z[idx] = offset[:, 1] / distance
+        self.heading[idx] = np.degrees(np.arctan2(offset[:, 0], offset[:, 1]))
 
-# --- Add total_pour_time for water pot ---
-total_pour_time = 0.0
+    def hold(self):
+        # Standing still this tick: drawn where they are, not blended from the last step
+        self.prev_pos[:] = self.pos
+        self.prev_facing[:] = self.facing
+
+    def update(self, dt):
+        if len(self.pos) == 0:
+            return
+        self.prev_pos[:] = self.pos
+        self.prev_facing[:] = self.facing
+        self.wait -= dt
+        walking = self.wait <= 0
+        step = np.minimum(self.speed * dt, self.remaining)
+        step *= walking
+        self.remaining -= step
+        self.pos[:, 0] += self.dir_x * step
+        self.pos[:, 2] += self.dir_z * step
+        arrived = walking & (self.remaining <= 0)
+        if arrived.any():
+            idx = np.flatnonzero(arrived)
+            self.wait[idx] = self.rng.uniform(*NPC_PAUSE, len(idx))
+            self.pick_routes(idx)
+            walking &= ~arrived
+        # Same easing towards the heading as the player, and a walk cycle matched to speed
+        turn = self.heading - self.facing
+        turn += 180
+        turn %= 360
+        turn -= 180
+        turn *= walking
+        turn *= 1 - 0.8 ** (dt * 60)
+        self.facing += turn
+        self.facing %= 360
+        stride = self.speed * (walk_anim_speed * dt / player_speed_normal)
+        if walking.all():
+            self.phase += stride
+        else:
+            # Standing gardeners let their arms and legs swing back to hanging straight
+            rest = np.round(self.phase / math.pi) * math.pi - self.phase
+            self.phase += np.where(walking, stride, np.maximum(np.minimum(rest, stride), -stride))
+
+    def render_state(self, alpha=1.0):
+        # Positions and headings blended between the last two ticks, like the player's
+        pos = self.prev_pos + (self.pos - self.prev_pos) * alpha
+        return pos, lerp_angle(self.prev_facing, self.facing, alpha)
+
+    # Per-gardener arrays saved in world snapshots
+    snapshot_fields = ("pos", "prev_pos", "facing", "prev_facing", "phase", "speed", "wait",
+                       "dir_x", "dir_z", "heading", "remaining")
+
+    def snapshot(self):
+        return {name: getattr(self, name).copy() for name in self.snapshot_fields}
+
+    def restore(self, arrays):
+        for name in self.snapshot_fields:
+            setattr(self, name, np.array(arrays[name], dtype=getattr(self, name).dtype))
+
+    def mirror(self, crowd):
+        # Just what drawing needs, copied into this crowd's arrays when the size matches
+        for name in ("pos", "prev_pos", "facing", "prev_facing", "phase"):
+            src, dst = getattr(crowd, name), getattr(self, name)
+            if dst.shape == src.shape:
+                dst[:] = src
+            else:
+                setattr(self, name, src.copy())
 
 # --- Falling leaves chain state ---
-falling_chain_active = False
-falling_chain_next_time = None
-falling_chain_last_tree = None
 FALLING_CHAIN_DELAY = 5.0  # seconds between trees losing leaves
 MAX_DEAD_TREES = 5
-falling_chain_paused = True  # Start paused
+LEAF_FALL_TIME = 10.0  # seconds from leaves starting to fall until the tree is bare
+REGROW_TIME = 10.0  # seconds for a watered tree to regrow its canopy
+POUR_REGROW_AMOUNT = 5.0  # water a bare tree needs before it starts regrowing
+POUR_RATE = 2.0  # water per second while poured on (tree and pot timers both counted, as before)
+POUR_CAP = 20.0  # seconds a tree keeps taking water in one go
+WATER_BUDGET = 40.0  # seconds of pouring from one full pot
 
-game_state = "Paused"  # Possible: Paused, Playing, Game Over, Victory
-
-def get_camera_pos():
-    if is_first_person:
+def get_camera_pos(world, alpha=1.0):
+    player_pos = world.render_player_pos(alpha)
+    if world.is_first_person:
         head_height = 24
-        yaw_rad = math.radians(cam_yaw)
-        pitch_rad = math.radians(cam_pitch)
         cam_y = max(player_pos[1] + head_height, 10)  # Clamp above ground
         return [player_pos[0], cam_y, player_pos[2]]
     else:
         cam_distance = 120
-        yaw_rad = math.radians(cam_yaw)
-        pitch_rad = math.radians(cam_pitch)
+        yaw_rad = math.radians(world.cam_yaw)
+        pitch_rad = math.radians(world.cam_pitch)
         cam_x = player_pos[0] - cam_distance * math.sin(yaw_rad) * math.cos(-pitch_rad)
         cam_y = player_pos[1] + 24 + cam_distance * math.sin(-pitch_rad)  # Offset up to see over player
         cam_z = player_pos[2] + cam_distance * math.cos(yaw_rad) * math.cos(-pitch_rad)
@@ -373,15 +1321,11 @@ def get_camera_pos():
         return [cam_x, cam_y, cam_z]
 
 # --- Watering pot state ---
-watering_pot_visible = False
-watering_pot_fullness = 0  # 0 or 100
-watering_pot_pouring = False
-watering_pot_pour_timer = 0
 watering_pot_pour_rate = 100.0 / (2 * 60)  # 2 seconds to empty
 
 # --- Draw watering pot in player's right hand ---
-def draw_player_hand():
-    if not watering_pot_visible:
+def draw_player_hand(world):
+    if not world.watering_pot_visible:
         return
     gl.glMatrixMode(gl.GL_PROJECTION)
     gl.glPushMatrix()
@@ -397,15 +1341,14 @@ def draw_player_hand():
     gl.glColor3f(0.2, 0.2, 1.0)
     gl.glPushMatrix()
     gl.glScalef(1, 1.5, 1)
-    quad = glu.gluNewQuadric()
-    glu.gluCylinder(quad, 0.12, 0.12, 0.25, 16, 1)
+    resources.draw("pot_body")
     gl.glPopMatrix()
     # Draw handle
     gl.glColor3f(0.7, 0.7, 0.7)
     gl.glPushMatrix()
     gl.glTranslatef(0.12, 0.1, 0)
     gl.glRotatef(90, 0, 1, 0)
-    glut.glutSolidTorus(0.025, 0.07, 8, 12)
+    resources.draw("pot_handle")
     gl.glPopMatrix()
     gl.glPopMatrix()
     gl.glMatrixMode(gl.GL_PROJECTION)
@@ -413,11 +1356,15 @@ def draw_player_hand():
     gl.glMatrixMode(gl.GL_MODELVIEW)
 
 # --- Animate water pouring at tree ---
-def draw_water_pour():
-    if not watering_pot_pouring:
+WATER_COLOR = (0.2, 0.5, 1.0)
+
+def draw_water_pour(batch, world, alpha=1.0):
+    if not world.watering_pot_pouring:
         return
-    # Find nearest tree
-    nearest = min([main_tree]+other_trees, key=lambda t: ((player_pos[0]-t.x)**2 + (player_pos[2]-t.z)**2)**0.5)
+    player_pos = world.render_player_pos(alpha)
+    player_facing = world.render_player_facing(alpha)
+    # Tree being watered
+    nearest = world.pour_target or world.nearest_tree()
     # Water falls from player's hand to a spot in front of player, then to tree
     hand_x = player_pos[0] + 12 * math.sin(math.radians(player_facing))
     hand_y = player_pos[1] + 18
@@ -429,137 +1376,62 @@ def draw_water_pour():
     spot_z = player_pos[2] - pour_spot_dist * math.cos(math.radians(player_facing))
     # Tree base
     tree_x, tree_y, tree_z = nearest.x, 0, nearest.z
-    gl.glColor3f(0.2, 0.5, 1.0)
-    gl.glLineWidth(4)
-    gl.glBegin(gl.GL_LINES)
+    lines = []
     # Water from hand to spot
     for i in range(3):
         sx = spot_x + random.uniform(-5, 5)
         sz = spot_z + random.uniform(-5, 5)
-        gl.glVertex3f(hand_x, hand_y, hand_z)
-        gl.glVertex3f(sx, 0, sz)
+        lines.append((hand_x, hand_y, hand_z))
+        lines.append((sx, 0, sz))
         # Water from spot to tree
-        gl.glVertex3f(sx, 0, sz)
-        gl.glVertex3f(tree_x + random.uniform(-10, 10), 0, tree_z + random.uniform(-10, 10))
-    gl.glEnd()
-    gl.glLineWidth(1)
-
-# --- Add at the top, after global state ---
-tree_has_leaves = True
-leaves_regrow_progress = 0.0  # 0.0 (bare) to 1.0 (full leaves)
-regrow_start_time = None
-pour_start_time = None
-pouring_duration = 0.0
+        lines.append((sx, 0, sz))
+        lines.append((tree_x + random.uniform(-10, 10), 0, tree_z + random.uniform(-10, 10)))
+    batch.add(gl.GL_LINES, lines, WATER_COLOR, 4)
 
 # --- Tree class for multiple trees ---
+# Trees hold state only; GameWorld moves them between states from scheduled events
 class Tree:
     def __init__(self, x, z, size=1.0):
         self.x = x
         self.z = z
         self.size = size
+        self.slot = None  # position in GameWorld.trees
         self.has_leaves = True
         self.leaves_regrow_progress = 0.0
         self.regrow_start_time = None
         self.leaves_falling = False
         self.leaves_falling_start_time = None
-        self.falling_leaves = []
         self.pouring = False
         self.pour_start_time = None
-        self.pouring_duration = 0.0
-        self.pour_accumulated = 0.0  # Track accumulated pour time
-    def update(self):
-        # Falling logic
-        if self.leaves_falling:
-            if self.leaves_falling_start_time is not None:
-                if time.time() - self.leaves_falling_start_time >= 10:
-                    self.leaves_falling = False
-                    self.falling_leaves.clear()
-                    self.leaves_falling_start_time = None
-                    self.has_leaves = False
-                    self.leaves_regrow_progress = 0.0
-            else:
-                self.leaves_falling_start_time = time.time()
-        else:
-            self.leaves_falling_start_time = None
-        # Regrow logic
-        if self.regrow_start_time is not None:
-            elapsed = time.time() - self.regrow_start_time
-            self.leaves_regrow_progress = min(elapsed / 10.0, 1.0)
-            if self.leaves_regrow_progress >= 1.0:
-                self.regrow_start_time = None
-                self.has_leaves = True
-        # Pouring logic
-        if self.pouring:
-            if self.pour_start_time is None:
-                self.pour_start_time = time.time()
-                self.pouring_duration = 0.0
-            else:
-                now = time.time()
-                delta = now - self.pour_start_time
-                self.pouring_duration = delta
-                self.pour_accumulated += delta
-                self.pour_start_time = now
-                if self.pouring_duration >= 20.0:
-                    self.pouring = False
-                    self.pour_start_time = None
-            # Start regrow if not already, and only if poured for 5 seconds
-            if not self.has_leaves and self.regrow_start_time is None and self.pour_accumulated >= 5.0:
-                self.regrow_start_time = time.time()
-        else:
-            self.pour_start_time = None
-            self.pour_accumulated = 0.0  # Reset if not pouring
-        # Falling leaves animation
-        if self.leaves_falling:
-            block_size = 32 * self.size
-            trunk_height = 6 * block_size
-            top_y = 0 + trunk_height
-            canopy_half = 5 * block_size
-            if len(self.falling_leaves) < 30:
-                lx = self.x + random.uniform(-canopy_half, canopy_half)
-                lz = self.z + random.uniform(-canopy_half, canopy_half)
-                ly = top_y
-                self.falling_leaves.append(Leaf(lx, ly, lz))
-            self.falling_leaves[:] = [leaf for leaf in self.falling_leaves if leaf.update()]
-        else:
-            self.falling_leaves.clear()
-    def draw(self):
-        draw_minecraft_tree(self.x, 0, self.z, self.size, self.has_leaves, self.leaves_regrow_progress)
-        if self.leaves_falling:
-            draw_falling_leaves(self.falling_leaves)
+        self.timers = {}  # event kind -> pending scheduler event
+    def is_dead(self):
+        return not self.has_leaves and self.leaves_regrow_progress == 0.0
+    def pour_amount(self, now):
+        if not self.pouring:
+            return 0.0
+        return (now - self.pour_start_time) * POUR_RATE
+    def bounds(self):
+        # Sphere around trunk and full canopy (11 blocks wide, 12 tall)
+        block_size = 32 * self.size
+        return self.x, 6 * block_size, self.z, 9.5 * block_size
+    def submit(self, queue, season=1, frustum=None):
+        if frustum is not None and not frustum.sphere_visible(*self.bounds(), category="trees"):
+            return
+        queue.submit(("trunk", id(self)), draw_trunk, self.x, 0, self.z, self.size, primitive="quads", color=TRUNK_COLOR)
+        stage = canopy_stage(self.has_leaves, self.leaves_regrow_progress)
+        if stage:
+            queue.submit(("canopy", id(self)), canopy_cache.draw, self.x, 0, self.z, self.size, stage, season, primitive="quads")
 
 # --- Update tree placement to avoid pond ---
 def is_too_close_to_pond(x, z):
-    pond_x, pond_z, pond_r = -200, 0, 60
+    pond_x, pond_z, pond_r = POND_X, POND_Z, POND_RADIUS
     dist = ((x - pond_x)**2 + (z - pond_z)**2)**0.5
     return dist < pond_r + 80
 
-main_tree = Tree(0, 0, 1.0)  # Center of the land
-other_trees = []
-# Place 4 trees at the four sides of the land
-side_offset = GROUND_SIZE - 80  # 80 units from the edge
-positions = [
-    (-side_offset, 0),   # Left
-    (side_offset, 0),    # Right
-    (0, side_offset),    # Top
-    (0, -side_offset)    # Bottom
-]
-for tx, tz in positions:
-    tsize = random.uniform(0.5, 0.95)
-    other_trees.append(Tree(tx, tz, tsize))
-
-# --- Scoring and game state ---
-game_over = False
-status_message = ""
-status_message_timer = 0
-
-def reset_game():
-    global main_tree, other_trees, game_over, status_message, status_message_timer, watering_pot_fullness, watering_pot_visible, watering_pot_pouring, trees_saved, victory, total_pour_time
-    global player_pos
-    global falling_chain_active, falling_chain_next_time, falling_chain_last_tree, falling_chain_paused, game_state
-    global move_player_forward, move_player_backward, move_player_left, move_player_right
-    main_tree = Tree(0, 0, 1.0)
-    other_trees.clear()
-    side_offset = GROUND_SIZE - 80
+def make_trees(rng=random):
+    trees = [Tree(0, 0, 1.0)]  # Center of the land
+    # Place 4 trees at the four sides of the land
+    side_offset = GROUND_SIZE - 80  # 80 units from the edge
     positions = [
         (-side_offset, 0),   # Left
         (side_offset, 0),    # Right
@@ -567,32 +1439,614 @@ def reset_game():
         (0, -side_offset)    # Bottom
     ]
     for tx, tz in positions:
-        tsize = random.uniform(0.5, 0.95)
-        other_trees.append(Tree(tx, tz, tsize))
-    player_pos = [0.0, player_height / 2, 200.0]  # Reset player away from center
-    game_over = False
-    status_message = ""
-    status_message_timer = 0
-    watering_pot_fullness = 0
-    watering_pot_visible = False
-    watering_pot_pouring = False
-    trees_saved = 0
-    victory = False
-    total_pour_time = 0.0
-    falling_chain_active = False
-    falling_chain_next_time = None
-    falling_chain_last_tree = None
-    falling_chain_paused = True
-    game_state = "Paused"
-    # Reset movement flags
-    move_player_forward = False
-    move_player_backward = False
-    move_player_left = False
-    move_player_right = False
+        tsize = rng.uniform(0.5, 0.95)
+        trees.append(Tree(tx, tz, tsize))
+    return trees
 
-# --- Draw score/status at top right ---
-def draw_score_status():
-    dead_count = sum(1 for t in [main_tree]+other_trees if not t.has_leaves and t.leaves_regrow_progress == 0.0)
+# --- Collision helpers ---
+def clamp(val, minv, maxv):
+    return max(minv, min(maxv, val))
+
+# Interpolate angle (lerp with wrap-around)
+def lerp_angle(a, b, t):
+    diff = (b - a + 180) % 360 - 180
+    return a + diff * t
+
+# --- Event scheduler: priority queue of timed callbacks, cancelled lazily ---
+class EventScheduler:
+    def __init__(self):
+        self.queue = []  # [when, seq, action, args, live]
+        self.seq = 0  # breaks ties so same-time events run in scheduling order
+        self.fired = 0
+
+    def __len__(self):
+        return len(self.queue)
+
+    def schedule(self, when, action, *args):
+        event = [when, self.seq, action, args, True]
+        self.seq += 1
+        heapq.heappush(self.queue, event)
+        return event
+
+    def cancel(self, event):
+        if event is not None:
+            event[4] = False
+
+    def run_due(self, now):
+        fired = 0
+        while self.queue and self.queue[0][0] <= now:
+            _, _, action, args, live = heapq.heappop(self.queue)
+            if live:
+                action(*args)
+                fired += 1
+        self.fired += fired
+        return fired
+
+# --- Spatial index: uniform grid over trees and obstacles ---
+GRID_CELL_SIZE = 128  # world units per grid cell
+
+class SpatialGrid:
+    def __init__(self, cell_size=GRID_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}  # (cx, cz) -> list of [item, x, z, radius, kind]
+        self.entries = {}  # id(item) -> its entry
+        self.max_radius = 0.0
+        self.bounds = None  # (min cx, min cz, max cx, max cz) of occupied cells
+
+    def __len__(self):
+        return len(self.entries)
+
+    def cell_of(self, x, z):
+        return (math.floor(x / self.cell_size), math.floor(z / self.cell_size))
+
+    def insert(self, item, x, z, radius=0.0, kind="tree"):
+        entry = [item, x, z, radius, kind]
+        cell = self.cell_of(x, z)
+        self.cells.setdefault(cell, []).append(entry)
+        self.entries[id(item)] = entry
+        self.max_radius = max(self.max_radius, radius)
+        if self.bounds is None:
+            self.bounds = (cell[0], cell[1], cell[0], cell[1])
+        else:
+            x0, z0, x1, z1 = self.bounds
+            self.bounds = (min(x0, cell[0]), min(z0, cell[1]), max(x1, cell[0]), max(z1, cell[1]))
+
+    def remove(self, item):
+        entry = self.entries.pop(id(item), None)
+        if entry is None:
+            return
+        cell = self.cell_of(entry[1], entry[2])
+        bucket = self.cells[cell]
+        bucket.remove(entry)
+        if not bucket:
+            del self.cells[cell]
+
+    def move(self, item, x, z):
+        entry = self.entries[id(item)]
+        self.remove(item)
+        self.insert(item, x, z, entry[3], entry[4])
+
+    def clear(self):
+        self.cells.clear()
+        self.entries.clear()
+        self.max_radius = 0.0
+        self.bounds = None
+
+    def candidates(self, x, z, reach):
+        # Entries in every cell a circle of radius reach (plus the largest item) could touch
+        reach += self.max_radius
+        cx0, cz0 = self.cell_of(x - reach, z - reach)
+        cx1, cz1 = self.cell_of(x + reach, z + reach)
+        for cx in range(cx0, cx1 + 1):
+            for cz in range(cz0, cz1 + 1):
+                yield from self.cells.get((cx, cz), ())
+
+    def within_radius(self, x, z, radius, kind=None):
+        found = []
+        for item, ix, iz, _, ikind in self.candidates(x, z, radius):
+            if kind is not None and ikind != kind:
+                continue
+            if (ix - x)**2 + (iz - z)**2 <= radius**2:
+                found.append(item)
+        return found
+
+    def nearest(self, x, z, kind=None):
+        # Search rings of cells outward until no unsearched cell can hold anything closer
+        if not self.entries:
+            return None
+        cx, cz = self.cell_of(x, z)
+        x0, z0, x1, z1 = self.bounds
+        max_ring = max(cx - x0, x1 - cx, cz - z0, z1 - cz, 0)
+        best, best_d2 = None, float("inf")
+        for ring in range(max_ring + 1):
+            for cell in self.ring_cells(cx, cz, ring):
+                for item, ix, iz, _, ikind in self.cells.get(cell, ()):
+                    if kind is not None and ikind != kind:
+                        continue
+                    d2 = (ix - x)**2 + (iz - z)**2
+                    if d2 < best_d2:
+                        best, best_d2 = item, d2
+            if best is not None and best_d2 <= (ring * self.cell_size)**2:
+                break
+        return best
+
+    @staticmethod
+    def ring_cells(cx, cz, ring):
+        if ring == 0:
+            yield (cx, cz)
+            return
+        for dx in range(-ring, ring + 1):
+            yield (cx + dx, cz - ring)
+            yield (cx + dx, cz + ring)
+        for dz in range(-ring + 1, ring):
+            yield (cx - ring, cz + dz)
+            yield (cx + ring, cz + dz)
+
+# --- Game world: all simulation state, no OpenGL ---
+class GameWorld:
+    def __init__(self, seed=None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.reset()
+
+    def reset(self):
+        self.time = 0.0  # simulation clock (seconds)
+        self.tick_count = 0
+        self.trees = []
+        self.events = EventScheduler()
+        # Trees with something in progress; dicts keep a deterministic order
+        self.falling_trees = {}
+        self.regrowing_trees = {}
+        self.dead_trees = {}
+        self.index = SpatialGrid()
+        self.index.insert("pond", POND_X, POND_Z, POND_RADIUS, kind="pond")
+        for t in make_trees(self.rng):
+            self.add_tree(t)
+        self.current_season = 1  # 1: Summer, 2: Rainy, 3: Winter
+        self.sun_position = 0.0  # degrees: 0 sunrise, 90 noon, 180 sunset
+        particle_rng = np.random.default_rng(self.rng.getrandbits(64))
+        self.rain = RainPool(rng=particle_rng)
+        self.snow = SnowPool(rng=particle_rng)
+        self.leaves = LeafPool(rng=particle_rng)
+        self.wind = WindField(np.random.default_rng(self.rng.getrandbits(64)))
+        self.npcs = Crowd(NPC_COUNT, np.random.default_rng(self.rng.getrandbits(64)), self.trees)
+        # Player and camera
+        self.player_pos = [0.0, player_height / 2, 200.0]  # Start offset from center tree
+        self.player_facing = 0.0  # degrees
+        self.prev_player_pos = list(self.player_pos)  # state at the start of the last tick
+        self.prev_player_facing = self.player_facing
+        self.player_speed = player_speed_normal
+        self.player_speed_boosted = False
+        self.walk_anim_phase = 0.0
+        self.move_player_forward = self.move_player_backward = False
+        self.move_player_left = self.move_player_right = False
+        self.cam_yaw = 0.0  # horizontal angle (degrees)
+        self.cam_pitch = 20.0  # vertical angle (degrees, up/down)
+        self.is_first_person = False
+        # Watering pot
+        self.watering_pot_visible = False
+        self.watering_pot_fullness = 0  # 0 or 100
+        self.watering_pot_pouring = False
+        self.pour_target = None  # tree the pot is pouring on
+        self.pour_start_time = None
+        self.total_pour_time = 0.0
+        # Falling leaves chain
+        self.falling_chain_active = False
+        self.falling_chain_next_time = None
+        self.falling_chain_event = None
+        self.falling_chain_last_tree = None
+        self.falling_chain_paused = True  # Start paused
+        # Scoring and game state
+        self.game_state = "Paused"  # Possible: Paused, Playing, Game Over, Victory
+        self.game_over = False
+        self.victory = False
+        self.trees_saved = 0
+        self.status_message = ""
+        self.status_message_timer = 0
+
+    @property
+    def main_tree(self):
+        return self.trees[0]
+
+    @property
+    def other_trees(self):
+        return self.trees[1:]
+
+    # Player pose blended between the last two ticks for rendering
+    def render_player_pos(self, alpha=1.0):
+        prev, cur = self.prev_player_pos, self.player_pos
+        return [prev[i] + (cur[i] - prev[i]) * alpha for i in range(3)]
+
+    def render_player_facing(self, alpha=1.0):
+        return lerp_angle(self.prev_player_facing, self.player_facing, alpha)
+
+    def is_finished(self):
+        return self.game_state in ("Game Over", "Victory")
+
+    def is_quiet(self):
+        # Nothing but grass would move: chain paused, player standing, no weather or pouring
+        moving = self.move_player_forward or self.move_player_backward or self.move_player_left or self.move_player_right
+        falling = self.falling_trees or self.regrowing_trees
+        return (self.falling_chain_paused and not moving and not falling and not self.watering_pot_pouring
+                and self.current_season == 1)
+
+    def add_tree(self, tree):
+        tree.slot = len(self.trees)
+        self.trees.append(tree)
+        self.index.insert(tree, tree.x, tree.z, 12 * tree.size, kind="tree")
+        return tree
+
+    def nearest_tree(self):
+        return self.index.nearest(self.player_pos[0], self.player_pos[2], kind="tree")
+
+    def dead_count(self):
+        return len(self.dead_trees)
+
+    def player_collides_tree(self, px, pz):
+        for _, tree_x, tree_z, trunk_r, kind in self.index.candidates(px, pz, 4):
+            if kind == "tree" and abs(px - tree_x) < trunk_r + 4 and abs(pz - tree_z) < trunk_r + 4:
+                return True
+        return False
+
+    def player_collides_pond(self, px, pz):
+        for _, pond_x, pond_z, pond_r, kind in self.index.candidates(px, pz, 6):
+            if kind == "pond" and ((px - pond_x)**2 + (pz - pond_z)**2)**0.5 < pond_r + 6:
+                return True
+        return False
+
+    # --- Input ---
+    def key_down(self, key):
+        if key == b'q':
+            self.reset()
+            return
+        if self.game_over:
+            return
+        if key == b'w':
+            self.move_player_forward = True
+        elif key == b's':
+            self.move_player_backward = True
+        elif key == b'a':
+            self.move_player_left = True
+        elif key == b'd':
+            self.move_player_right = True
+        elif key == b'1':
+            self.current_season = 1
+        elif key == b'2':
+            self.current_season = 2
+        elif key == b'3':
+            self.current_season = 3
+        elif key == b'f':
+            # Toggle pause/resume if chain is active, else start chain
+            if self.falling_chain_active:
+                self.falling_chain_paused = not self.falling_chain_paused
+                if self.falling_chain_paused:
+                    self.game_state = "Paused"
+                else:
+                    self.game_state = "Playing"
+                    self.resume_falling_chain()
+            else:
+                self.start_random_tree_falling()
+                self.game_state = "Playing"
+        elif key == b'g':
+            # Only toggle watering pot visibility; do NOT re-initialize grass!
+            self.watering_pot_visible = not self.watering_pot_visible
+        elif key == b'h':
+            near_pond = self.index.within_radius(self.player_pos[0], self.player_pos[2], POND_RADIUS + 30, kind="pond")
+            if self.watering_pot_visible and near_pond:
+                self.watering_pot_fullness = 100
+                self.total_pour_time = 0.0
+        elif key == b'j':
+            nearest = self.nearest_tree()
+            tree_x, tree_z, tree_r = nearest.x, nearest.z, 32*nearest.size
+            dist = ((self.player_pos[0] - tree_x)**2 + (self.player_pos[2] - tree_z)**2)**0.5
+            if self.watering_pot_visible and self.watering_pot_fullness > 0 and dist < tree_r + 40 and self.total_pour_time < WATER_BUDGET:
+                if nearest.pouring:
+                    self.stop_pot_pouring()
+                else:
+                    self.start_pot_pouring(nearest)
+        elif key == b'k':
+            self.stop_pot_pouring()
+        elif key == b'v':
+            self.is_first_person = not self.is_first_person
+        elif key == b'l':
+            self.player_speed_boosted = not self.player_speed_boosted
+
+    def key_up(self, key):
+        if self.game_over:
+            return
+        if key == b'w':
+            self.move_player_forward = False
+        elif key == b's':
+            self.move_player_backward = False
+        elif key == b'a':
+            self.move_player_left = False
+        elif key == b'd':
+            self.move_player_right = False
+
+    def look(self, dx, dy, sensitivity=0.12):
+        if self.game_over:
+            return
+        self.cam_yaw += dx * sensitivity
+        self.cam_pitch -= dy * sensitivity
+        self.cam_pitch = max(-80, min(80, self.cam_pitch))
+        # Prevent looking below horizon
+        if self.cam_pitch < -10:
+            self.cam_pitch = -10
+
+    def turn_sun(self, key):
+        if key == KEY_LEFT:
+            self.sun_position = (self.sun_position - 2) % 360
+        elif key == KEY_RIGHT:
+            self.sun_position = (self.sun_position + 2) % 360
+
+    # --- Falling leaves chain ---
+    def start_random_tree_falling(self):
+        candidates = [t for t in self.trees if t.has_leaves and not t.leaves_falling]
+        if candidates:
+            tree = self.rng.choice(candidates)
+            self.start_tree_falling(tree)
+            self.falling_chain_active = True
+            self.falling_chain_last_tree = tree
+            self.falling_chain_next_time = None
+            self.events.cancel(self.falling_chain_event)
+            self.falling_chain_event = None
+            self.falling_chain_paused = False
+
+    def schedule_falling_chain(self, when):
+        self.falling_chain_next_time = when
+        self.falling_chain_event = self.events.schedule(when, self.advance_falling_chain)
+
+    def resume_falling_chain(self):
+        # A step that came due, or a tree that went bare, while paused is picked up now
+        last_tree = self.falling_chain_last_tree
+        if self.falling_chain_event is None and last_tree and not last_tree.has_leaves and not last_tree.leaves_falling:
+            when = self.falling_chain_next_time
+            if when is None:
+                when = self.time + FALLING_CHAIN_DELAY
+            self.schedule_falling_chain(max(when, self.time))
+
+    def advance_falling_chain(self):
+        self.falling_chain_event = None
+        if not self.falling_chain_active or self.falling_chain_paused:
+            return
+        # Start next random tree
+        candidates = [t for t in self.trees if t.has_leaves and not t.leaves_falling]
+        if candidates:
+            tree = self.rng.choice(candidates)
+            self.start_tree_falling(tree)
+            self.falling_chain_last_tree = tree
+            self.falling_chain_next_time = None
+        else:
+            self.falling_chain_active = False
+            self.falling_chain_last_tree = None
+            self.falling_chain_next_time = None
+
+    # --- Tree lifecycle: each transition schedules the next one ---
+    def set_timer(self, tree, kind, delay, action):
+        self.events.cancel(tree.timers.get(kind))
+        tree.timers[kind] = self.events.schedule(self.time + delay, action, tree)
+
+    def clear_timer(self, tree, kind):
+        self.events.cancel(tree.timers.pop(kind, None))
+
+    def start_tree_falling(self, tree):
+        tree.leaves_falling = True
+        tree.leaves_falling_start_time = self.time
+        self.falling_trees[tree] = None
+        self.set_timer(tree, "fall", LEAF_FALL_TIME, self.finish_tree_falling)
+
+    def finish_tree_falling(self, tree):
+        tree.timers.pop("fall", None)
+        tree.leaves_falling = False
+        tree.leaves_falling_start_time = None
+        tree.has_leaves = False
+        tree.leaves_regrow_progress = 0.0
+        self.falling_trees.pop(tree, None)
+        if tree.regrow_start_time is None:
+            self.dead_trees[tree] = None
+        # Still being watered with enough poured already: regrow straight away
+        self.try_regrow(tree)
+        if self.falling_chain_active and tree is self.falling_chain_last_tree and not self.falling_chain_paused:
+            self.schedule_falling_chain(self.time + FALLING_CHAIN_DELAY)
+
+    def start_tree_pouring(self, tree):
+        tree.pouring = True
+        tree.pour_start_time = self.time
+        self.set_timer(tree, "pour_cap", POUR_CAP, self.stop_tree_pouring)
+        self.set_timer(tree, "pour", POUR_REGROW_AMOUNT / POUR_RATE, self.finish_tree_pour)
+
+    def stop_tree_pouring(self, tree):
+        tree.pouring = False
+        tree.pour_start_time = None
+        self.clear_timer(tree, "pour_cap")
+        self.clear_timer(tree, "pour")
+        if tree is self.pour_target:
+            self.watering_pot_pouring = False
+            self.pour_target = None
+
+    def finish_tree_pour(self, tree):
+        tree.timers.pop("pour", None)
+        self.try_regrow(tree)
+
+    def try_regrow(self, tree):
+        # Start regrow if not already, and only if poured long enough
+        if (not tree.has_leaves and tree.regrow_start_time is None and not tree.leaves_falling
+                and tree.pour_amount(self.time) >= POUR_REGROW_AMOUNT):
+            tree.regrow_start_time = self.time
+            self.regrowing_trees[tree] = None
+            self.set_timer(tree, "regrow", REGROW_TIME, self.finish_tree_regrow)
+
+    def finish_tree_regrow(self, tree):
+        tree.timers.pop("regrow", None)
+        tree.regrow_start_time = None
+        tree.leaves_regrow_progress = 1.0
+        tree.has_leaves = True
+        self.regrowing_trees.pop(tree, None)
+        if self.dead_trees.pop(tree, 0) is None:
+            self.trees_saved += 1
+
+    def update_regrowth(self):
+        # Only regrowing trees change every tick, for the canopy animation
+        for tree in self.regrowing_trees:
+            elapsed = self.time - tree.regrow_start_time
+            tree.leaves_regrow_progress = min(elapsed / REGROW_TIME, 1.0)
+            if tree.leaves_regrow_progress > 0 and self.dead_trees.pop(tree, 0) is None:
+                self.trees_saved += 1
+
+    # --- Simulation ---
+    def step(self, dt):
+        self.time += dt
+        self.tick_count += 1
+        if DAY_LENGTH > 0:
+            self.sun_position = (self.sun_position + 360.0 * dt / DAY_LENGTH) % 360
+        self.prev_player_pos[:] = self.player_pos
+        self.prev_player_facing = self.player_facing
+        if self.victory:
+            self.game_state = "Victory"
+            return
+        if self.game_over:
+            self.game_state = "Game Over"
+            return
+        # Set player speed based on boost
+        self.player_speed = player_speed_fast if self.player_speed_boosted else player_speed_normal
+        # --- Falling leaves chain and tree timers ---
+        with profiler.section("sim.events"):
+            self.events.run_due(self.time)
+        with profiler.section("sim.player"):
+            self.update_player(dt)
+        with profiler.section("sim.trees"):
+            self.update_regrowth()
+        with profiler.section("sim.npcs"):
+            if self.falling_chain_paused:
+                self.npcs.hold()  # gardeners wait out a pause, so a paused game can go quiet
+            else:
+                self.npcs.update(dt)
+        with profiler.section("sim.wind"):
+            self.wind.update(self.time)
+        with profiler.section("sim.leaves"):
+            self.update_leaves(dt)
+        with profiler.section("sim.pouring"):
+            self.update_pouring()
+        # Check for dead/saved trees
+        dead_count = self.dead_count()
+        if dead_count >= MAX_DEAD_TREES or dead_count == len(self.trees):
+            self.game_over = True
+            self.status_message = ""
+        # Show status message for 2 seconds
+        if self.status_message:
+            if self.status_message_timer == 0:
+                self.status_message_timer = self.time
+            elif self.time - self.status_message_timer > 2:
+                self.status_message = ""
+                self.status_message_timer = 0
+        with profiler.section("sim.weather"):
+            self.update_weather(dt)
+        # --- Victory check ---
+        if self.trees_saved >= 5:
+            self.victory = True
+            self.game_over = True
+
+    def update_player(self, dt):
+        yaw_rad = math.radians(self.cam_yaw)
+        move_x = move_z = 0.0
+        # Movement relative to camera
+        if self.move_player_forward:
+            move_x += math.sin(yaw_rad)
+            move_z -= math.cos(yaw_rad)
+        if self.move_player_backward:
+            move_x -= math.sin(yaw_rad)
+            move_z += math.cos(yaw_rad)
+        if self.move_player_left:
+            move_x -= math.cos(yaw_rad)
+            move_z -= math.sin(yaw_rad)
+        if self.move_player_right:
+            move_x += math.cos(yaw_rad)
+            move_z += math.sin(yaw_rad)
+        length = math.hypot(move_x, move_z)
+        if length <= 1e-9:
+            return
+        move_x /= length
+        move_z /= length
+        new_x = self.player_pos[0] + move_x * self.player_speed * dt
+        new_z = self.player_pos[2] + move_z * self.player_speed * dt
+        # Clamp to the full ground edge
+        new_x = clamp(new_x, -GROUND_SIZE + 6, GROUND_SIZE - 6)
+        new_z = clamp(new_z, -GROUND_SIZE + 6, GROUND_SIZE - 6)
+        if not self.player_collides_tree(new_x, new_z) and not self.player_collides_pond(new_x, new_z):
+            self.player_pos[0] = new_x
+            self.player_pos[2] = new_z
+        self.walk_anim_phase += walk_anim_speed * dt
+        # Smoothly rotate player_facing to movement direction, with W/S inversion
+        target_facing = math.degrees(math.atan2(move_x, -move_z))
+        # Check for W/S only
+        if self.move_player_forward and not (self.move_player_left or self.move_player_right or self.move_player_backward):
+            target_facing = (target_facing + 180) % 360
+        # 0.2 per 60 Hz tick controls smoothness, scaled so it is the same at any tick rate
+        self.player_facing = lerp_angle(self.player_facing, target_facing, 1 - 0.8 ** (dt * 60))
+
+    def update_leaves(self, dt):
+        # Falling leaves animation: only falling trees and trees still owning leaves are visited
+        counts = self.leaves.owner_counts(len(self.trees))
+        for t in self.falling_trees:
+            if counts[t.slot] < LEAVES_PER_TREE:
+                block_size = 32 * t.size
+                top_y = 6 * block_size  # trunk height
+                canopy_half = 5 * block_size
+                lx = t.x + self.rng.uniform(-canopy_half, canopy_half)
+                lz = t.z + self.rng.uniform(-canopy_half, canopy_half)
+                self.leaves.spawn(t.slot, lx, top_y, lz, self.current_season)
+        for i in np.flatnonzero(counts):
+            if not self.trees[i].leaves_falling:
+                self.leaves.release_owner(i)
+        self.leaves.update(dt, self.wind)
+
+    def start_pot_pouring(self, tree):
+        if self.pour_target is not None:
+            self.stop_tree_pouring(self.pour_target)
+        self.start_tree_pouring(tree)
+        self.pour_target = tree
+        self.watering_pot_pouring = True
+
+    def stop_pot_pouring(self):
+        self.watering_pot_pouring = False
+        if self.pour_target is not None:
+            self.stop_tree_pouring(self.pour_target)
+
+    def update_pouring(self):
+        # Water pouring logic (UI pot); the tree side runs on scheduled events
+        target = self.pour_target
+        if self.watering_pot_pouring and self.watering_pot_fullness > 0 and target is not None:
+            tree_x, tree_z, tree_r = target.x, target.z, 32*target.size
+            dist = ((self.player_pos[0] - tree_x)**2 + (self.player_pos[2] - tree_z)**2)**0.5
+            if dist > tree_r + 40:
+                self.stop_pot_pouring()  # Reset if interrupted
+            else:
+                # Make player face the tree while pouring
+                dx = tree_x - self.player_pos[0]
+                dz = tree_z - self.player_pos[2]
+                self.player_facing = math.degrees(math.atan2(dx, -dz))
+                if self.pour_start_time is None:
+                    self.pour_start_time = self.time
+                else:
+                    elapsed = self.time - self.pour_start_time
+                    self.total_pour_time += elapsed
+                    self.pour_start_time = self.time
+                    if self.total_pour_time >= WATER_BUDGET:
+                        self.watering_pot_fullness = 0
+                        self.stop_pot_pouring()
+                        self.total_pour_time = WATER_BUDGET
+        else:
+            self.pour_start_time = None
+
+    def update_weather(self, dt):
+        # --- RAIN/SNOW/LEAVES ---
+        if self.current_season == 2:
+            self.rain.update(dt, self.wind)
+        elif self.current_season == 3:
+            self.snow.update(dt, self.wind)
+
+# --- 2D overlays share one orthographic projection, set up by the render queue ---
+def begin_overlay():
     gl.glMatrixMode(gl.GL_PROJECTION)
     gl.glPushMatrix()
     gl.glLoadIdentity()
@@ -600,97 +2054,1056 @@ def draw_score_status():
     gl.glMatrixMode(gl.GL_MODELVIEW)
     gl.glPushMatrix()
     gl.glLoadIdentity()
-    # Draw dead tree count
-    gl.glColor3f(1, 1, 1)
-    gl.glRasterPos2f(WINDOW_WIDTH - 320, WINDOW_HEIGHT - 40)
-    if dead_count == 1:
-        msg = b"1 Tree Has died"
-    else:
-        msg = f"{dead_count} Trees Have died".encode()
-    for c in msg:
-        glut.glutBitmapCharacter(glut.GLUT_BITMAP_HELVETICA_18, c)
-    # Draw saved tree count
-    gl.glRasterPos2f(WINDOW_WIDTH - 320, WINDOW_HEIGHT - 70)
-    msg2 = f"Trees Saved: {trees_saved}".encode()
-    for c in msg2:
-        glut.glutBitmapCharacter(glut.GLUT_BITMAP_HELVETICA_18, c)
-    # Draw water percentage
-    percent = int(100 * max(0, 1 - total_pour_time / 40.0))
-    gl.glRasterPos2f(WINDOW_WIDTH - 320, WINDOW_HEIGHT - 100)
-    msg3 = f"Water: {percent}%".encode()
-    for c in msg3:
-        glut.glutBitmapCharacter(glut.GLUT_BITMAP_HELVETICA_18, c)
-    # Draw status message
-    if status_message:
-        gl.glRasterPos2f(WINDOW_WIDTH - 320, WINDOW_HEIGHT - 130)
-        for c in status_message.encode():
-            glut.glutBitmapCharacter(glut.GLUT_BITMAP_HELVETICA_18, c)
-    # Draw game state
-    gl.glColor3f(1, 1, 0)
-    gl.glRasterPos2f(WINDOW_WIDTH - 320, WINDOW_HEIGHT - 160)
-    msg4 = f"Game State: {game_state}".encode()
-    for c in msg4:
-        glut.glutBitmapCharacter(glut.GLUT_BITMAP_HELVETICA_18, c)
+
+def end_overlay():
     gl.glPopMatrix()
     gl.glMatrixMode(gl.GL_PROJECTION)
     gl.glPopMatrix()
     gl.glMatrixMode(gl.GL_MODELVIEW)
 
-# --- Draw Game Over in center ---
-def draw_game_over():
-    gl.glMatrixMode(gl.GL_PROJECTION)
-    gl.glPushMatrix()
-    gl.glLoadIdentity()
-    gl.glOrtho(0, WINDOW_WIDTH, 0, WINDOW_HEIGHT, -1, 1)
-    gl.glMatrixMode(gl.GL_MODELVIEW)
-    gl.glPushMatrix()
-    gl.glLoadIdentity()
-    gl.glColor3f(1, 0, 0)
-    gl.glRasterPos2f(WINDOW_WIDTH//2 - 120, WINDOW_HEIGHT//2)
-    msg = b"GAME OVER"
-    for c in msg:
-        glut.glutBitmapCharacter(glut.GLUT_BITMAP_TIMES_ROMAN_24, c)
-    gl.glPopMatrix()
-    gl.glMatrixMode(gl.GL_PROJECTION)
-    gl.glPopMatrix()
-    gl.glMatrixMode(gl.GL_MODELVIEW)
+# --- Glyph atlas: GLUT bitmap fonts rendered once into a texture, drawn as batched quads ---
+HUD_FONT = "helvetica_18"
+BANNER_FONT = "times_roman_24"
+ATLAS_COLUMNS = 16
+ATLAS_FIRST_CHAR = 32
+ATLAS_LAST_CHAR = 126
 
-# --- Add victory state and display ---
-victory = False
+class GlyphAtlas:
+    def __init__(self, font):
+        self.font = font
+        self.texture = None
+        self.advance = {}  # char code -> pen advance in pixels
+        self.cell_w = self.cell_h = 0
+        self.descent = 0
+        self.tex_w = self.tex_h = 0
+
+    def build(self):
+        chars = range(ATLAS_FIRST_CHAR, ATLAS_LAST_CHAR + 1)
+        self.advance = {c: glut.glutBitmapWidth(self.font, c) for c in chars}
+        self.cell_h = glut.glutBitmapHeight(self.font) or 24
+        self.cell_w = max(max(self.advance.values()), 1)
+        self.descent = self.cell_h // 4
+        rows = (len(chars) + ATLAS_COLUMNS - 1) // ATLAS_COLUMNS
+        self.tex_w, self.tex_h = ATLAS_COLUMNS * self.cell_w, rows * self.cell_h
+        # Rasterize every glyph white-on-black into an offscreen framebuffer, then read it back.
+        # The window's own buffer isn't used: before it is mapped, its pixels may not exist.
+        framebuffer = gl.glGenFramebuffers(1)
+        renderbuffer = gl.glGenRenderbuffers(1)
+        gl.glBindRenderbuffer(gl.GL_RENDERBUFFER, renderbuffer)
+        gl.glRenderbufferStorage(gl.GL_RENDERBUFFER, gl.GL_RGBA8, self.tex_w, self.tex_h)
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, framebuffer)
+        gl.glFramebufferRenderbuffer(gl.GL_FRAMEBUFFER, gl.GL_COLOR_ATTACHMENT0, gl.GL_RENDERBUFFER, renderbuffer)
+        viewport = gl.glGetIntegerv(gl.GL_VIEWPORT)
+        gl.glViewport(0, 0, self.tex_w, self.tex_h)
+        gl.glClearColor(0.0, 0.0, 0.0, 1.0)
+        gl.glClear(gl.GL_COLOR_BUFFER_BIT)
+        gl.glMatrixMode(gl.GL_PROJECTION)
+        gl.glPushMatrix()
+        gl.glLoadIdentity()
+        gl.glOrtho(0, self.tex_w, 0, self.tex_h, -1, 1)
+        gl.glMatrixMode(gl.GL_MODELVIEW)
+        gl.glPushMatrix()
+        gl.glLoadIdentity()
+        gl.glColor3f(1, 1, 1)
+        for i, c in enumerate(chars):
+            col, row = i % ATLAS_COLUMNS, i // ATLAS_COLUMNS
+            gl.glRasterPos2f(col * self.cell_w, row * self.cell_h + self.descent)
+            glut.glutBitmapCharacter(self.font, c)
+        gl.glPopMatrix()
+        gl.glMatrixMode(gl.GL_PROJECTION)
+        gl.glPopMatrix()
+        gl.glMatrixMode(gl.GL_MODELVIEW)
+        gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 1)
+        gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, 1)
+        pixels = gl.glReadPixels(0, 0, self.tex_w, self.tex_h, gl.GL_RED, gl.GL_UNSIGNED_BYTE)
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+        gl.glDeleteFramebuffers(1, [framebuffer])
+        gl.glDeleteRenderbuffers(1, [renderbuffer])
+        gl.glViewport(*viewport)
+        self.texture = gl.glGenTextures(1)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, self.texture)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_NEAREST)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_NEAREST)
+        gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_ALPHA, self.tex_w, self.tex_h, 0,
+                        gl.GL_ALPHA, gl.GL_UNSIGNED_BYTE, pixels)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
+
+    def release(self):
+        if self.texture is not None:
+            gl.glDeleteTextures(1, [self.texture])
+            self.texture = None
+
+    def quads(self, msg, x, y):
+        # Two triangles per glyph: (x, y) is the baseline start, like glRasterPos
+        vertices, texcoords = [], []
+        w, h = self.cell_w, self.cell_h
+        for c in msg.encode():
+            i = c - ATLAS_FIRST_CHAR
+            if 0 <= i <= ATLAS_LAST_CHAR - ATLAS_FIRST_CHAR and c != 32:
+                u0 = (i % ATLAS_COLUMNS) * w / self.tex_w
+                v0 = (i // ATLAS_COLUMNS) * h / self.tex_h
+                u1, v1 = u0 + w / self.tex_w, v0 + h / self.tex_h
+                x0, y0 = x, y - self.descent
+                x1, y1 = x0 + w, y0 + h
+                vertices += [(x0, y0), (x1, y0), (x1, y1), (x0, y0), (x1, y1), (x0, y1)]
+                texcoords += [(u0, v0), (u1, v0), (u1, v1), (u0, v0), (u1, v1), (u0, v1)]
+            x += self.advance.get(c, 0)
+        return vertices, texcoords
+
+class TextBatch:
+    def __init__(self):
+        self.runs = {}  # font name -> (vertices, texcoords, colors)
+        self.arrays = None  # packed on first draw, so a kept batch redraws without repacking
+
+    def add(self, msg, x, y, font=HUD_FONT, color=(1, 1, 1)):
+        if font not in glyph_atlases:
+            return  # no GLUT fonts, e.g. offscreen benchmark renders
+        vertices, texcoords = glyph_atlases[font].quads(msg, x, y)
+        run = self.runs.setdefault(font, ([], [], []))
+        run[0].extend(vertices)
+        run[1].extend(texcoords)
+        run[2].extend([color] * len(vertices))
+        self.arrays = None
+
+    def draw(self):
+        if self.arrays is None:
+            self.arrays = [(font, np.array(vertices, dtype=np.float32), np.array(texcoords, dtype=np.float32),
+                            np.array(colors, dtype=np.float32))
+                           for font, (vertices, texcoords, colors) in self.runs.items() if vertices]
+        gl.glEnable(gl.GL_TEXTURE_2D)
+        gl.glEnable(gl.GL_BLEND)
+        gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
+        gl.glTexEnvi(gl.GL_TEXTURE_ENV, gl.GL_TEXTURE_ENV_MODE, gl.GL_MODULATE)
+        gl.glEnableClientState(gl.GL_VERTEX_ARRAY)
+        gl.glEnableClientState(gl.GL_TEXTURE_COORD_ARRAY)
+        gl.glEnableClientState(gl.GL_COLOR_ARRAY)
+        for font, vertices, texcoords, colors in self.arrays:
+            gl.glBindTexture(gl.GL_TEXTURE_2D, glyph_atlases[font].texture)
+            gl.glVertexPointer(2, gl.GL_FLOAT, 0, vertices)
+            gl.glTexCoordPointer(2, gl.GL_FLOAT, 0, texcoords)
+            gl.glColorPointer(3, gl.GL_FLOAT, 0, colors)
+            gl.glDrawArrays(gl.GL_TRIANGLES, 0, len(vertices))
+        gl.glDisableClientState(gl.GL_COLOR_ARRAY)
+        gl.glDisableClientState(gl.GL_TEXTURE_COORD_ARRAY)
+        gl.glDisableClientState(gl.GL_VERTEX_ARRAY)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
+        gl.glDisable(gl.GL_BLEND)
+        gl.glDisable(gl.GL_TEXTURE_2D)
+
+glyph_atlases = {}
+
+def build_glyph_atlases():
+    for name, font in ((HUD_FONT, glut.GLUT_BITMAP_HELVETICA_18), (BANNER_FONT, glut.GLUT_BITMAP_TIMES_ROMAN_24)):
+        if name in glyph_atlases:
+            glyph_atlases[name].release()
+        atlas = GlyphAtlas(font)
+        atlas.build()
+        glyph_atlases[name] = atlas
+
+# --- Draw score/status at top right ---
+def water_percent(world):
+    return int(100 * max(0, 1 - world.total_pour_time / WATER_BUDGET))
+
+def draw_score_status(world, text):
+    dead_count = world.dead_count()
+    # Draw dead tree count
+    if dead_count == 1:
+        msg = "1 Tree Has died"
+    else:
+        msg = f"{dead_count} Trees Have died"
+    text.add(msg, WINDOW_WIDTH - 320, WINDOW_HEIGHT - 40)
+    # Draw saved tree count
+    text.add(f"Trees Saved: {world.trees_saved}", WINDOW_WIDTH - 320, WINDOW_HEIGHT - 70)
+    # Draw water percentage
+    text.add(f"Water: {water_percent(world)}%", WINDOW_WIDTH - 320, WINDOW_HEIGHT - 100)
+    # Draw status message
+    if world.status_message:
+        text.add(world.status_message, WINDOW_WIDTH - 320, WINDOW_HEIGHT - 130)
+    # Draw game state
+    text.add(f"Game State: {world.game_state}", WINDOW_WIDTH - 320, WINDOW_HEIGHT - 160, color=(1, 1, 0))
+    # Draw the detail level the quality governor settled on
+    mode = "auto" if governor.auto else "fixed"
+    text.add(f"Quality: {governor.settings['name']} ({mode})", WINDOW_WIDTH - 320, WINDOW_HEIGHT - 190)
+
+# --- Draw Game Over in center ---
+def draw_game_over(text):
+    text.add("GAME OVER", WINDOW_WIDTH//2 - 120, WINDOW_HEIGHT//2, BANNER_FONT, (1, 0, 0))
 
 # --- Draw Victory in center, big and red ---
-def draw_victory():
-    gl.glMatrixMode(gl.GL_PROJECTION)
-    gl.glPushMatrix()
-    gl.glLoadIdentity()
-    gl.glOrtho(0, WINDOW_WIDTH, 0, WINDOW_HEIGHT, -1, 1)
-    gl.glMatrixMode(gl.GL_MODELVIEW)
-    gl.glPushMatrix()
-    gl.glLoadIdentity()
-    gl.glColor3f(1, 0, 0)
+def draw_victory(text):
     # Centered, big font
-    gl.glRasterPos2f(WINDOW_WIDTH//2 - 200, WINDOW_HEIGHT//2 + 30)
-    msg = b"VICTORY!"
-    for c in msg:
-        glut.glutBitmapCharacter(glut.GLUT_BITMAP_TIMES_ROMAN_24, c)
-    gl.glRasterPos2f(WINDOW_WIDTH//2 - 200, WINDOW_HEIGHT//2 - 30)
-    for c in msg:
-        glut.glutBitmapCharacter(glut.GLUT_BITMAP_TIMES_ROMAN_24, c)
-    gl.glPopMatrix()
-    gl.glMatrixMode(gl.GL_PROJECTION)
+    text.add("VICTORY!", WINDOW_WIDTH//2 - 200, WINDOW_HEIGHT//2 + 30, BANNER_FONT, (1, 0, 0))
+    text.add("VICTORY!", WINDOW_WIDTH//2 - 200, WINDOW_HEIGHT//2 - 30, BANNER_FONT, (1, 0, 0))
+
+def ellipse(cx, cy, rx, ry, start=0.0, stop=2 * math.pi, steps=32, closed=True):
+    angles = start + (stop - start) * np.arange(steps + (0 if closed else 1)) / steps
+    return np.column_stack([cx + rx * np.cos(angles), cy + ry * np.sin(angles)])
+
+def draw_water_pot_ui(world, text, shapes):
+    if not world.watering_pot_visible:
+        return
+    cx, cy, r = WINDOW_WIDTH - 60, 80, 30
+    # Draw pot body (cylinder)
+    shapes.add(gl.GL_POLYGON, ellipse(cx, cy, r, r * 0.7), (0.75, 0.75, 0.75))
+    # Draw pot base
+    shapes.add(gl.GL_POLYGON, ellipse(cx, cy - 18, r * 0.9, 6), (0.6, 0.6, 0.6))
+    # Draw handle
+    shapes.add(gl.GL_LINE_STRIP, ellipse(cx, cy, r + 12, r + 12, 0, math.pi, 16, closed=False), (0.7, 0.7, 0.7))
+    # Draw spout
+    shapes.add(gl.GL_POLYGON, ellipse(cx + 18, cy - 5, r * 0.9, r * 0.2, math.pi / 4, math.pi / 4 + math.pi * 6 / 8, 6), (0.7, 0.7, 0.7))
+    # Draw blue fill bar inside pot
+    fill_ratio = world.watering_pot_fullness / 100.0
+    if fill_ratio > 0:
+        shapes.add(gl.GL_POLYGON, ellipse(cx, cy - (1 - fill_ratio) * 18, r - 6, (r - 10) * fill_ratio), (0.2, 0.5, 1.0))
+    # Draw border
+    shapes.add(gl.GL_LINE_LOOP, ellipse(cx, cy, r, r * 0.7), (0.3, 0.3, 0.3), 2)
+    # Draw text below
+    status = "full" if world.watering_pot_fullness > 0 else "empty"
+    text.add(status, cx - 18, cy - 45)
+
+# --- HUD: the whole overlay is compiled into one display list, rebuilt only when a shown value changes ---
+class HudLayer:
+    def __init__(self):
+        self.list_id = None
+        self.key = None
+        self.rebuilds = 0
+
+    def state_key(self, world):
+        return (world.dead_count(), world.trees_saved, water_percent(world), world.game_state,
+                world.status_message, world.game_over, world.victory,
+                world.watering_pot_visible, int(world.watering_pot_fullness), governor.level, governor.auto)
+
+    def draw(self, world):
+        key = self.state_key(world)
+        if key != self.key or self.list_id is None:
+            self.rebuild(world, key)
+        gl.glCallList(self.list_id)
+
+    def rebuild(self, world, key):
+        if self.list_id is None:
+            self.list_id = resources.new_list()
+        text = TextBatch()
+        shapes = new_batch(use_vbo=False)
+        gl.glNewList(self.list_id, gl.GL_COMPILE)
+        draw_water_pot_ui(world, text, shapes)
+        draw_score_status(world, text)
+        if world.game_over and world.victory:
+            draw_victory(text)
+        elif world.game_over:
+            draw_game_over(text)
+        shapes.flush()
+        text.draw()
+        gl.glEndList()
+        self.key = key
+        self.rebuilds += 1
+
+    def invalidate(self):
+        self.key = None
+
+hud = HudLayer()
+
+# --- Frame profiler: per-phase CPU time, rolling percentiles, overlay and export ---
+PROFILE_WINDOW = 300  # frames kept for the rolling percentiles
+PROFILE_HISTORY = 36000  # frames kept for export (10 minutes at 60 fps)
+PROFILE_REFRESH = 0.5  # seconds between overlay updates
+PROFILE_OUT = "profile.csv"
+
+class ProfileSection:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter() - self.start)
+        return False
+
+class NullSection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_SECTION = NullSection()
+
+class FrameProfiler:
+    def __init__(self, window=PROFILE_WINDOW, history=PROFILE_HISTORY):
+        self.enabled = False
+        self.window = window
+        self.recent = {}  # phase -> deque of per-frame ms
+        self.frames = deque(maxlen=history)  # per-frame {phase: ms}
+        self.current = {}
+        self.frame_start = None
+        self.frame_index = 0
+        self.summary = {}
+        self.summary_time = 0.0
+        self.overlay = None
+        self.lock = threading.Lock()  # the simulation thread adds its phases to the frame being drawn
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.current = {}
+        self.frame_start = None
+        return self.enabled
+
+    def section(self, name):
+        return ProfileSection(self, name) if self.enabled else NULL_SECTION
+
+    def add(self, name, seconds):
+        with self.lock:
+            self.current[name] = self.current.get(name, 0.0) + seconds * 1000.0
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        with self.lock:
+            current, self.current = self.current, {}
+        if self.frame_start is not None:
+            current["frame_total"] = (now - self.frame_start) * 1000.0
+        self.frame_start = now
+        for name, ms in current.items():
+            if name not in self.recent:
+                self.recent[name] = deque(maxlen=self.window)
+            self.recent[name].append(ms)
+        current["index"] = self.frame_index
+        self.frames.append(current)
+        self.frame_index += 1
+        if now - self.summary_time >= PROFILE_REFRESH:
+            self.summary = self.percentiles()
+            self.summary_time = now
+            self.overlay = None
+
+    def percentiles(self):
+        summary = {}
+        for name, samples in self.recent.items():
+            p50, p95, p99 = np.percentile(np.fromiter(samples, dtype=np.float64), (50, 95, 99))
+            summary[name] = {"p50": float(p50), "p95": float(p95), "p99": float(p99)}
+        return summary
+
+    def phases(self):
+        names = set()
+        for frame in self.frames:
+            names.update(frame)
+        names.discard("index")
+        return sorted(names)
+
+    def export(self, path=PROFILE_OUT):
+        phases = self.phases()
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                json.dump({"phases": phases, "summary": self.percentiles(),
+                           "frames": list(self.frames)}, f, indent=1)
+        else:
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["index"] + phases)
+                for frame in self.frames:
+                    writer.writerow([frame["index"]] + [f"{frame.get(name, 0.0):.4f}" for name in phases])
+        return path
+
+    def draw(self):
+        # Rebuilt at most every PROFILE_REFRESH seconds, so the overlay barely shows up in its own numbers
+        if self.overlay is None:
+            self.overlay = TextBatch()
+            y = WINDOW_HEIGHT - 30
+            self.overlay.add("phase            p50    p95    p99 ms", 10, y, color=(1, 1, 0))
+            rows = sorted(self.summary.items(), key=lambda item: -item[1]["p95"])
+            for name, stats in rows:
+                y -= 20
+                self.overlay.add(f"{name:<14} {stats['p50']:6.2f} {stats['p95']:6.2f} {stats['p99']:6.2f}", 10, y)
+            y -= 30
+            self.overlay.add(f"sim {tick_rate.rate():.1f} ticks/s   render {frame_rate.rate():.1f} fps   "
+                             f"input {input_rate.rate():.0f} events/s", 10, y, color=(1, 1, 0))
+            if sim_thread:
+                y -= 20
+                self.overlay.add(f"views published {snapshots.published}   skipped {snapshots.skipped} "
+                                 f"(renderer still drawing)", 10, y, color=(1, 1, 0))
+            if cull_stats:
+                y -= 20
+                culled = "  ".join(f"{name} {culled}/{tested}" for name, (culled, tested) in sorted(cull_stats.items()))
+                self.overlay.add(f"culled {culled}", 10, y, color=(1, 1, 0))
+            stats = render_queue.frame_stats
+            if stats:
+                y -= 20
+                self.overlay.add(f"queue drawn {stats['drawn']} of {stats['submitted']}   color changes "
+                                 f"{stats['color_changes']}   projections {stats['projection_changes']}", 10, y, color=(1, 1, 0))
+            lookups = canopy_cache.hits + canopy_cache.misses
+            if lookups:
+                y -= 20
+                self.overlay.add(f"canopy cache {canopy_cache.hits} hits   {canopy_cache.misses} misses   "
+                                 f"{100.0 * canopy_cache.hits / lookups:.1f}% hit   {len(canopy_cache.entries)} lists",
+                                 10, y, color=(1, 1, 0))
+            y -= 20
+            self.overlay.add(f"HUD rebuilds {hud.rebuilds}", 10, y, color=(1, 1, 0))
+            gpu = resources.stats()
+            y -= 20
+            self.overlay.add(f"GPU {gpu['meshes']} meshes   {gpu['display_lists']} display lists   "
+                             f"{gpu['bytes'] / 1024:.0f} KB", 10, y, color=(1, 1, 0))
+            if gl_calls.enabled:
+                self.overlay.add(f"GL calls/frame {gl_calls.last_frame} ({RENDERER})", 10, y - 20, color=(1, 1, 0))
+        self.overlay.draw()
+
+profiler = FrameProfiler()
+
+# --- Quality governor: steps detail down when frames run long, and back up once there's room ---
+QUALITY_LEVELS = (
+    # drawn share of grass and of rain or snow, leaves drawn per tree, leaf and sun/moon sphere segments
+    dict(name="high", grass=1.0, particles=1.0, leaves=LEAVES_PER_TREE, leaf_segments=LEAF_SEGMENTS, sky_segments=SKY_SEGMENTS[0]),
+    dict(name="medium", grass=0.5, particles=0.6, leaves=20, leaf_segments=6, sky_segments=SKY_SEGMENTS[1]),
+    dict(name="low", grass=0.25, particles=0.35, leaves=12, leaf_segments=5, sky_segments=SKY_SEGMENTS[2]),
+    dict(name="lowest", grass=0.125, particles=0.2, leaves=6, leaf_segments=4, sky_segments=SKY_SEGMENTS[3]),
+)
+QUALITY_NAMES = [level["name"] for level in QUALITY_LEVELS]
+QUALITY_WINDOW = 60  # frames of work time behind each decision
+QUALITY_PERCENTILE = 0.9  # judged by the slow frames, not the average
+QUALITY_DOWN = 1.1  # step down once slow frames need this share of the frame budget
+QUALITY_UP = 0.6  # step up only once they need less than this...
+QUALITY_UP_HOLD = 3.0  # ...for this many seconds in a row
+QUALITY_RETRY = 10.0  # a step up undone within this long doubles the hold before the next try
+QUALITY_MAX_HOLD = 60.0
+
+class QualityGovernor:
+    def __init__(self, target_fps=60):
+        self.auto = False  # main() turns it on for the window; benchmarks keep a fixed level
+        self.level = 0  # index into QUALITY_LEVELS, 0 = full detail
+        self.target_fps = target_fps
+        self.work = deque(maxlen=QUALITY_WINDOW)  # seconds of CPU work per frame, swap excluded
+        self.calm_since = None
+        self.up_hold = QUALITY_UP_HOLD
+        self.last_up = None
+        self.changes = 0
+
+    @property
+    def settings(self):
+        return QUALITY_LEVELS[self.level]
+
+    def set_level(self, level):
+        level = clamp(level, 0, len(QUALITY_LEVELS) - 1)
+        if level != self.level:
+            self.level = level
+            self.changes += 1
+        # Frames drawn at the old level say nothing about the new one
+        self.work.clear()
+        self.calm_since = None
+
+    def frame(self, seconds):
+        if not self.auto:
+            return
+        now = time.perf_counter()
+        self.work.append(seconds)
+        if self.last_up is not None and now - self.last_up >= QUALITY_RETRY:
+            self.up_hold = QUALITY_UP_HOLD  # the last step up held, so the next one may come as soon
+            self.last_up = None
+        if len(self.work) < QUALITY_WINDOW:
+            return
+        budget = 1.0 / self.target_fps
+        slow = sorted(self.work)[int(QUALITY_PERCENTILE * (QUALITY_WINDOW - 1))]
+        if slow > budget * QUALITY_DOWN:
+            if self.level < len(QUALITY_LEVELS) - 1:
+                if self.last_up is not None:
+                    self.up_hold = min(self.up_hold * 2, QUALITY_MAX_HOLD)
+                    self.last_up = None
+                self.set_level(self.level + 1)
+            self.calm_since = None
+        elif slow < budget * QUALITY_UP and self.level > 0:
+            if self.calm_since is None:
+                self.calm_since = now
+            elif now - self.calm_since >= self.up_hold:
+                self.set_level(self.level - 1)
+                self.last_up = now
+        else:
+            self.calm_since = None
+
+governor = QualityGovernor()
+
+TRUNK_COLOR = (0.55, 0.27, 0.07)
+
+def draw_trunk(x, y, z, size=1.0):
+    gl.glPushMatrix()
+    gl.glTranslatef(x, y, z)
+    gl.glScalef(size, size, size)
+    gl.glRotatef(-90, 1, 0, 0)
+    resources.draw("trunk")  # radius 16 tapering to 12.8, 6 blocks tall
     gl.glPopMatrix()
-    gl.glMatrixMode(gl.GL_MODELVIEW)
+
+# --- Canopy geometry cache ---
+# Regrow progress needed for each canopy layer, bottom to top
+CANOPY_STAGES = (0.2, 0.4, 0.6, 0.8, 0.95, 1.0)
+# (height in blocks, half width in blocks) for each layer
+CANOPY_LAYERS = ((6, 5), (7, 4), (8, 3), (9, 2), (10, 1), (11, 0))
+CANOPY_CACHE_SIZE = 32  # max compiled canopies kept at once
+CANOPY_CACHE_MAX_IDLE = 300  # frames an unused canopy survives
+
+def canopy_stage(has_leaves, leaves_regrow_progress):
+    if has_leaves:
+        return len(CANOPY_STAGES)
+    return sum(1 for threshold in CANOPY_STAGES if leaves_regrow_progress >= threshold)
+
+class CanopyCache:
+    def __init__(self, max_entries=CANOPY_CACHE_SIZE, max_idle_frames=CANOPY_CACHE_MAX_IDLE):
+        self.max_entries = max_entries
+        self.max_idle_frames = max_idle_frames
+        self.entries = OrderedDict()  # (stage, size, season) -> [display list, last used frame]
+        self.frame = 0
+        self.hits = 0
+        self.misses = 0
+
+    def draw(self, x, y, z, size, stage, season):
+        if stage == 0:
+            return
+        key = (stage, round(size, 3), season)
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = [self.build(size, stage, season), self.frame]
+            self.entries[key] = entry
+            self.misses += 1
+        else:
+            self.entries.move_to_end(key)
+            entry[1] = self.frame
+            self.hits += 1
+        gl.glPushMatrix()
+        gl.glTranslatef(x, y, z)
+        gl.glCallList(entry[0])
+        gl.glPopMatrix()
+
+    def build(self, size, stage, season):
+        block_size = 32 * size
+        cubes = sum((2 * half + 1) ** 2 for _, half in CANOPY_LAYERS[:stage])
+        list_id = resources.new_list(cubes * resources.meshes["cube"].nbytes)
+        gl.glNewList(list_id, gl.GL_COMPILE)
+        if season == 3:
+            gl.glColor3f(1.0, 1.0, 1.0)
+        else:
+            gl.glColor3f(0.0, 0.4, 0.0)  # Dark green
+        for layer, half in CANOPY_LAYERS[:stage]:
+            ly = layer * block_size
+            for dx in range(-half, half + 1):
+                for dz in range(-half, half + 1):
+                    gl.glPushMatrix()
+                    gl.glTranslatef(dx * block_size, ly, dz * block_size)
+                    gl.glScalef(block_size, block_size, block_size)
+                    resources.draw("cube")
+                    gl.glPopMatrix()
+        gl.glEndList()
+        return list_id
+
+    def end_frame(self):
+        # Drop canopies nobody drew recently, then trim the least recently used
+        self.frame += 1
+        stale = [key for key, (_, used) in self.entries.items() if self.frame - used > self.max_idle_frames]
+        for key in stale:
+            self.evict(key)
+        while len(self.entries) > self.max_entries:
+            self.evict(next(iter(self.entries)))
+
+    def evict(self, key):
+        list_id, _ = self.entries.pop(key)
+        resources.delete_list(list_id)
+
+    def clear(self):
+        for key in list(self.entries):
+            self.evict(key)
+
+canopy_cache = CanopyCache()
+
+# --- Render queue: every entity submits once per frame, drawn grouped by GL state ---
+LAYER_BACKDROP = -1  # the skydome, drawn before anything writes depth
+LAYER_SKY = 0
+LAYER_WORLD = 1
+LAYER_OVERLAY = 2  # 2D, drawn under one shared orthographic projection
+
+class RenderQueue:
+    def __init__(self):
+        self.items = {}  # entity key -> (sort key, draw function, args, profiler phase)
+        self.batch = None  # shared vertex batch, drawn whenever the layer changes
+        self.duplicates = 0
+        self.frame_stats = {}
+
+    def submit(self, key, draw, *args, layer=LAYER_WORLD, primitive="triangles", color=None):
+        # An entity submitted twice in one frame is only drawn once
+        if key in self.items:
+            self.duplicates += 1
+            return False
+        phase = "draw." + (key[0] if isinstance(key, tuple) else key)
+        self.items[key] = ((layer, primitive, color or (), len(self.items)), draw, args, phase)
+        return True
+
+    def flush(self):
+        items = sorted(self.items.values(), key=lambda item: item[0])
+        current_layer = None
+        current_color = None
+        color_changes = 0
+        projection_changes = 0
+        primitives = {}
+        for (layer, primitive, color, _), draw, args, phase in items:
+            if layer != current_layer:
+                self.flush_batch()
+                if current_layer == LAYER_OVERLAY:
+                    end_overlay()
+                if layer == LAYER_OVERLAY:
+                    begin_overlay()
+                    projection_changes += 1
+                current_layer = layer
+            if color:
+                if color != current_color:
+                    gl.glColor3f(*color)
+                    current_color = color
+                    color_changes += 1
+            else:
+                current_color = None  # the item sets its own colors
+            with profiler.section(phase):
+                draw(*args)
+            primitives[primitive] = primitives.get(primitive, 0) + 1
+        self.flush_batch()
+        if current_layer == LAYER_OVERLAY:
+            end_overlay()
+        self.frame_stats = {
+            "submitted": len(items) + self.duplicates,
+            "drawn": len(items),
+            "duplicates": self.duplicates,
+            "color_changes": color_changes,
+            "projection_changes": projection_changes,
+            "primitives": primitives,
+        }
+        self.items = {}
+        self.duplicates = 0
+        return self.frame_stats
+
+    def flush_batch(self):
+        if self.batch is not None:
+            with profiler.section("draw.batch"):
+                self.batch.flush()
+
+# --- View-frustum and draw-distance culling ---
+DRAW_DISTANCE = 2000.0  # entities further than this from the camera are skipped
+
+class Frustum:
+    def __init__(self, clip, eye, draw_distance=DRAW_DISTANCE):
+        # clip = projection @ modelview; a point is inside a plane when a*x + b*y + c*z + d >= 0
+        planes = np.array([
+            clip[3] + clip[0], clip[3] - clip[0],  # left, right
+            clip[3] + clip[1], clip[3] - clip[1],  # bottom, top
+            clip[3] + clip[2], clip[3] - clip[2],  # near, far
+        ])
+        planes /= np.linalg.norm(planes[:, :3], axis=1)[:, None]
+        self.planes = planes
+        self.plane_tuples = [tuple(plane) for plane in planes.tolist()]
+        self.eye = np.array(eye, dtype=np.float32)
+        self.draw_distance = draw_distance
+        self.tested = {}
+        self.culled = {}
+
+    @classmethod
+    def from_gl(cls, eye, draw_distance=DRAW_DISTANCE):
+        # OpenGL hands matrices back column-major
+        modelview = np.array(gl.glGetFloatv(gl.GL_MODELVIEW_MATRIX), dtype=np.float64).reshape(4, 4).T
+        projection = np.array(gl.glGetFloatv(gl.GL_PROJECTION_MATRIX), dtype=np.float64).reshape(4, 4).T
+        return cls(projection @ modelview, eye, draw_distance)
+
+    def count(self, category, tested, culled):
+        self.tested[category] = self.tested.get(category, 0) + tested
+        self.culled[category] = self.culled.get(category, 0) + culled
+
+    def sphere_visible(self, x, y, z, radius, category="entities", far=True):
+        # far=False skips the far plane and draw distance, for the sky
+        visible = True
+        planes = self.plane_tuples if far else self.plane_tuples[:5]
+        if far:
+            ex, ey, ez = self.eye.tolist()
+            reach = self.draw_distance + radius
+            if (x - ex)**2 + (y - ey)**2 + (z - ez)**2 > reach * reach:
+                visible = False
+        if visible:
+            for a, b, c, d in planes:
+                if a * x + b * y + c * z + d < -radius:
+                    visible = False
+                    break
+        self.count(category, 1, 0 if visible else 1)
+        return visible
+
+    def spheres_visible(self, centers, radius, category="entities"):
+        distances = centers @ self.planes[:, :3].T.astype(np.float32) + self.planes[:, 3].astype(np.float32)
+        visible = (distances >= -radius).all(axis=1)
+        offsets = centers - self.eye
+        reach = self.draw_distance + radius
+        visible &= np.einsum("ij,ij->i", offsets, offsets) <= reach * reach
+        self.count(category, len(visible), len(visible) - int(np.count_nonzero(visible)))
+        return visible
+
+    def report(self):
+        return {category: (self.culled[category], self.tested[category]) for category in self.tested}
+
+def submit_scene(queue, world, alpha=1.0, frustum=None):
+    season = world.current_season
+    player_pos = world.render_player_pos(alpha)
+    eye = get_camera_pos(world, alpha)
+    celestial_manager.submit(queue, season, world.sun_position, eye, frustum)
+    queue.submit("ground", draw_ground, queue.batch, ground_color(season), primitive="quads")
+    quality = governor.settings
+    queue.submit("grass", grass_field.draw, frustum, eye, quality["grass"], primitive="lines")
+    if frustum is None or frustum.sphere_visible(POND_X, 4, POND_Z, POND_RADIUS):
+        queue.submit("pond", draw_pond, primitive="quads", color=POND_COLOR)
+    for t in world.trees:
+        t.submit(queue, season, frustum)
+    if not world.is_first_person and (frustum is None or frustum.sphere_visible(player_pos[0], player_pos[1] + 6, player_pos[2], CHARACTER_RADIUS)):
+        queue.submit("player", draw_minecraft_player, queue.batch, player_pos[0], player_pos[1], player_pos[2],
+                     world.render_player_facing(alpha), world.walk_anim_phase, primitive="triangles")
+    if len(world.npcs):
+        npc_pos, npc_facing = world.npcs.render_state(alpha)
+        phase = world.npcs.phase
+        if frustum is not None:
+            visible = frustum.spheres_visible(npc_pos + np.float32([0, 6, 0]), CHARACTER_RADIUS, "npcs")
+            npc_pos, npc_facing, phase = npc_pos[visible], npc_facing[visible], phase[visible]
+        queue.submit("npcs", draw_characters, queue.batch, npc_pos, npc_facing, phase, primitive="triangles")
+    if world.watering_pot_pouring:
+        queue.submit("water_pour", draw_water_pour, queue.batch, world, alpha, primitive="lines")
+    if season == 2:
+        queue.submit("rain", world.rain.draw, queue.batch, frustum, quality["particles"], primitive="lines")
+    elif season == 3:
+        queue.submit("snow", world.snow.draw, queue.batch, frustum, quality["particles"], primitive="points")
+    queue.submit("leaves", world.leaves.draw, queue.batch, frustum, quality["leaves"], quality["leaf_segments"],
+                 primitive="triangles")
+    # HUD
+    queue.submit("hud", hud.draw, world, layer=LAYER_OVERLAY, primitive="text")
+    if profiler.enabled:
+        queue.submit("profiler", profiler.draw, layer=LAYER_OVERLAY, primitive="text")
+
+world = None  # created when the game starts, not at import
+render_queue = RenderQueue()
+cull_stats = {}  # category -> (culled, tested) for the last frame, shown in the profiler overlay
+
+# --- Fixed-timestep loop ---
+SIM_DT = 1.0 / 60  # seconds per simulation tick
+MAX_FRAME_DT = 0.25  # longest real frame the simulation will catch up on
+TARGET_FPS = 60  # 0 = no cap, let vsync pace the buffer swaps
+QUIET_FPS = 10  # redraw rate while nothing but grass is moving
+
+SIM_THREAD = True  # step the world on its own thread; False runs it between frames on the GLUT thread
+GIL_SWITCH_INTERVAL = 0.001  # seconds a thread may hold the GIL before the other one gets a turn
+GRASS_CATCH_UP = 4  # most grass updates made for one drawn frame
+
+sim_accumulator = 0.0
+render_alpha = 1.0  # how far the drawn frame sits between the last two ticks
+last_frame_time = None
+loop_generation = 0  # bumped to cancel an already scheduled frame
+grass_tick = 0  # world tick the grass was last updated for, on the simulation thread path
+
+class RateMeter:
+    # Events per second over the last second: simulation ticks or drawn frames
+    def __init__(self, window=1.0):
+        self.window = window
+        self.times = deque()
+
+    def tick(self):
+        now = time.perf_counter()
+        self.times.append(now)
+        while now - self.times[0] > self.window:
+            self.times.popleft()
+
+    def rate(self):
+        times = list(self.times)
+        if len(times) < 2:
+            return 0.0
+        return (len(times) - 1) / max(times[-1] - times[0], 1e-9)
+
+tick_rate = RateMeter()
+frame_rate = RateMeter()
+input_rate = RateMeter()  # raw GLUT input callbacks
+
+def step_world():
+    world.step(SIM_DT)
+    if recorder:
+        recorder.tick()
+    tick_rate.tick()
+
+# --- Simulation thread: steps the world at its own rate, publishes views for the renderer ---
+VIEW_FIELDS = ("time", "tick_count", "current_season", "player_facing", "prev_player_facing", "walk_anim_phase",
+               "cam_yaw", "cam_pitch", "is_first_person", "watering_pot_visible", "watering_pot_fullness",
+               "watering_pot_pouring", "total_pour_time", "game_state", "game_over", "victory", "trees_saved",
+               "status_message", "sun_position")
+
+class WorldView:
+    # Copy of everything drawing reads from the world, with the same names, so the renderer
+    # takes either one. Only written while the renderer doesn't hold it.
+    def __init__(self):
+        self.stamp = 0.0  # perf_counter time the newest tick in the view was due
+        self.player_pos = [0.0, 0.0, 0.0]
+        self.prev_player_pos = [0.0, 0.0, 0.0]
+        self.trees = []
+        self.pour_target = None
+        self.nearest = None
+        self.rain = RainPool()
+        self.snow = SnowPool()
+        self.leaves = LeafPool()
+        self.npcs = Crowd(0)
+        self.wind = WindField(np.random.default_rng(0))
+        self.dead = 0
+        self.quiet = False
+        self.finished = False
+
+    def capture(self, world, stamp):
+        self.stamp = stamp
+        for name in VIEW_FIELDS:
+            setattr(self, name, getattr(world, name))
+        self.player_pos[:] = world.player_pos
+        self.prev_player_pos[:] = world.prev_player_pos
+        if len(self.trees) != len(world.trees):
+            self.trees = [copy.copy(t) for t in world.trees]
+        else:
+            for mine, t in zip(self.trees, world.trees):
+                mine.__dict__.update(t.__dict__)
+        self.pour_target = self.trees[world.pour_target.slot] if world.pour_target else None
+        self.nearest = self.trees[world.nearest_tree().slot]
+        with profiler.section("sim.publish.particles"):
+            self.rain.mirror(world.rain)
+            self.snow.mirror(world.snow)
+            self.leaves.mirror(world.leaves)
+        self.npcs.mirror(world.npcs)
+        self.wind.mirror(world.wind)
+        self.dead = world.dead_count()
+        self.quiet = world.is_quiet()
+        self.finished = world.is_finished()
+
+    render_player_pos = GameWorld.render_player_pos
+    render_player_facing = GameWorld.render_player_facing
+
+    def nearest_tree(self):
+        return self.nearest
+
+    def dead_count(self):
+        return self.dead
+
+    def is_quiet(self):
+        return self.quiet
+
+    def is_finished(self):
+        return self.finished
+
+class SnapshotBuffers:
+    # Two views: the simulation fills the one the renderer isn't holding, then makes it the front
+    def __init__(self):
+        self.views = [WorldView(), WorldView()]
+        self.lock = threading.Lock()
+        self.front = None  # index of the newest complete view
+        self.reading = None  # index of the view being drawn
+        self.published = 0
+        self.skipped = 0
+
+    def publish(self, world, stamp):
+        with self.lock:
+            back = 0 if self.front is None else 1 - self.front
+            if back == self.reading:
+                # Still being drawn from the tick before; this state goes out with the next tick instead
+                self.skipped += 1
+                return False
+        self.views[back].capture(world, stamp)
+        with self.lock:
+            self.front = back
+            self.published += 1
+        return True
+
+    def latest(self):
+        front = self.front
+        return None if front is None else self.views[front]
+
+    def acquire(self):
+        with self.lock:
+            self.reading = self.front
+        return None if self.reading is None else self.views[self.reading]
+
+    def release(self):
+        with self.lock:
+            self.reading = None
+
+class SimulationThread:
+    def __init__(self, snapshots):
+        self.snapshots = snapshots
+        self.running = False
+        self.thread = None
+        self.error = None  # exception that stopped the thread, for the GLUT thread to act on
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="simulation", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        input_queue.interrupt()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        try:
+            self.loop()
+        except Exception as error:
+            traceback.print_exc()
+            self.error = error
+
+    def loop(self):
+        next_tick = time.perf_counter()
+        self.snapshots.publish(world, next_tick)
+        while self.running:
+            now = time.perf_counter()
+            next_tick = max(next_tick, now - MAX_FRAME_DT)  # after a stall, catch up on at most this much
+            stamp = None
+            while next_tick <= now:
+                apply_queued_input()
+                step_world()
+                stamp = next_tick
+                next_tick += SIM_DT
+            if stamp is not None:
+                if autosaver:
+                    autosaver.maybe_save(world)
+                with profiler.section("sim.publish"):
+                    self.snapshots.publish(world, stamp)
+            if world.is_finished():
+                # Nothing left to simulate: sleep until input (a quick load, say) arrives
+                input_queue.wait()
+                next_tick = time.perf_counter()
+            elif world.is_quiet():
+                # Only grass and sky move: step in batches at the quiet rate, or sooner on input
+                input_queue.wait(max(0.0, now + 1.0 / QUIET_FPS - time.perf_counter()))
+            else:
+                time.sleep(max(0.0, next_tick - time.perf_counter()))
+
+snapshots = None  # views shared with the simulation thread
+sim_thread = None  # started by main() unless SIM_THREAD is off
+
+# --- Input: GLUT callbacks only queue events; the world takes them as one batch per tick ---
+POINTER_WARP_MARGIN = 64  # px from the window edge at which the pointer is moved back to the center
+INPUT_ACTIVE = 0.5  # seconds after the last input that redraws keep the full frame rate
+
+class InputQueue:
+    # Key events keep their order. Pointer motion is summed, so a tick applies
+    # (and records) one look however many motion events the mouse sent.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ready = threading.Condition(self.lock)  # notified whenever something is queued
+        self.events = []  # (kind, code), in arrival order
+        self.look_x = 0.0
+        self.look_y = 0.0
+        self.last_input = -math.inf  # perf_counter time of the newest event
+
+    def push(self, item):
+        with self.ready:
+            self.events.append(item)
+            self.ready.notify_all()
+        self.touch()
+
+    def move(self, dx, dy):
+        with self.ready:
+            self.look_x += dx
+            self.look_y += dy
+            self.ready.notify_all()
+        self.touch()
+
+    def wait(self, timeout=None):
+        # Until something is queued, interrupt() is called, or timeout seconds pass
+        with self.ready:
+            if not self.events and not (self.look_x or self.look_y):
+                self.ready.wait(timeout)
+
+    def interrupt(self):
+        with self.ready:
+            self.ready.notify_all()
+
+    def touch(self):
+        self.last_input = time.perf_counter()
+        input_rate.tick()
+
+    def take(self):
+        with self.lock:
+            events, self.events = self.events, []
+            look_x, look_y = self.look_x, self.look_y
+            self.look_x = self.look_y = 0.0
+        return events, look_x, look_y
+
+    def active(self, now):
+        return now - self.last_input < INPUT_ACTIVE
+
+input_queue = InputQueue()
+
+def send_input(kind, code=0):
+    input_queue.push((kind, code))
+
+def apply_queued_input():
+    # Between ticks, on whichever thread steps the world; applied input is also recorded
+    events, look_x, look_y = input_queue.take()
+    for item in events:
+        apply_live_input(*item)
+    if look_x or look_y:
+        apply_live_input(EVENT_LOOK, 0, look_x, look_y)
+
+def apply_live_input(kind, code=0, dx=0.0, dy=0.0):
+    if kind == EVENT_QUICK_LOAD and recorder and not recorder.saved:
+        # Replay only has the saves made during the recording to load from
+        world.status_message = "Can't load a save from before the recording"
+        return
+    if recorder:
+        recorder.record(kind, code, dx, dy)
+        recorder.saved = recorder.saved or kind == EVENT_QUICK_SAVE
+    if kind == EVENT_QUICK_SAVE:
+        quick_save()
+    elif kind == EVENT_QUICK_LOAD:
+        quick_load()
+    else:
+        apply_input(world, kind, code, dx, dy)
 
 # GLUT callbacks
 
 def display():
+    start = time.perf_counter()
+    if sim_thread:
+        view = snapshots.acquire()
+        try:
+            if view is not None:
+                with profiler.section("draw.grass"):
+                    update_grass(view)
+                render_scene(view, clamp((time.perf_counter() - view.stamp) / SIM_DT, 0.0, 1.0))
+        finally:
+            snapshots.release()
+    else:
+        render_scene()
+    governor.frame(time.perf_counter() - start)
+    with profiler.section("draw.swap"):
+        glut.glutSwapBuffers()
+    frame_rate.tick()
+    profiler.end_frame()
+    if gl_calls.enabled:
+        gl_calls.end_frame()
+    mark_startup("first_frame")
+
+def update_grass(view):
+    # One grass update per tick the view moved on, as the single-thread loop does
+    global grass_tick
+    ticks = view.tick_count - grass_tick
+    if ticks:
+        for _ in range(clamp(ticks, 1, GRASS_CATCH_UP)):
+            grass_field.update(view.wind)
+        grass_tick = view.tick_count
+
+def render_scene(view=None, alpha=None):
+    # Draws the world, or a published view of it, blended alpha of the way into the last tick
+    global cull_stats
+    if view is None:
+        view = world
+    if alpha is None:
+        alpha = render_alpha
     gl.glClear(gl.GL_COLOR_BUFFER_BIT | gl.GL_DEPTH_BUFFER_BIT)
     gl.glLoadIdentity()
-    cam_x, cam_y, cam_z = get_camera_pos()
-    if is_first_person:
+    player_pos = view.render_player_pos(alpha)
+    cam_x, cam_y, cam_z = get_camera_pos(view, alpha)
+    if view.is_first_person:
         look_dist = 100
-        yaw_rad = math.radians(cam_yaw)
-        pitch_rad = math.radians(cam_pitch)
+        yaw_rad = math.radians(view.cam_yaw)
+        pitch_rad = math.radians(view.cam_pitch)
         look_x = cam_x + look_dist * math.sin(yaw_rad) * math.cos(pitch_rad)
         look_y = cam_y + look_dist * math.sin(pitch_rad)
         look_z = cam_z - look_dist * math.cos(yaw_rad) * math.cos(pitch_rad)
@@ -701,157 +3114,60 @@ def display():
         glu.gluLookAt(cam_x, cam_y, cam_z,
                       player_pos[0], player_pos[1] + 12, player_pos[2],
                       0, 1, 0)
-    celestial_manager.update_and_draw()
-    draw_ground()
-    grass_field.update_and_draw()
-    draw_pond()
-    main_tree.draw()
-    for t in other_trees:
-        t.draw()
-    if not is_first_person:
-        draw_minecraft_player(player_pos[0], player_pos[1], player_pos[2], player_facing)
-    draw_water_pour()
-    if current_season == 2:
-        draw_rain(raindrops)
-    elif current_season == 3:
-        draw_snow(snowflakes)
-    for t in [main_tree]+other_trees:
-        if t.leaves_falling:
-            draw_falling_leaves(t.falling_leaves)
-    draw_water_pot_ui()
-    draw_score_status()
-    if game_over and victory:
-        draw_victory()
-    elif game_over:
-        draw_game_over()
-    glut.glutSwapBuffers()
-
-def idle():
-    global pouring_duration, pour_start_time, watering_pot_pouring, watering_pot_fullness, game_over, status_message, status_message_timer, trees_saved, victory, total_pour_time
-    global raindrops, snowflakes, falling_leaves
-    global player_pos, player_facing, walk_anim_phase, last_time
-    global player_speed, player_speed_boosted, player_speed_normal, player_speed_fast
-    global falling_chain_active, falling_chain_next_time, falling_chain_last_tree, falling_chain_paused
-    global game_state
-    if victory:
-        game_state = "Victory"
-        glut.glutPostRedisplay()
+    with profiler.section("draw.cull_submit"):
+        frustum = Frustum.from_gl((cam_x, cam_y, cam_z), DRAW_DISTANCE)
+        submit_scene(render_queue, view, alpha, frustum)
+    render_queue.flush()
+    cull_stats = frustum.report()
+    canopy_cache.end_frame()
+
+def run_frame(generation):
+    global sim_accumulator, render_alpha, last_frame_time
+    if generation != loop_generation:
         return
-    if game_over:
-        game_state = "Game Over"
+    now = time.perf_counter()
+    if sim_thread:
+        # The simulation steps itself; this loop only paces redraws. Input can't restart it
+        # from the other thread, so a finished game keeps redrawing at the quiet rate.
+        if sim_thread.error is not None:
+            print(f"Simulation thread stopped: {sim_thread.error!r}")
+            quit_game(1)
+            return
+        view = snapshots.latest()
         glut.glutPostRedisplay()
+        idle = view is None or (view.is_quiet() and not input_queue.active(now)) or view.is_finished()
+        fps = QUIET_FPS if idle else TARGET_FPS
+        delay = max(0.0, now + 1.0 / fps - time.perf_counter()) if fps > 0 else 0.0
+        glut.glutTimerFunc(int(delay * 1000), run_frame, generation)
         return
-    # Set player speed based on boost
-    player_speed = player_speed_fast if player_speed_boosted else player_speed_normal
-    # --- Falling leaves chain logic ---
-    continue_falling_chain()
-    move_vec = np.array([0.0, 0.0, 0.0])
-    yaw_rad = math.radians(cam_yaw)
-    # Movement relative to camera
-    if move_player_forward:
-        move_vec[0] += math.sin(yaw_rad)
-        move_vec[2] -= math.cos(yaw_rad)
-    if move_player_backward:
-        move_vec[0] -= math.sin(yaw_rad)
-        move_vec[2] += math.cos(yaw_rad)
-    if move_player_left:
-        move_vec[0] -= math.cos(yaw_rad)
-        move_vec[2] -= math.sin(yaw_rad)
-    if move_player_right:
-        move_vec[0] += math.cos(yaw_rad)
-        move_vec[2] += math.sin(yaw_rad)
-    if np.linalg.norm(move_vec) > 0:
-        move_vec = move_vec / np.linalg.norm(move_vec)
-        new_x = player_pos[0] + move_vec[0] * player_speed * 0.1
-        new_z = player_pos[2] + move_vec[2] * player_speed * 0.1
-        # Clamp to the full ground edge
-        new_x = clamp(new_x, -GROUND_SIZE + 6, GROUND_SIZE - 6)
-        new_z = clamp(new_z, -GROUND_SIZE + 6, GROUND_SIZE - 6)
-        if not player_collides_tree(new_x, new_z) and not player_collides_pond(new_x, new_z):
-            player_pos[0] = new_x
-            player_pos[2] = new_z
-        now = time.time()
-        walk_anim_phase += walk_anim_speed * (now - last_time) * 60
-        last_time = now
-        # Smoothly rotate player_facing to movement direction, with W/S inversion
-        target_facing = math.degrees(math.atan2(move_vec[0], -move_vec[2]))
-        # Check for W/S only
-        if move_player_forward and not (move_player_left or move_player_right or move_player_backward):
-            target_facing = (target_facing + 180) % 360
-        # Interpolate angle (lerp with wrap-around)
-        def lerp_angle(a, b, t):
-            diff = (b - a + 180) % 360 - 180
-            return a + diff * t
-        global player_facing
-        player_facing = lerp_angle(player_facing, target_facing, 0.2)  # 0.2 controls smoothness
-    else:
-        last_time = time.time()
-    # Update all trees
-    for t in [main_tree]+other_trees:
-        was_dead = (not t.has_leaves and t.leaves_regrow_progress == 0.0)
-        t.update()
-        if was_dead and (t.has_leaves or t.leaves_regrow_progress > 0.0):
-            trees_saved += 1
-    # Water pouring logic (UI pot)
-    if watering_pot_pouring and watering_pot_fullness > 0:
-        # Find nearest tree
-        nearest = min([main_tree]+other_trees, key=lambda t: ((player_pos[0]-t.x)**2 + (player_pos[2]-t.z)**2)**0.5)
-        tree_x, tree_z, tree_r = nearest.x, nearest.z, 32*nearest.size
-        dist = ((player_pos[0] - tree_x)**2 + (player_pos[2] - tree_z)**2)**0.5
-        if dist > tree_r + 40:
-            watering_pot_pouring = False
-            nearest.pouring = False
-            nearest.pour_accumulated = 0.0  # Reset if interrupted
-        else:
-            # Make player face the tree while pouring
-            dx = tree_x - player_pos[0]
-            dz = tree_z - player_pos[2]
-            player_facing = math.degrees(math.atan2(dx, -dz))
-            if pour_start_time is None:
-                pour_start_time = time.time()
-            else:
-                elapsed = time.time() - pour_start_time
-                total_pour_time += elapsed
-                # Increment the tree's pour_accumulated
-                nearest.pour_accumulated += elapsed
-                pour_start_time = time.time()
-                if total_pour_time >= 40.0:
-                    watering_pot_fullness = 0
-                    watering_pot_pouring = False
-                    nearest.pouring = False
-                    total_pour_time = 40.0
-    else:
-        pour_start_time = None
-        # Reset pour_accumulated for all trees if not pouring
-        for t in [main_tree]+other_trees:
-            if not t.pouring:
-                t.pour_accumulated = 0.0
-    # Check for dead/saved trees
-    dead_count = sum(1 for t in [main_tree]+other_trees if not t.has_leaves and t.leaves_regrow_progress == 0.0)
-    if dead_count >= MAX_DEAD_TREES or dead_count == len([main_tree]+other_trees):
-        game_over = True
-        status_message = ""
-    # Show status message for 2 seconds
-    if status_message:
-        if status_message_timer == 0:
-            status_message_timer = time.time()
-        elif time.time() - status_message_timer > 2:
-            status_message = ""
-            status_message_timer = 0
-    # --- RAIN/SNOW/LEAVES ---
-    if current_season == 2:
-        raindrops = [drop for drop in raindrops if drop.update()]
-        while len(raindrops) < 100:
-            raindrops.append(Raindrop())
-    elif current_season == 3:
-        snowflakes = [flake for flake in snowflakes if flake.update()]
-        while len(snowflakes) < 100:
-            snowflakes.append(Snowflake())
-    # --- Victory check ---
-    if trees_saved >= 5:
-        victory = True
-        game_over = True
+    apply_queued_input()
+    frame_dt = min(now - last_frame_time, MAX_FRAME_DT) if last_frame_time is not None else 0.0
+    last_frame_time = now
+    sim_accumulator += frame_dt
+    while sim_accumulator >= SIM_DT:
+        step_world()
+        with profiler.section("sim.grass"):
+            grass_field.update(world.wind)
+        sim_accumulator -= SIM_DT
+    if autosaver:
+        autosaver.maybe_save(world)
+    render_alpha = sim_accumulator / SIM_DT
     glut.glutPostRedisplay()
+    if world.is_finished():
+        # Nothing left to simulate; input wakes the loop again
+        last_frame_time = None
+        return
+    fps = QUIET_FPS if world.is_quiet() and not input_queue.active(now) else TARGET_FPS
+    delay = 0.0
+    if fps > 0:
+        delay = max(0.0, now + 1.0 / fps - time.perf_counter())
+    glut.glutTimerFunc(int(delay * 1000), run_frame, generation)
+
+def wake_loop():
+    # Restart the frame loop right away, dropping any frame already scheduled
+    global loop_generation
+    loop_generation += 1
+    glut.glutTimerFunc(0, run_frame, loop_generation)
 
 def reshape(width, height):
     gl.glViewport(0, 0, width, height)
@@ -860,317 +3176,950 @@ def reshape(width, height):
     glu.gluPerspective(60, width / float(height), 1, 2000)
     gl.glMatrixMode(gl.GL_MODELVIEW)
 
+exit_status = 0  # returned by main() once the window closes
+
+def quit_game(status=0):
+    global exit_status
+    exit_status = status
+    if sim_thread:
+        sim_thread.stop()
+    if recorder:
+        recorder.close(world)
+    if profiler.frames:
+        profiler.export(PROFILE_OUT)
+    release_gl()
+    if hasattr(glut, 'glutLeaveMainLoop'):
+        glut.glutLeaveMainLoop()
+    else:
+        exit(status)
+
 def keyboard(key, x, y):
-    global move_player_forward, move_player_backward, move_player_left, move_player_right
-    global current_season, is_first_person
-    global watering_pot_visible, watering_pot_fullness, watering_pot_pouring
-    global game_over, status_message, status_message_timer, total_pour_time
-    global player_speed_boosted
-    global falling_chain_active, falling_chain_paused
-    global game_state, victory
-    # Allow reset (q) and exit (ESC) even after game over
-    if key == b'q':
-        reset_game()
-        return
+    # Allow exit (ESC) even after game over
     if key == b'\x1b':
-        if hasattr(glut, 'glutLeaveMainLoop'):
-            glut.glutLeaveMainLoop()
-        else:
-            exit(0)
-    if game_over:
+        quit_game()
         return
-    if key == b'w':
-        move_player_forward = True
-    elif key == b's':
-        move_player_backward = True
-    elif key == b'a':
-        move_player_left = True
-    elif key == b'd':
-        move_player_right = True
-    elif key == b'1':
-        current_season = 1
-    elif key == b'2':
-        current_season = 2
-    elif key == b'3':
-        current_season = 3
-    elif key == b'f':
-        # Toggle pause/resume if chain is active, else start chain
-        if falling_chain_active:
-            falling_chain_paused = not falling_chain_paused
-            if falling_chain_paused:
-                game_state = "Paused"
-            else:
-                game_state = "Playing"
-        else:
-            start_random_tree_falling()
-            game_state = "Playing"
-    elif key == b'g':
-        # Only toggle watering pot visibility; do NOT re-initialize grass!
-        watering_pot_visible = not watering_pot_visible
-    elif key == b'h':
-        pond_x, pond_z, pond_r = -200, 0, 60
-        dist = ((player_pos[0] - pond_x)**2 + (player_pos[2] - pond_z)**2)**0.5
-        if watering_pot_visible and dist < pond_r + 30:
-            watering_pot_fullness = 100
-            total_pour_time = 0.0
-    elif key == b'j':
-        nearest = min([main_tree]+other_trees, key=lambda t: ((player_pos[0]-t.x)**2 + (player_pos[2]-t.z)**2)**0.5)
-        tree_x, tree_z, tree_r = nearest.x, nearest.z, 32*nearest.size
-        dist = ((player_pos[0] - tree_x)**2 + (player_pos[2] - tree_z)**2)**0.5
-        if watering_pot_visible and watering_pot_fullness > 0 and dist < tree_r + 40 and total_pour_time < 40.0:
-            nearest.pouring = not nearest.pouring
-            watering_pot_pouring = nearest.pouring
-    elif key == b'k':
-        watering_pot_pouring = False
-    elif key == b'v':
-        is_first_person = not is_first_person
-    elif key == b'l':
-        player_speed_boosted = not player_speed_boosted
+    # Profiler: p toggles the overlay, o writes the recorded frames
+    if key == b'p':
+        profiler.toggle()
+        glut.glutPostRedisplay()
+        return
+    if key == b'o':
+        if profiler.frames:
+            print(f"Profile written to {profiler.export(PROFILE_OUT)}")
+        return
+    send_input(EVENT_KEY_DOWN, key[0])
+    wake_loop()
 
 def keyboard_up(key, x, y):
-    global move_player_forward, move_player_backward, move_player_left, move_player_right
-    if game_over:
-        return
-    if key == b'w':
-        move_player_forward = False
-    elif key == b's':
-        move_player_backward = False
-    elif key == b'a':
-        move_player_left = False
-    elif key == b'd':
-        move_player_right = False
+    send_input(EVENT_KEY_UP, key[0])
+    wake_loop()
 
 def mouse_motion(x, y):
-    global mouse_last_x, mouse_last_y, cam_yaw, cam_pitch
-    if game_over:
+    global mouse_last_x, mouse_last_y
+    if world.game_over:
         return
     dx = x - mouse_last_x
     dy = y - mouse_last_y
-    cam_yaw += dx * mouse_sensitivity
-    cam_pitch -= dy * mouse_sensitivity
-    cam_pitch = max(-80, min(80, cam_pitch))
-    # Prevent looking below horizon
-    if cam_pitch < -10:
-        cam_pitch = -10
     mouse_last_x = x
     mouse_last_y = y
-    glut.glutWarpPointer(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
-    mouse_last_x = WINDOW_WIDTH // 2
-    mouse_last_y = WINDOW_HEIGHT // 2
+    if not (dx or dy):
+        return  # the event a warp sends back
+    # After a quiet spell, redraw now instead of at the next quiet frame
+    if not input_queue.active(time.perf_counter()):
+        wake_loop()
+    input_queue.move(dx, dy)
+    # Every warp is a round trip to the window system and sends a motion event back,
+    # so the pointer is only recentered when it gets near the edge
+    margin = POINTER_WARP_MARGIN
+    if not (margin <= x < WINDOW_WIDTH - margin and margin <= y < WINDOW_HEIGHT - margin):
+        glut.glutWarpPointer(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
+        mouse_last_x = WINDOW_WIDTH // 2
+        mouse_last_y = WINDOW_HEIGHT // 2
 
 def special_keys(key, x, y):
-    if game_over:
+    # F5 quick-saves and F9 quick-loads, also after game over
+    if key == KEY_F5:
+        send_input(EVENT_QUICK_SAVE)
+        wake_loop()
+        return
+    if key == KEY_F9:
+        send_input(EVENT_QUICK_LOAD)
+        wake_loop()
         return
-    if key == glut.GLUT_KEY_LEFT:
-        celestial_manager.sun_position = (celestial_manager.sun_position - 2) % 360
-    elif key == glut.GLUT_KEY_RIGHT:
-        celestial_manager.sun_position = (celestial_manager.sun_position + 2) % 360
+    if world.game_over:
+        return
+    send_input(EVENT_SPECIAL, key)
+    wake_loop()
 
-def init():
+def init_gl(seed=None):
+    global grass_field
+    import_gl()
     gl.glEnable(gl.GL_DEPTH_TEST)
     gl.glClearColor(0.5, 0.7, 1.0, 1.0)
-    grass_field.initialize_blades(4000)
+    grass_field, celestial_manager.stars = build_world_content(seed, GRASS_COUNT)
+    if render_queue.batch is not None:
+        render_queue.batch.release()
+    render_queue.batch = new_batch()
     gl.glPointSize(2.0)
-    glut.glutSetCursor(glut.GLUT_CURSOR_NONE)
-
-# --- Collision helpers ---
-def clamp(val, minv, maxv):
-    return max(minv, min(maxv, val))
+    resources.build_primitives()
+    celestial_manager.upload()
 
-def player_collides_tree(px, pz):
-    for t in [main_tree]+other_trees:
-        tree_x, tree_z = t.x, t.z
-        trunk_r = 12 * t.size
-        if abs(px - tree_x) < trunk_r + 4 and abs(pz - tree_z) < trunk_r + 4:
-            return True
-    return False
-
-def player_collides_pond(px, pz):
-    pond_x, pond_z, pond_r = -200, 0, 60
-    dist = ((px - pond_x)**2 + (pz - pond_z)**2)**0.5
-    return dist < pond_r + 6
-
-def draw_water_pot_ui():
-    if not watering_pot_visible:
-        return
-    gl.glMatrixMode(gl.GL_PROJECTION)
-    gl.glPushMatrix()
-    gl.glLoadIdentity()
-    gl.glOrtho(0, WINDOW_WIDTH, 0, WINDOW_HEIGHT, -1, 1)
-    gl.glMatrixMode(gl.GL_MODELVIEW)
-    gl.glPushMatrix()
-    gl.glLoadIdentity()
-    cx, cy, r = WINDOW_WIDTH - 60, 80, 30
-    # Draw pot body (cylinder)
-    gl.glColor3f(0.75, 0.75, 0.75)
-    gl.glBegin(gl.GL_POLYGON)
-    for i in range(32):
-        angle = 2 * math.pi * i / 32
-        gl.glVertex2f(cx + r * math.cos(angle), cy + r * 0.7 * math.sin(angle))
-    gl.glEnd()
-    # Draw pot base
-    gl.glColor3f(0.6, 0.6, 0.6)
-    gl.glBegin(gl.GL_POLYGON)
-    for i in range(32):
-        angle = 2 * math.pi * i / 32
-        gl.glVertex2f(cx + r * 0.9 * math.cos(angle), cy - 18 + 6 * math.sin(angle))
-    gl.glEnd()
-    # Draw handle
-    gl.glColor3f(0.7, 0.7, 0.7)
-    gl.glBegin(gl.GL_LINE_STRIP)
-    for i in range(17):
-        angle = math.pi * i / 16
-        gl.glVertex2f(cx + (r+12) * math.cos(angle), cy + (r+12) * math.sin(angle))
-    gl.glEnd()
-    # Draw spout
-    gl.glColor3f(0.7, 0.7, 0.7)
-    gl.glBegin(gl.GL_POLYGON)
-    for i in range(6):
-        angle = math.pi/4 + math.pi/8 * i
-        gl.glVertex2f(cx + r * 0.9 * math.cos(angle) + 18, cy + r * 0.2 * math.sin(angle) - 5)
-    gl.glEnd()
-    # Draw blue fill bar inside pot
-    fill_ratio = watering_pot_fullness / 100.0
-    if fill_ratio > 0:
-        gl.glColor3f(0.2, 0.5, 1.0)
-        gl.glBegin(gl.GL_POLYGON)
-        for i in range(32):
-            angle = 2 * math.pi * i / 32
-            gl.glVertex2f(cx + (r-6) * math.cos(angle), cy + (r-10) * fill_ratio * math.sin(angle) - (1-fill_ratio)*18)
-        gl.glEnd()
-    # Draw border
-    gl.glColor3f(0.3, 0.3, 0.3)
-    gl.glLineWidth(2)
-    gl.glBegin(gl.GL_LINE_LOOP)
-    for i in range(32):
-        angle = 2 * math.pi * i / 32
-        gl.glVertex2f(cx + r * math.cos(angle), cy + r * 0.7 * math.sin(angle))
-    gl.glEnd()
-    # Draw text below
-    gl.glColor3f(1, 1, 1)
-    gl.glRasterPos2f(cx - 18, cy - 45)
-    status = b"full" if watering_pot_fullness > 0 else b"empty"
-    for c in status:
-        glut.glutBitmapCharacter(glut.GLUT_BITMAP_HELVETICA_18, c)
-    gl.glPopMatrix()
-    gl.glMatrixMode(gl.GL_PROJECTION)
-    gl.glPopMatrix()
-    gl.glMatrixMode(gl.GL_MODELVIEW)
+def release_gl():
+    # Everything the resource manager owns, freed while the context is still current
+    if render_queue.batch is not None:
+        render_queue.batch.release()
+        render_queue.batch = None
+    canopy_cache.clear()
+    resources.release_all()
 
-def draw_minecraft_tree(x, y, z, size=1.0, has_leaves=True, leaves_regrow_progress=1.0):
-    global current_season
-    # Draw cylindrical trunk
-    gl.glColor3f(0.55, 0.27, 0.07)
-    gl.glPushMatrix()
-    gl.glTranslatef(x, y, z)
-    gl.glScalef(size, size, size)
-    gl.glRotatef(-90, 1, 0, 0)
-    quad = glu.gluNewQuadric()
-    trunk_height = 6 * 32
-    trunk_radius = 16
-    glu.gluCylinder(quad, trunk_radius, trunk_radius * 0.8, trunk_height, 16, 1)
-    gl.glPopMatrix()
-    block_size = 32 * size
-    if has_leaves or leaves_regrow_progress > 0.0:
-        progress = leaves_regrow_progress if not has_leaves else 1.0
-        if current_season == 3:
-            gl.glColor3f(1.0, 1.0, 1.0)
-        else:
-            gl.glColor3f(0.0, 0.4, 0.0)  # Dark green
-        ly = y + 6 * block_size
-        for dx in range(-5, 6):
-            for dz in range(-5, 6):
-                if progress >= 0.2:
-                    gl.glPushMatrix()
-                    gl.glTranslatef(x + dx * block_size, ly, z + dz * block_size)
-                    glut.glutSolidCube(block_size)
-                    gl.glPopMatrix()
-        ly = y + 7 * block_size
-        if progress >= 0.4:
-            for dx in range(-4, 5):
-                for dz in range(-4, 5):
-                    gl.glPushMatrix()
-                    gl.glTranslatef(x + dx * block_size, ly, z + dz * block_size)
-                    glut.glutSolidCube(block_size)
-                    gl.glPopMatrix()
-        ly = y + 8 * block_size
-        if progress >= 0.6:
-            for dx in range(-3, 4):
-                for dz in range(-3, 4):
-                    gl.glPushMatrix()
-                    gl.glTranslatef(x + dx * block_size, ly, z + dz * block_size)
-                    glut.glutSolidCube(block_size)
-                    gl.glPopMatrix()
-        ly = y + 9 * block_size
-        if progress >= 0.8:
-            for dx in range(-2, 3):
-                for dz in range(-2, 3):
-                    gl.glPushMatrix()
-                    gl.glTranslatef(x + dx * block_size, ly, z + dz * block_size)
-                    glut.glutSolidCube(block_size)
-                    gl.glPopMatrix()
-        ly = y + 10 * block_size
-        if progress >= 0.95:
-            for dx in range(-1, 2):
-                for dz in range(-1, 2):
-                    gl.glPushMatrix()
-                    gl.glTranslatef(x + dx * block_size, ly, z + dz * block_size)
-                    glut.glutSolidCube(block_size)
-                    gl.glPopMatrix()
-        ly = y + 11 * block_size
-        if progress >= 1.0:
-            gl.glPushMatrix()
-            gl.glTranslatef(x, ly, z)
-            glut.glutSolidCube(block_size)
-            gl.glPopMatrix()
-
-def start_random_tree_falling():
-    global falling_chain_active, falling_chain_next_time, falling_chain_last_tree, falling_chain_paused
-    candidates = [t for t in [main_tree]+other_trees if t.has_leaves and not t.leaves_falling]
-    if candidates:
-        tree = random.choice(candidates)
-        tree.leaves_falling = True
-        falling_chain_active = True
-        falling_chain_last_tree = tree
-        falling_chain_next_time = None
-        falling_chain_paused = False
-
-def continue_falling_chain():
-    global falling_chain_active, falling_chain_next_time, falling_chain_last_tree, falling_chain_paused
-    # If no chain active, do nothing
-    if not falling_chain_active or falling_chain_paused:
-        return
-    # If last tree finished losing leaves, start timer
-    if falling_chain_last_tree and not falling_chain_last_tree.has_leaves and not falling_chain_last_tree.leaves_falling:
-        if falling_chain_next_time is None:
-            falling_chain_next_time = time.time() + FALLING_CHAIN_DELAY
-        elif time.time() >= falling_chain_next_time:
-            # Start next random tree
-            candidates = [t for t in [main_tree]+other_trees if t.has_leaves and not t.leaves_falling]
-            if candidates:
-                tree = random.choice(candidates)
-                tree.leaves_falling = True
-                falling_chain_last_tree = tree
-                falling_chain_next_time = None
-            else:
-                falling_chain_active = False
-                falling_chain_last_tree = None
-                falling_chain_next_time = None
+def init():
+    init_gl(world.seed)
+    build_glyph_atlases()
+    gl.glClearColor(0.5, 0.7, 1.0, 1.0)
+    glut.glutSetCursor(glut.GLUT_CURSOR_NONE)
+    glut.glutIgnoreKeyRepeat(1)
 
 def main():
+    global world
+    import_gl()
+    mark_startup("gl_import")
+    if world is None:
+        world = GameWorld()
     glut.glutInit()
     glut.glutInitDisplayMode(glut.GLUT_DOUBLE | glut.GLUT_RGB | glut.GLUT_DEPTH)
     glut.glutInitWindowSize(WINDOW_WIDTH, WINDOW_HEIGHT)
     glut.glutCreateWindow(b"3D Seasonal Tree Environment")
     glut.glutDisplayFunc(display)
-    glut.glutIdleFunc(idle)
     glut.glutReshapeFunc(reshape)
     glut.glutKeyboardFunc(keyboard)
     glut.glutKeyboardUpFunc(keyboard_up)
     glut.glutSpecialFunc(special_keys)
     glut.glutPassiveMotionFunc(mouse_motion)
     init()
+    mark_startup("world_ready")
+    if SIM_THREAD:
+        start_sim_thread()
+    wake_loop()
     glut.glutMainLoop()
+    return exit_status
+
+def start_sim_thread():
+    global sim_thread, snapshots
+    # Hand the GIL over often, so neither thread stalls the other for a whole frame
+    sys.setswitchinterval(GIL_SWITCH_INTERVAL)
+    snapshots = SnapshotBuffers()
+    sim_thread = SimulationThread(snapshots)
+    sim_thread.start()
+    return sim_thread
+
+# --- Headless mode: run the simulation without a window or GL context ---
+def run_headless(ticks=10000, dt=SIM_DT, seed=None, profile=False):
+    sim = GameWorld(seed)
+    mark_startup("world_ready")
+    sim.key_down(b'f')  # start the falling chain so trees actually change state
+    if profile and not profiler.enabled:
+        profiler.toggle()
+    start = time.perf_counter()
+    for _ in range(ticks):
+        sim.step(dt)
+        profiler.end_frame()
+    elapsed = time.perf_counter() - start
+    print(f"{ticks} ticks ({sim.time:.1f}s simulated) in {elapsed:.3f}s: {ticks / max(elapsed, 1e-9):.0f} ticks/s")
+    print(f"Game State: {sim.game_state}, Trees Saved: {sim.trees_saved}, Dead: {sim.dead_count()}")
+    if profile:
+        for name, stats in sorted(profiler.percentiles().items()):
+            print(f"{name:<14} p50 {stats['p50']:.4f}  p95 {stats['p95']:.4f}  p99 {stats['p99']:.4f} ms")
+        print(f"Profile written to {profiler.export(PROFILE_OUT)}")
+    return sim
+
+# --- Input recording: seed plus tick-stamped input events, replayed headless at full speed ---
+RECORD_MAGIC = b"TREEREC1"
+RECORD_HEADER = struct.Struct("<q")  # world seed
+RECORD_EVENT = struct.Struct("<IBHff")  # tick, kind, key code, look dx, look dy
+RECORD_FOOTER = struct.Struct("<HHB")  # trees saved, dead count, game state length
+EVENT_KEY_DOWN = 0
+EVENT_KEY_UP = 1
+EVENT_SPECIAL = 2
+EVENT_LOOK = 3
+EVENT_QUICK_SAVE = 4
+EVENT_QUICK_LOAD = 5
+EVENT_END = 255
+
+class InputRecorder:
+    def __init__(self, path, seed):
+        self.path = path
+        self.ticks = 0  # simulation steps since recording started
+        self.events = 0
+        self.saved = False  # quick-saved since recording started, so a quick load can be replayed
+        self.file = open(path, "wb")
+        self.file.write(RECORD_MAGIC + RECORD_HEADER.pack(seed))
+
+    def tick(self):
+        self.ticks += 1
+
+    def record(self, kind, code=0, dx=0.0, dy=0.0):
+        # Events land before the step numbered self.ticks, which is where replay applies them
+        self.file.write(RECORD_EVENT.pack(self.ticks, kind, code, dx, dy))
+        self.events += 1
+
+    def close(self, world):
+        if self.file.closed:
+            return
+        state = world.game_state.encode()
+        self.file.write(RECORD_EVENT.pack(self.ticks, EVENT_END, 0, 0.0, 0.0))
+        self.file.write(RECORD_FOOTER.pack(world.trees_saved, world.dead_count(), len(state)) + state)
+        self.file.close()
+        print(f"Recorded {self.events} events over {self.ticks} ticks to {self.path}")
+
+recorder = None
+
+def start_recording(path, seed=None):
+    global recorder, world
+    if seed is None:
+        seed = random.randrange(2**63)
+    world = GameWorld(seed)
+    recorder = InputRecorder(path, seed)
+    return recorder
+
+def read_recording(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(RECORD_MAGIC):
+        raise ValueError(f"{path} is not an input recording")
+    offset = len(RECORD_MAGIC)
+    (seed,) = RECORD_HEADER.unpack_from(data, offset)
+    offset += RECORD_HEADER.size
+    events = []
+    end_tick, expected = None, None
+    while offset + RECORD_EVENT.size <= len(data):
+        tick, kind, code, dx, dy = RECORD_EVENT.unpack_from(data, offset)
+        offset += RECORD_EVENT.size
+        if kind == EVENT_END:
+            end_tick = tick
+            saved, dead, length = RECORD_FOOTER.unpack_from(data, offset)
+            offset += RECORD_FOOTER.size
+            state = data[offset:offset + length].decode()
+            expected = {"trees_saved": saved, "dead": dead, "game_state": state}
+            break
+        events.append((tick, kind, code, dx, dy))
+    if end_tick is None:
+        # Window closed without ESC: no footer, replay up to the last event
+        end_tick = events[-1][0] if events else 0
+    return seed, events, end_tick, expected
+
+def apply_input(sim, kind, code, dx, dy):
+    if kind == EVENT_KEY_DOWN:
+        sim.key_down(bytes((code,)))
+    elif kind == EVENT_KEY_UP:
+        sim.key_up(bytes((code,)))
+    elif kind == EVENT_LOOK:
+        sim.look(dx, dy, mouse_sensitivity)
+    elif kind == EVENT_SPECIAL:
+        sim.turn_sun(code)
+
+def replay_recording(path):
+    seed, events, end_tick, expected = read_recording(path)
+    sim = GameWorld(seed)
+    saved = None  # the last quick save, kept in memory instead of on disk
+    next_event = 0
+    start = time.perf_counter()
+    for tick in range(end_tick + 1):
+        while next_event < len(events) and events[next_event][0] == tick:
+            kind, code, dx, dy = events[next_event][1:]
+            if kind == EVENT_QUICK_SAVE:
+                saved = {name: np.array(array) for name, array in capture_snapshot(sim).items()}
+                sim.status_message = "Game saved"
+            elif kind == EVENT_QUICK_LOAD:
+                if saved is None:
+                    raise ValueError(f"{path} loads a quick save before making one")
+                sim = restore_snapshot(saved)
+                sim.status_message = "Game loaded"
+            else:
+                apply_input(sim, kind, code, dx, dy)
+            next_event += 1
+        if tick < end_tick:
+            sim.step(SIM_DT)
+    elapsed = time.perf_counter() - start
+    result = {"trees_saved": sim.trees_saved, "dead": sim.dead_count(), "game_state": sim.game_state}
+    print(f"Replayed {len(events)} events over {end_tick} ticks in {elapsed:.3f}s: {end_tick / max(elapsed, 1e-9):.0f} ticks/s")
+    print(f"Game State: {sim.game_state}, Trees Saved: {sim.trees_saved}, Dead: {sim.dead_count()}")
+    matches = expected is None or result == expected
+    if expected is None:
+        print("Recording has no final state to check against")
+    elif not matches:
+        print(f"MISMATCH: recorded {expected}")
+    return sim, matches
+
+# --- World snapshots: versioned sectioned binary, mmap-able, written by a background thread ---
+SNAPSHOT_MAGIC = b"TREESNAP"
+SNAPSHOT_VERSION = 4
+# Versions load_snapshot still reads. Sections added since version 1 are only restored
+# when present. 1: first layout; 2: wind sections; 3: NPC crowd sections;
+# 4: sun_position moves from the meta section into the world row
+SNAPSHOT_READABLE = (1, 2, 3, 4)
+SNAPSHOT_HEADER = struct.Struct("<8sII")  # magic, version, section count
+SNAPSHOT_SECTION = struct.Struct("<16s8sIIQQ")  # name, dtype, rows, columns, offset, bytes
+SNAPSHOT_ALIGN = 16  # section data starts 16-byte aligned so mmap views need no copy
+AUTOSAVE_PATH = "autosave.snap"
+QUICKSAVE_PATH = "quicksave.snap"
+AUTOSAVE_INTERVAL = 30.0  # seconds of simulated time between autosaves
+
+# Scalar world state, stored as one float64 row; None is stored as NaN
+WORLD_FIELDS = (
+    "time", "tick_count", "current_season", "player_facing", "prev_player_facing", "player_speed",
+    "player_speed_boosted", "walk_anim_phase", "move_player_forward", "move_player_backward",
+    "move_player_left", "move_player_right", "cam_yaw", "cam_pitch", "is_first_person",
+    "watering_pot_visible", "watering_pot_fullness", "watering_pot_pouring", "pour_start_time",
+    "total_pour_time", "falling_chain_active", "falling_chain_next_time", "falling_chain_paused",
+    "game_over", "victory", "trees_saved", "status_message_timer", "sun_position",
+)
+WORLD_INT_FIELDS = {"tick_count", "current_season", "trees_saved"}
+WORLD_BOOL_FIELDS = {"player_speed_boosted", "move_player_forward", "move_player_backward", "move_player_left",
+                     "move_player_right", "is_first_person", "watering_pot_visible", "watering_pot_pouring",
+                     "falling_chain_active", "falling_chain_paused", "game_over", "victory"}
+TREE_FIELDS = ("x", "z", "size", "has_leaves", "leaves_regrow_progress", "regrow_start_time",
+               "leaves_falling", "leaves_falling_start_time", "pouring", "pour_start_time")
+TREE_TIMERS = ("fall", "pour", "pour_cap", "regrow")
+POOL_NAMES = ("rain", "snow", "leaves")
+
+def nan_if_none(value):
+    return math.nan if value is None else float(value)
+
+def none_if_nan(value):
+    return None if math.isnan(value) else value
+
+def event_due(event):
+    return event[0] if event is not None and event[4] else math.nan
+
+def capture_snapshot(world):
+    # Game-thread part: copy state into arrays; packing and disk I/O happen elsewhere
+    sections = {}
+    sections["world"] = np.array([[nan_if_none(getattr(world, name)) for name in WORLD_FIELDS]])
+    sections["player"] = np.array([world.player_pos, world.prev_player_pos], dtype=np.float64)
+    trees = np.empty((len(world.trees), len(TREE_FIELDS) + len(TREE_TIMERS)))
+    for i, t in enumerate(world.trees):
+        trees[i, :len(TREE_FIELDS)] = [nan_if_none(getattr(t, name)) for name in TREE_FIELDS]
+        trees[i, len(TREE_FIELDS):] = [event_due(t.timers.get(kind)) for kind in TREE_TIMERS]
+    sections["trees"] = trees
+    for pool_name in POOL_NAMES:
+        pool = getattr(world, pool_name)
+        for field, array in pool.snapshot().items():
+            sections[f"{pool_name}.{field}"] = array
+    sections["wind"] = world.wind.waves
+    for field, array in world.npcs.snapshot().items():
+        sections[f"npcs.{field}"] = array
+    rng_version, rng_state, gauss_next = world.rng.getstate()
+    sections["rng"] = np.array(rng_state, dtype=np.uint32)
+    meta = {
+        "seed": world.seed,
+        "game_state": world.game_state,
+        "status_message": world.status_message,
+        "rng_version": rng_version,
+        "gauss_next": gauss_next,
+        "particle_rng": world.rain.rng.bit_generator.state,
+        "rain_target": world.rain.target,
+        "snow_target": world.snow.target,
+        "chain_last_tree": world.falling_chain_last_tree.slot if world.falling_chain_last_tree else -1,
+        "chain_due": event_due(world.falling_chain_event),
+        "pour_target": world.pour_target.slot if world.pour_target else -1,
+        "wind_heading": world.wind.heading,
+        "npc_rng": world.npcs.rng.bit_generator.state,
+    }
+    sections["meta"] = np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8)
+    return sections
+
+def pack_snapshot(sections):
+    header_size = SNAPSHOT_HEADER.size + SNAPSHOT_SECTION.size * len(sections)
+    offset = -(-header_size // SNAPSHOT_ALIGN) * SNAPSHOT_ALIGN
+    table, chunks = [], []
+    for name, array in sections.items():
+        array = np.ascontiguousarray(array)
+        rows = array.shape[0] if array.ndim else 1
+        columns = int(np.prod(array.shape[1:])) if array.ndim > 1 else 0
+        table.append(SNAPSHOT_SECTION.pack(name.encode(), array.dtype.str.encode(), rows, columns, offset, array.nbytes))
+        padding = -array.nbytes % SNAPSHOT_ALIGN
+        chunks.append(array.tobytes() + b"\0" * padding)
+        offset += array.nbytes + padding
+    header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(sections)) + b"".join(table)
+    return header + b"\0" * (-len(header) % SNAPSHOT_ALIGN) + b"".join(chunks)
+
+def write_snapshot(path, data):
+    # Write then rename, so a crash mid-write never leaves a torn save behind
+    temp = path + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(data)
+    os.replace(temp, path)
+
+def read_snapshot(path):
+    # Sections come back as read-only views into the mapped file
+    # A damaged or foreign file raises ValueError, never struct.error or an out-of-range read
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(data) < SNAPSHOT_HEADER.size:
+        raise ValueError(f"{path} is not a world snapshot")
+    magic, version, count = SNAPSHOT_HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f"{path} is not a world snapshot")
+    if version not in SNAPSHOT_READABLE:
+        raise ValueError(f"{path} is snapshot version {version}, expected one of {SNAPSHOT_READABLE}")
+    if SNAPSHOT_HEADER.size + count * SNAPSHOT_SECTION.size > len(data):
+        raise ValueError(f"{path} is truncated")
+    sections = {}
+    for i in range(count):
+        name, dtype, rows, columns, offset, nbytes = SNAPSHOT_SECTION.unpack_from(data, SNAPSHOT_HEADER.size + i * SNAPSHOT_SECTION.size)
+        try:
+            dtype = np.dtype(dtype.rstrip(b"\0").decode())
+        except TypeError:
+            raise ValueError(f"{path} has an unknown section type {dtype!r}") from None
+        if offset + nbytes > len(data):
+            raise ValueError(f"{path} is truncated")
+        if nbytes % dtype.itemsize or (columns and rows * columns * dtype.itemsize != nbytes):
+            raise ValueError(f"{path} has a damaged section table")
+        array = np.frombuffer(data, dtype=dtype, count=nbytes // dtype.itemsize, offset=offset)
+        if columns:
+            array = array.reshape(rows, columns)
+        sections[name.rstrip(b"\0").decode()] = array
+    return sections
+
+def restore_snapshot(sections):
+    meta = json.loads(bytes(sections["meta"]).decode())
+    sim = GameWorld(meta["seed"])
+    for name, value in zip(WORLD_FIELDS, sections["world"][0].tolist()):
+        value = none_if_nan(value)
+        if value is not None and name in WORLD_INT_FIELDS:
+            value = int(value)
+        elif value is not None and name in WORLD_BOOL_FIELDS:
+            value = bool(value)
+        setattr(sim, name, value)
+    sim.player_pos = sections["player"][0].tolist()
+    sim.prev_player_pos = sections["player"][1].tolist()
+    sim.game_state = meta["game_state"]
+    sim.status_message = meta["status_message"]
+    sim.rng.setstate((meta["rng_version"], tuple(int(v) for v in sections["rng"]), meta["gauss_next"]))
+    sim.rain.rng.bit_generator.state = meta["particle_rng"]
+    sim.rain.target = meta["rain_target"]
+    sim.snow.target = meta["snow_target"]
+    # Trees, with their pending timers put back on the scheduler
+    sim.trees = []
+    sim.index = SpatialGrid()
+    sim.index.insert("pond", POND_X, POND_Z, POND_RADIUS, kind="pond")
+    actions = {"fall": sim.finish_tree_falling, "pour": sim.finish_tree_pour,
+               "pour_cap": sim.stop_tree_pouring, "regrow": sim.finish_tree_regrow}
+    for row in sections["trees"].tolist():
+        values = dict(zip(TREE_FIELDS, row))
+        t = sim.add_tree(Tree(values["x"], values["z"], values["size"]))
+        t.has_leaves = bool(values["has_leaves"])
+        t.leaves_regrow_progress = values["leaves_regrow_progress"]
+        t.regrow_start_time = none_if_nan(values["regrow_start_time"])
+        t.leaves_falling = bool(values["leaves_falling"])
+        t.leaves_falling_start_time = none_if_nan(values["leaves_falling_start_time"])
+        t.pouring = bool(values["pouring"])
+        t.pour_start_time = none_if_nan(values["pour_start_time"])
+        for kind, due in zip(TREE_TIMERS, row[len(TREE_FIELDS):]):
+            if not math.isnan(due):
+                t.timers[kind] = sim.events.schedule(due, actions[kind], t)
+        if t.leaves_falling:
+            sim.falling_trees[t] = None
+        if t.regrow_start_time is not None:
+            sim.regrowing_trees[t] = None
+        if t.is_dead():
+            sim.dead_trees[t] = None
+    sim.falling_chain_last_tree = sim.trees[meta["chain_last_tree"]] if meta["chain_last_tree"] >= 0 else None
+    if not math.isnan(meta["chain_due"]):
+        sim.falling_chain_event = sim.events.schedule(meta["chain_due"], sim.advance_falling_chain)
+    sim.pour_target = sim.trees[meta["pour_target"]] if meta["pour_target"] >= 0 else None
+    for pool_name in POOL_NAMES:
+        pool = getattr(sim, pool_name)
+        pool.restore({field: sections[f"{pool_name}.{field}"] for field in pool.snapshot_fields})
+    if "sun_position" in meta:
+        sim.sun_position = meta["sun_position"]  # version 3 and older
+    if "wind" in sections:
+        sim.wind.time = sim.time
+        sim.wind.set_params(meta["wind_heading"], sections["wind"])
+    sim.npcs.set_trees(sim.trees)
+    if "npcs.pos" in sections:
+        sim.npcs.restore({field: sections[f"npcs.{field}"] for field in sim.npcs.snapshot_fields})
+        sim.npcs.rng.bit_generator.state = meta["npc_rng"]
+    return sim
+
+def save_snapshot(world, path):
+    write_snapshot(path, pack_snapshot(capture_snapshot(world)))
+
+def load_snapshot(path):
+    # Reads every version in SNAPSHOT_READABLE; older files just lack the newer sections
+    sections = read_snapshot(path)
+    try:
+        return restore_snapshot(sections)
+    except (KeyError, IndexError, TypeError) as e:
+        raise ValueError(f"{path} is missing or has damaged snapshot data: {e!r}") from e
+
+class Autosaver:
+    def __init__(self, path=AUTOSAVE_PATH, interval=AUTOSAVE_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.last_save_time = 0.0
+        self.capture_ms = 0.0
+        self.saves = 0
+        self.pending = queue.Queue(maxsize=1)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def maybe_save(self, world):
+        if world.time < self.last_save_time:
+            self.last_save_time = world.time  # world was reset
+        if world.time - self.last_save_time >= self.interval and not world.game_over:
+            self.save(world)
+
+    def save(self, world, path=None, wait=False):
+        start = time.perf_counter()
+        sections = capture_snapshot(world)
+        self.capture_ms = (time.perf_counter() - start) * 1000.0
+        self.last_save_time = world.time
+        try:
+            self.pending.put((path or self.path, sections), block=wait)
+        except queue.Full:
+            pass  # the previous autosave is still being written; this one is skipped
+
+    def run(self):
+        while True:
+            path, sections = self.pending.get()
+            try:
+                write_snapshot(path, pack_snapshot(sections))
+                self.saves += 1
+            except OSError as e:
+                print(f"Autosave to {path} failed: {e}")
+            self.pending.task_done()
+
+    def flush(self):
+        self.pending.join()
+
+autosaver = None
+
+def quick_save():
+    # Written on the autosave thread when there is one (quick_load flushes it), else right here
+    if autosaver:
+        autosaver.save(world, QUICKSAVE_PATH, wait=True)
+    else:
+        try:
+            save_snapshot(world, QUICKSAVE_PATH)
+        except OSError as e:
+            world.status_message = "Save failed"
+            print(f"Quick-save to {QUICKSAVE_PATH} failed: {e}")
+            return
+    world.status_message = "Game saved"
+
+def quick_load(path=QUICKSAVE_PATH):
+    global world
+    if autosaver:
+        autosaver.flush()
+    try:
+        world = load_snapshot(path)
+    except (OSError, ValueError) as e:
+        world.status_message = "No save to load" if isinstance(e, FileNotFoundError) else "Save is damaged"
+        print(f"Quick-load from {path} failed: {e}")
+        return
+    if autosaver:
+        autosaver.last_save_time = world.time
+    world.status_message = "Game loaded"
+
+# --- Balance simulator: many scripted headless games per parameter set, over a process pool ---
+BALANCE_PARAMS = ("FALLING_CHAIN_DELAY", "MAX_DEAD_TREES", "WATER_BUDGET", "POUR_REGROW_AMOUNT")
+BALANCE_MAX_TIME = 600.0  # simulated seconds before a game counts as a timeout
+BALANCE_OUT = "balance.json"
+
+class WateringPolicy:
+    # Plays like a person at the keyboard: walk to the pond, refill, water the nearest dying tree
+    name = "nearest_dying"
+
+    def __init__(self):
+        self.last_pos = None
+        self.sidestep = 0  # ticks left of strafing around an obstacle
+
+    def act(self, world):
+        if not world.watering_pot_visible:
+            world.key_down(b'g')
+        if world.watering_pot_fullness <= 0:
+            if self.walk_to(world, POND_X, POND_Z, POND_RADIUS + 25):
+                world.key_down(b'h')
+            return
+        target = world.pour_target
+        if target is not None and (target.has_leaves or target.regrow_start_time is not None) and not target.leaves_falling:
+            world.key_down(b'k')  # tree is saved or was never dying; keep the water
+            target = None
+        if target is None:
+            target = self.pick_target(world)
+        if target is None:
+            self.stop(world)
+            return
+        if self.walk_to(world, target.x, target.z, 32 * target.size + 30) and not world.watering_pot_pouring:
+            world.key_down(b'j')
+
+    def pick_target(self, world):
+        # Bare trees first, then trees still dropping leaves (water poured early counts at the moment they go bare)
+        px, pz = world.player_pos[0], world.player_pos[2]
+        for trees in (world.dead_trees, world.falling_trees):
+            if trees:
+                return min(trees, key=lambda t: (t.x - px)**2 + (t.z - pz)**2)
+        return None
+
+    def stop(self, world):
+        world.key_up(b'w')
+        world.key_up(b'd')
+
+    def walk_to(self, world, x, z, reach):
+        px, pz = world.player_pos[0], world.player_pos[2]
+        dx, dz = x - px, z - pz
+        if math.hypot(dx, dz) <= reach:
+            self.stop(world)
+            self.last_pos = None
+            return True
+        world.cam_yaw = math.degrees(math.atan2(dx, -dz))
+        world.key_down(b'w')
+        if self.last_pos is not None and math.hypot(px - self.last_pos[0], pz - self.last_pos[1]) < 1e-3:
+            self.sidestep = 20  # blocked by a trunk or the pond: strafe for a moment
+        self.last_pos = (px, pz)
+        if self.sidestep > 0:
+            self.sidestep -= 1
+            world.key_down(b'd')
+        else:
+            world.key_up(b'd')
+        return False
+
+BALANCE_POLICIES = {WateringPolicy.name: WateringPolicy}
+
+def play_balance_game(task):
+    # Runs inside a worker process; tuning values are module globals, so set them per game
+    params, seed, policy_name, max_time = task
+    globals().update(params, NPC_COUNT=0)  # gardeners are scenery, scripted games skip them
+    sim = GameWorld(seed)
+    policy = BALANCE_POLICIES[policy_name]()
+    sim.key_down(b'f')
+    while not sim.game_over and sim.time < max_time:
+        policy.act(sim)
+        sim.step(SIM_DT)
+    return {"victory": sim.victory, "time": sim.time, "dead": sim.dead_count(),
+            "saved": sim.trees_saved, "timeout": not sim.game_over}
+
+def summarize_balance(params, games):
+    victories = [g["time"] for g in games if g["victory"]]
+    dead = np.bincount([g["dead"] for g in games]).tolist()
+    return {
+        "params": params,
+        "games": len(games),
+        "victory_rate": len(victories) / len(games),
+        "timeout_rate": sum(g["timeout"] for g in games) / len(games),
+        "victory_time_mean": float(np.mean(victories)) if victories else None,
+        "victory_time_median": float(np.median(victories)) if victories else None,
+        "trees_saved_mean": float(np.mean([g["saved"] for g in games])),
+        "dead_trees": dead,  # dead_trees[n] = games that ended with n dead trees
+    }
+
+def parse_balance_params(specs):
+    # "NAME=v1,v2" for each tuned value; every combination becomes one parameter set
+    grid = {}
+    for spec in specs or []:
+        name, _, values = spec.partition("=")
+        if name not in BALANCE_PARAMS:
+            raise ValueError(f"unknown balance parameter {name}, expected one of {', '.join(BALANCE_PARAMS)}")
+        kind = int if name == "MAX_DEAD_TREES" else float
+        grid[name] = [kind(v) for v in values.split(",")]
+    defaults = {name: [globals()[name]] for name in BALANCE_PARAMS}
+    defaults.update(grid)
+    return [dict(zip(defaults, combo)) for combo in itertools.product(*defaults.values())]
+
+def run_balance(param_sets, games=1000, policy=WateringPolicy.name, workers=None, seed=0,
+                max_time=BALANCE_MAX_TIME, out=BALANCE_OUT):
+    tasks = [(params, seed + i, policy, max_time) for params in param_sets for i in range(games)]
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Large chunks keep pickling overhead low so throughput scales with cores
+        outcomes = list(pool.map(play_balance_game, tasks, chunksize=max(1, len(tasks) // (workers * 8))))
+    elapsed = time.perf_counter() - start
+    summaries = [summarize_balance(params, outcomes[i * games:(i + 1) * games]) for i, params in enumerate(param_sets)]
+    for summary in summaries:
+        params = " ".join(f"{k}={v}" for k, v in summary["params"].items())
+        time_text = f"{summary['victory_time_mean']:.0f}s" if summary["victory_time_mean"] is not None else "-"
+        print(f"{params}: win {summary['victory_rate']:.1%} in {time_text}, dead trees {summary['dead_trees']}")
+    print(f"{len(tasks)} games on {workers} workers in {elapsed:.1f}s ({len(tasks) / max(elapsed, 1e-9):.1f} games/s)")
+    with open(out, "w") as f:
+        json.dump({"policy": policy, "games_per_set": games, "seed": seed, "max_time": max_time,
+                   "results": summaries}, f, indent=1)
+    print(f"Results written to {out}")
+    return summaries
+
+# --- Benchmarks: fixed-seed scenarios, simulation ticks/s and offscreen render fps ---
+BENCH_OUT = "bench.json"
+BENCH_TOLERANCE = 0.15  # slower than baseline by more than this fraction counts as a regression
+
+def bench_summer(world):
+    world.current_season = 1
+
+def bench_crowd(world):
+    world.current_season = 1
+    world.falling_chain_paused = False  # gardeners only walk while the game runs; no chain is started
+
+def bench_rain(world):
+    world.current_season = 2
+    world.rain.target = RAIN_CAPACITY
+
+def bench_snow(world):
+    world.current_season = 3
+    world.snow.target = SNOW_CAPACITY
+
+def bench_all_falling(world):
+    world.current_season = 1
+    for t in world.trees:
+        world.start_tree_falling(t)
+
+def bench_watering(world):
+    world.current_season = 1
+    world.key_down(b'g')  # no falling chain, so the loop never ends in game over
+
+def drive_watering(world):
+    # Shuttle between the pond and the tree closest to it: refill, pour until empty, repeat
+    if world.watering_pot_fullness <= 0:
+        world.player_pos[0], world.player_pos[2] = POND_X + POND_RADIUS + 20, POND_Z
+        world.key_down(b'h')
+    elif not world.watering_pot_pouring:
+        tree = world.index.nearest(POND_X, POND_Z, "tree")
+        world.player_pos[0], world.player_pos[2] = tree.x + 32 * tree.size + 20, tree.z
+        world.key_down(b'j')
+
+BENCH_SCENARIOS = {
+    # name: seed, simulation ticks, rendered frames, grass blades, NPC gardeners, setup, per-tick driver
+    "summer_idle": dict(seed=101, ticks=6000, frames=300, grass=4000, npcs=24, setup=bench_summer, driver=None),
+    "rain_full": dict(seed=102, ticks=6000, frames=300, grass=4000, npcs=24, setup=bench_rain, driver=None),
+    "winter_snow": dict(seed=103, ticks=6000, frames=300, grass=4000, npcs=24, setup=bench_snow, driver=None),
+    "all_trees_falling": dict(seed=104, ticks=540, frames=300, grass=4000, npcs=24, setup=bench_all_falling, driver=None),
+    "watering_loop": dict(seed=105, ticks=6000, frames=300, grass=4000, npcs=24, setup=bench_watering, driver=drive_watering),
+    "dense_grass": dict(seed=106, ticks=3000, frames=120, grass=40000, npcs=24, setup=bench_summer, driver=None),
+    "meadow": dict(seed=107, ticks=600, frames=60, grass=300000, npcs=24, setup=bench_summer, driver=None),
+    "crowd": dict(seed=108, ticks=3000, frames=120, grass=4000, npcs=300, setup=bench_crowd, driver=None),
+}
+
+def bench_world(scenario):
+    sim = GameWorld(scenario["seed"])
+    sim.npcs = Crowd(scenario["npcs"], sim.npcs.rng, sim.trees)
+    scenario["setup"](sim)
+    return sim, GrassField(scenario["grass"], scenario["seed"])
+
+def bench_simulation(scenario, repeats=3):
+    rates = []
+    for _ in range(repeats):
+        sim, grass = bench_world(scenario)
+        driver = scenario["driver"]
+        start = time.perf_counter()
+        for _ in range(scenario["ticks"]):
+            if driver:
+                driver(sim)
+            sim.step(SIM_DT)
+            grass.update(sim.wind)
+        rates.append(scenario["ticks"] / max(time.perf_counter() - start, 1e-9))
+    return float(np.median(rates))
+
+offscreen_context = None
+
+def create_offscreen_context(width=WINDOW_WIDTH, height=WINDOW_HEIGHT):
+    # EGL pbuffer or OSMesa buffer, following PYOPENGL_PLATFORM
+    global offscreen_context
+    # The platform is read when OpenGL first loads, so it is picked here, before import_gl
+    platform = os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+    import_gl()
+    if platform == "egl":
+        from OpenGL import EGL
+        try:
+            display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+            EGL.eglInitialize(display, None, None)
+        except EGL.EGLError:
+            display = EGL.eglGetPlatformDisplay(0x31DD, EGL.EGL_DEFAULT_DISPLAY, None)  # Mesa surfaceless
+            EGL.eglInitialize(display, None, None)
+        attrs = (EGL.EGLint * 11)(EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT, EGL.EGL_RED_SIZE, 8,
+                                  EGL.EGL_GREEN_SIZE, 8, EGL.EGL_BLUE_SIZE, 8, EGL.EGL_DEPTH_SIZE, 24, EGL.EGL_NONE)
+        config, count = EGL.EGLConfig(), EGL.EGLint()
+        EGL.eglChooseConfig(display, attrs, ctypes.pointer(config), 1, ctypes.pointer(count))
+        if count.value == 0:
+            raise RuntimeError("no EGL config with a pbuffer and depth buffer")
+        surface = EGL.eglCreatePbufferSurface(display, config, (EGL.EGLint * 5)(EGL.EGL_WIDTH, width, EGL.EGL_HEIGHT, height, EGL.EGL_NONE))
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+        EGL.eglMakeCurrent(display, surface, surface, context)
+        offscreen_context = (display, surface, context)
+    elif platform == "osmesa":
+        from OpenGL import osmesa, arrays
+        context = osmesa.OSMesaCreateContextExt(osmesa.OSMESA_RGBA, 24, 0, 0, None)
+        buffer = arrays.GLubyteArray.zeros((height, width, 4))
+        osmesa.OSMesaMakeCurrent(context, buffer, gl.GL_UNSIGNED_BYTE, width, height)
+        offscreen_context = (context, buffer)
+    else:
+        raise RuntimeError("offscreen rendering needs PYOPENGL_PLATFORM=egl or osmesa")
+    return gl.glGetString(gl.GL_RENDERER).decode()
+
+def bench_render(scenario):
+    global world, grass_field, render_alpha
+    saved = world, grass_field
+    world, grass_field = bench_world(scenario)
+    render_alpha = 1.0
+    driver = scenario["driver"]
+    try:
+        render_scene()  # warm up caches and display lists
+        gl.glFinish()
+        culling = {}  # category -> [culled, tested], summed over the timed frames
+        elapsed = 0.0  # rendering only; the simulation is timed by bench_simulation
+        canopy_hits, canopy_misses = canopy_cache.hits, canopy_cache.misses
+        hud_rebuilds = hud.rebuilds
+        for _ in range(scenario["frames"]):
+            if driver:
+                driver(world)
+            world.step(SIM_DT)
+            grass_field.update(world.wind)
+            start = time.perf_counter()
+            render_scene()
+            gl.glFinish()
+            elapsed += time.perf_counter() - start
+            for name, counts in cull_stats.items():
+                totals = culling.setdefault(name, [0, 0])
+                totals[0] += counts[0]
+                totals[1] += counts[1]
+        fps = scenario["frames"] / max(elapsed, 1e-9)
+        frames = scenario["frames"]
+        culling = {name: {"culled": culled / frames, "tested": tested / frames} for name, (culled, tested) in culling.items()}
+        caches = {"canopy": {"hits": (canopy_cache.hits - canopy_hits) / frames,
+                             "misses": (canopy_cache.misses - canopy_misses) / frames},
+                  "hud": {"rebuilds": hud.rebuilds - hud_rebuilds}}
+        # Count GL calls on one more frame, outside the timed loop since counting slows every call
+        counting = gl_calls.enabled
+        gl_calls.enable()
+        render_scene()
+        calls = gl_calls.calls
+        gl_calls.enable(counting)
+        return fps, calls, culling, dict(render_queue.frame_stats), caches
+    finally:
+        world, grass_field = saved
+
+def run_benchmark(names=None, render=True, out=BENCH_OUT, baseline=None, tolerance=BENCH_TOLERANCE):
+    names = names or list(BENCH_SCENARIOS)
+    results = {"version": 1, "numpy": np.__version__, "renderer": None, "scenarios": {}}
+    if render:
+        results["renderer"] = create_offscreen_context()
+        results["draw_path"] = RENDERER
+        results["quality"] = governor.settings["name"]
+        init_gl(BENCH_SCENARIOS[names[0]]["seed"])
+        reshape(WINDOW_WIDTH, WINDOW_HEIGHT)
+    for name in names:
+        scenario = BENCH_SCENARIOS[name]
+        entry = {"seed": scenario["seed"], "ticks": scenario["ticks"], "grass": scenario["grass"],
+                 "sim_ticks_per_s": bench_simulation(scenario)}
+        if render:
+            entry["frames"] = scenario["frames"]
+            entry["render_fps"], entry["gl_calls_per_frame"], entry["culling"], entry["render_queue"], entry["caches"] = bench_render(scenario)
+        results["scenarios"][name] = entry
+        fps = ""
+        if render:
+            culled = sum(c["culled"] for c in entry["culling"].values())
+            tested = sum(c["tested"] for c in entry["culling"].values())
+            fps = (f", {entry['render_fps']:.1f} fps, {entry['gl_calls_per_frame']} GL calls/frame, "
+                   f"culled {culled:.0f}/{tested:.0f} per frame")
+        print(f"{name:<18} {entry['sim_ticks_per_s']:10.0f} ticks/s{fps}")
+    if render:
+        results["resources"] = resources.stats()  # GPU memory held at the end of the run
+        release_gl()
+    with open(out, "w") as f:
+        json.dump(results, f, indent=1)
+    print(f"Results written to {out}")
+    regressions = []
+    if baseline:
+        with open(baseline) as f:
+            regressions = compare_benchmarks(results, json.load(f), tolerance)
+    return results, regressions
+
+def compare_benchmarks(results, baseline, tolerance=BENCH_TOLERANCE):
+    regressions = []
+    for name, entry in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        for metric in ("sim_ticks_per_s", "render_fps"):
+            if metric not in entry or metric not in base:
+                continue
+            ratio = entry[metric] / max(base[metric], 1e-9)
+            flag = "REGRESSION" if ratio < 1 - tolerance else ""
+            print(f"{name:<18} {metric:<16} {base[metric]:10.1f} -> {entry[metric]:10.1f} ({ratio:5.2f}x) {flag}")
+            if flag:
+                regressions.append((name, metric, ratio))
+    return regressions
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="3D Seasonal Tree Environment")
+    parser.add_argument("--headless", action="store_true", help="run the simulation without opening a window")
+    parser.add_argument("--ticks", type=int, default=10000, help="simulation ticks to run in headless mode")
+    parser.add_argument("--dt", type=float, default=SIM_DT, help="seconds simulated per headless tick")
+    parser.add_argument("--draw-distance", type=float, default=DRAW_DISTANCE, help="skip anything further than this from the camera")
+    parser.add_argument("--renderer", default=RENDERER, choices=RENDERERS, help="batched vertex buffers, or the old immediate-mode path")
+    parser.add_argument("--count-gl-calls", action="store_true", help="count GL calls per frame (shown in the profiler overlay)")
+    parser.add_argument("--fps", type=int, default=TARGET_FPS, help="frame rate cap for the window (0 = vsync only)")
+    parser.add_argument("--quality", default="auto", choices=["auto"] + QUALITY_NAMES, help="detail level, or auto to hold --target-fps")
+    parser.add_argument("--target-fps", type=int, default=None, help="frame rate the quality governor holds (default: --fps, or 60)")
+    parser.add_argument("--single-thread", action="store_true", help="step the simulation between frames on the GLUT thread instead of its own thread")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for the world")
+    parser.add_argument("--grass", type=int, default=GRASS_COUNT, help="grass blades scattered over the ground")
+    parser.add_argument("--npcs", type=int, default=NPC_COUNT, help="NPC gardeners walking the map")
+    parser.add_argument("--day-length", type=float, default=DAY_LENGTH, help="simulated seconds per day (0 = sun only moves with the arrow keys)")
+    parser.add_argument("--bench", nargs="*", metavar="SCENARIO", help="run benchmark scenarios (all if none named): " + ", ".join(BENCH_SCENARIOS))
+    parser.add_argument("--bench-out", default=BENCH_OUT, help="where benchmark results are written")
+    parser.add_argument("--bench-baseline", default=None, help="earlier results file to compare against")
+    parser.add_argument("--no-render", action="store_true", help="benchmark the simulation only")
+    parser.add_argument("--record", default=None, metavar="PATH", help="record input events to a binary log")
+    parser.add_argument("--replay", default=None, metavar="PATH", help="replay a recorded log headless as fast as possible")
+    parser.add_argument("--load", default=None, metavar="PATH", help="start from a saved world snapshot")
+    parser.add_argument("--autosave", default=AUTOSAVE_PATH, metavar="PATH", help="where autosaves are written")
+    parser.add_argument("--no-autosave", action="store_true", help="turn autosave off")
+    parser.add_argument("--balance", type=int, default=None, metavar="GAMES", help="play GAMES scripted games per parameter set and report balance stats")
+    parser.add_argument("--param", action="append", metavar="NAME=V1,V2", help="tuning values to sweep: " + ", ".join(BALANCE_PARAMS))
+    parser.add_argument("--policy", default=WateringPolicy.name, choices=sorted(BALANCE_POLICIES), help="scripted player for --balance")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for --balance (default: all cores)")
+    parser.add_argument("--balance-out", default=BALANCE_OUT, help="where balance results are written")
+    parser.add_argument("--timing", action="store_true", help="print startup milestones (import, GL import, world ready, first frame)")
+    parser.add_argument("--profile", action="store_true", help="start with the frame profiler on (p toggles it in the window)")
+    parser.add_argument("--profile-out", default=PROFILE_OUT, help="where profiler samples go (.csv or .json)")
+    args = parser.parse_args()
+    SHOW_TIMING = args.timing
+    mark_startup("import")
+    TARGET_FPS = args.fps
+    SIM_THREAD = not args.single_thread
+    governor.target_fps = args.target_fps or TARGET_FPS or 60
+    if args.quality != "auto":
+        governor.set_level(QUALITY_NAMES.index(args.quality))
+    RENDERER = args.renderer
+    DRAW_DISTANCE = args.draw_distance
+    GRASS_COUNT = args.grass
+    NPC_COUNT = args.npcs
+    DAY_LENGTH = args.day_length
+    PROFILE_OUT = args.profile_out
+    if args.bench is not None:
+        _, regressions = run_benchmark(args.bench, not args.no_render, args.bench_out, args.bench_baseline)
+        sys.exit(1 if regressions else 0)
+    elif args.balance:
+        run_balance(parse_balance_params(args.param), args.balance, args.policy, args.workers,
+                    args.seed or 0, out=args.balance_out)
+    elif args.replay:
+        _, matches = replay_recording(args.replay)
+        sys.exit(0 if matches else 1)
+    elif args.headless:
+        run_headless(args.ticks, args.dt, args.seed, args.profile)
+    else:
+        governor.auto = args.quality == "auto"
+        if args.profile:
+            profiler.toggle()
+        if args.count_gl_calls:
+            gl_calls.enable()
+        if args.record:
+            start_recording(args.record, args.seed)
+        elif args.load:
+            world = load_snapshot(args.load)
+        elif args.seed is not None:
+            world = GameWorld(args.seed)
+        if not args.no_autosave:
+            autosaver = Autosaver(args.autosave)
+        sys.exit(main())
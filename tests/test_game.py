@@ -0,0 +1,608 @@
+import importlib.util
+import os
+
+import pytest
+
+GAME_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "3D game.py")
+
+
+@pytest.fixture(scope="module")
+def game():
+    spec = importlib.util.spec_from_file_location("game", GAME_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="module")
+def gl_context(game):
+    try:
+        return game.create_offscreen_context()
+    except Exception as e:
+        pytest.skip(f"no offscreen GL context: {e}")
+
+
+def test_paused_world_with_npcs_is_quiet(game):
+    world = game.GameWorld(1)
+    assert len(world.npcs) == game.NPC_COUNT > 0
+    assert world.falling_chain_paused
+    start = world.npcs.pos.copy()
+    quiet = 0
+    for _ in range(600):
+        world.step(game.SIM_DT)
+        quiet += world.is_quiet()
+    assert quiet == 600
+    assert (world.npcs.pos == start).all()
+    assert (world.npcs.render_state(0.5)[0] == world.npcs.pos).all()
+
+
+def test_npcs_walk_while_playing(game):
+    world = game.GameWorld(1)
+    world.falling_chain_paused = False
+    start = world.npcs.pos.copy()
+    for _ in range(600):
+        world.step(game.SIM_DT)
+    assert (world.npcs.pos != start).any()
+
+
+def test_simulation_thread_idles_when_finished(game, monkeypatch):
+    monkeypatch.setattr(game, "world", game.GameWorld(1))
+    game.world.game_over = True
+    thread = game.SimulationThread(game.SnapshotBuffers())
+    thread.start()
+    try:
+        game.time.sleep(0.3)
+        idle_ticks = game.world.tick_count
+        assert idle_ticks <= 2
+        game.send_input(game.EVENT_KEY_DOWN, ord("w"))
+        game.time.sleep(0.1)
+        assert game.world.tick_count == idle_ticks + 1
+    finally:
+        thread.stop()
+    assert thread.error is None
+
+
+def test_simulation_thread_reports_errors(game, monkeypatch):
+    def fail():
+        raise RuntimeError("step failed")
+    monkeypatch.setattr(game, "world", game.GameWorld(1))
+    monkeypatch.setattr(game, "step_world", fail)
+    thread = game.SimulationThread(game.SnapshotBuffers())
+    thread.start()
+    thread.thread.join(timeout=2)
+    assert not thread.thread.is_alive()
+    assert isinstance(thread.error, RuntimeError)
+
+
+def test_damaged_snapshots_raise_value_error(game, tmp_path):
+    path = str(tmp_path / "world.snap")
+    game.save_snapshot(game.GameWorld(1), path)
+    with open(path, "rb") as f:
+        data = f.read()
+    assert game.load_snapshot(path).seed == 1
+    sections = game.read_snapshot(path)
+    damaged = [data[:size] for size in (1, 10, 20, 100, len(data) // 2, len(data) - 8)]
+    damaged.append(b"x" * len(data))
+    damaged.append(game.pack_snapshot({name: array for name, array in sections.items() if name != "trees"}))
+    for i, contents in enumerate(damaged):
+        bad = str(tmp_path / f"bad{i}.snap")
+        with open(bad, "wb") as f:
+            f.write(contents)
+        with pytest.raises(ValueError):
+            game.load_snapshot(bad)
+
+
+def test_quick_load_keeps_world_on_damaged_save(game, monkeypatch, tmp_path):
+    bad = tmp_path / "quick.snap"
+    bad.write_bytes(game.SNAPSHOT_MAGIC + b"\0" * 4)
+    monkeypatch.setattr(game, "world", game.GameWorld(1))
+    world = game.world
+    game.quick_load(str(bad))
+    assert game.world is world
+    assert world.status_message == "Save is damaged"
+
+
+def test_snapshot_versions(game, tmp_path):
+    path = str(tmp_path / "world.snap")
+    game.save_snapshot(game.GameWorld(1), path)
+    with open(path, "rb") as f:
+        data = f.read()
+    assert game.SNAPSHOT_HEADER.unpack_from(data, 0)[1] == game.SNAPSHOT_VERSION
+    newer = str(tmp_path / "newer.snap")
+    with open(newer, "wb") as f:
+        f.write(game.SNAPSHOT_HEADER.pack(game.SNAPSHOT_MAGIC, game.SNAPSHOT_VERSION + 1, 0) + data[game.SNAPSHOT_HEADER.size:])
+    with pytest.raises(ValueError):
+        game.load_snapshot(newer)
+
+
+def test_snapshot_keeps_time_of_day(game, tmp_path):
+    world = game.GameWorld(1)
+    for _ in range(100):
+        world.step(game.SIM_DT)
+    world.turn_sun(game.KEY_RIGHT)
+    path = str(tmp_path / "world.snap")
+    game.save_snapshot(world, path)
+    assert game.load_snapshot(path).sun_position == world.sun_position
+
+
+def test_leaves_thinned_per_tree(game):
+    pool = game.LeafPool(rng=game.np.random.default_rng(0))
+    for _ in range(game.LEAVES_PER_TREE):
+        for owner in (0, 1, 2):
+            pool.spawn(owner, 0, 100, 0)
+    for per_tree in (game.LEAVES_PER_TREE, 12, 6, 1):
+        drawn = pool.drawn_indices(per_tree=per_tree)
+        assert game.np.bincount(pool.owner[drawn], minlength=3).tolist() == [per_tree] * 3
+
+
+def test_particle_share_thins_live_rain(game):
+    rain = game.RainPool(rng=game.np.random.default_rng(0))
+    rain.update(game.SIM_DT)
+    live = rain.live_indices()
+    assert len(live) == game.RAIN_COUNT
+    counts = [len(rain.thin(live, level["particles"])) for level in game.QUALITY_LEVELS]
+    assert counts[0] == game.RAIN_COUNT
+    assert counts == sorted(counts, reverse=True) and counts[-1] < game.RAIN_COUNT * 0.3
+    assert set(rain.thin(live, 0.35).tolist()) <= set(rain.thin(live, 0.6).tolist())
+
+
+def play(game, ticks):
+    for _ in range(ticks):
+        game.apply_queued_input()
+        game.step_world()
+
+
+def test_replay_follows_quick_save_and_load(game, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(game, "autosaver", None)
+    monkeypatch.setattr(game, "recorder", None)
+    monkeypatch.setattr(game, "world", game.world)
+    game.start_recording(str(tmp_path / "session.rec"), seed=1)
+    game.send_input(game.EVENT_KEY_DOWN, ord("w"))
+    play(game, 60)
+    game.send_input(game.EVENT_QUICK_SAVE)
+    play(game, 1)
+    assert game.world.status_message == "Game saved"
+    assert game.load_snapshot(game.QUICKSAVE_PATH).player_pos == game.world.prev_player_pos
+    play(game, 59)
+    game.send_input(game.EVENT_KEY_UP, ord("w"))
+    game.send_input(game.EVENT_KEY_DOWN, ord("d"))
+    play(game, 60)
+    saved_pos = list(game.world.player_pos)
+    game.send_input(game.EVENT_QUICK_LOAD)
+    play(game, 30)
+    assert game.world.player_pos != saved_pos
+    game.recorder.close(game.world)
+    sim, matches = game.replay_recording(str(tmp_path / "session.rec"))
+    assert matches
+    assert sim.player_pos == game.world.player_pos
+    assert sim.tick_count == game.world.tick_count
+
+
+def test_replay_rejects_load_before_save(game, tmp_path):
+    path = str(tmp_path / "session.rec")
+    recorder = game.InputRecorder(path, 1)
+    recorder.tick()
+    recorder.record(game.EVENT_QUICK_LOAD)
+    recorder.tick()
+    recorder.close(game.GameWorld(1))
+    with pytest.raises(ValueError):
+        game.replay_recording(path)
+
+
+def test_quick_load_refused_without_save_in_recording(game, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(game, "autosaver", None)
+    monkeypatch.setattr(game, "recorder", None)
+    monkeypatch.setattr(game, "world", game.world)
+    game.save_snapshot(game.GameWorld(2), game.QUICKSAVE_PATH)
+    game.start_recording(str(tmp_path / "session.rec"), seed=1)
+    world = game.world
+    game.send_input(game.EVENT_QUICK_LOAD)
+    play(game, 1)
+    assert game.world is world
+    assert world.status_message == "Can't load a save from before the recording"
+    assert game.recorder.events == 0
+    game.recorder.close(game.world)
+
+
+def test_quick_save_without_autosaver_is_synchronous(game, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(game, "autosaver", None)
+    monkeypatch.setattr(game, "world", game.GameWorld(1))
+    threads = game.threading.active_count()
+    for step in range(5):
+        game.world.player_pos[0] = float(step)
+        game.quick_save()
+        assert game.world.status_message == "Game saved"
+        game.world.player_pos[0] = 100.0
+        game.quick_load()
+        assert game.world.status_message == "Game loaded"
+        assert game.world.player_pos[0] == float(step)
+    assert game.threading.active_count() == threads
+
+
+def test_hud_rebuilt_only_when_a_shown_value_changes(game, gl_context):
+    hud = game.HudLayer()
+    world = game.GameWorld(1)
+    for _ in range(10):
+        hud.draw(world)
+    assert hud.rebuilds == 1
+    for _ in range(10):
+        world.step(game.SIM_DT)
+        hud.draw(world)
+    assert hud.rebuilds == 1
+    world.trees_saved += 1
+    hud.draw(world)
+    hud.draw(world)
+    assert hud.rebuilds == 2
+    hud.invalidate()
+    hud.draw(world)
+    assert hud.rebuilds == 3
+    assert game.gl.glGetError() == game.gl.GL_NO_ERROR
+
+
+def test_spatial_grid_matches_brute_force(game):
+    rng = game.random.Random(8)
+    grid = game.SpatialGrid(cell_size=100.0)
+    items = []
+    for i in range(300):
+        # Two clusters with empty cells between and around them
+        cx = rng.choice((-900.0, 600.0))
+        x, z = cx + rng.uniform(-250, 250), rng.uniform(-250, 250)
+        kind = "tree" if i % 3 else "pond"
+        item = object()
+        grid.insert(item, x, z, kind=kind)
+        items.append((item, x, z, kind))
+    for item, x, z, kind in items[::10]:
+        grid.remove(item)
+    items = [entry for i, entry in enumerate(items) if i % 10]
+    assert len(grid) == len(items)
+
+    def distance(item, x, z):
+        ix, iz = next((ix, iz) for it, ix, iz, _ in items if it is item)
+        return (ix - x)**2 + (iz - z)**2
+
+    for _ in range(200):
+        x, z = rng.uniform(-2000, 2000), rng.uniform(-1000, 1000)
+        for kind in (None, "tree", "pond"):
+            matching = [(ix - x)**2 + (iz - z)**2 for _, ix, iz, ikind in items if kind in (None, ikind)]
+            assert distance(grid.nearest(x, z, kind=kind), x, z) == min(matching)
+        radius = rng.uniform(0, 400)
+        expected = {id(it) for it, ix, iz, _ in items if (ix - x)**2 + (iz - z)**2 <= radius**2}
+        assert {id(it) for it in grid.within_radius(x, z, radius)} == expected
+
+
+def test_spatial_grid_ring_search_stops_early(game, monkeypatch):
+    grid = game.SpatialGrid(cell_size=100.0)
+    rings = []
+    ring_cells = game.SpatialGrid.ring_cells
+    monkeypatch.setattr(grid, "ring_cells", lambda cx, cz, ring: rings.append(ring) or ring_cells(cx, cz, ring))
+    assert grid.nearest(50.0, 50.0) is None
+    far, across = object(), object()
+    grid.insert(far, 5000.0, 5000.0)
+    grid.insert(across, 450.0, 50.0)
+    # Empty cells in between: the search goes out until the ring that holds the item, then stops
+    assert grid.nearest(50.0, 50.0) is across
+    assert rings == [0, 1, 2, 3, 4]
+    # An item in the query's own cell can be farther than one in the next ring
+    rings.clear()
+    own, next_cell = object(), object()
+    grid.insert(own, 5.0, 50.0)
+    grid.insert(next_cell, 105.0, 50.0)
+    assert grid.nearest(95.0, 50.0) is next_cell
+    assert rings == [0, 1]
+
+
+def test_event_scheduler_runs_due_events_in_order(game):
+    events = game.EventScheduler()
+    fired = []
+    rng = game.random.Random(14)
+    times = [rng.choice((1.0, 2.0, 2.0, 3.5, 5.0)) for _ in range(40)]
+    for i, when in enumerate(times):
+        events.schedule(when, fired.append, (when, i))
+    assert events.run_due(0.5) == 0 and fired == []
+    assert events.run_due(2.0) == sum(when <= 2.0 for when in times)
+    assert events.run_due(10.0) == sum(when > 2.0 for when in times)
+    # Time order, and scheduling order among events due at the same time
+    assert fired == sorted((when, i) for i, when in enumerate(times))
+    assert events.fired == len(times) and len(events) == 0
+
+
+def test_event_scheduler_cancels_lazily(game):
+    events = game.EventScheduler()
+    fired = []
+    keep = events.schedule(1.0, fired.append, "keep")
+    drop = events.schedule(1.0, fired.append, "drop")
+    events.cancel(drop)
+    events.cancel(None)
+    assert len(events) == 2  # cancelled events stay queued until they come due
+    assert events.run_due(1.0) == 1
+    assert fired == ["keep"] and events.fired == 1 and len(events) == 0
+    events.cancel(keep)  # already fired: nothing to do
+    assert events.run_due(5.0) == 0
+
+
+def run_until(game, world, condition, limit=60.0):
+    while not condition():
+        assert world.time < limit
+        world.step(game.SIM_DT)
+    return world.time
+
+
+def stand_by(world, tree):
+    world.player_pos[0] = tree.x + 32 * tree.size + 20
+    world.player_pos[2] = tree.z
+    world.watering_pot_visible = True
+    world.watering_pot_fullness = 100
+
+
+def test_pour_regrows_a_bare_tree_on_time(game):
+    world = game.GameWorld(1)
+    tree = world.trees[0]
+    world.start_tree_falling(tree)
+    bare = run_until(game, world, lambda: not tree.has_leaves)
+    assert bare == pytest.approx(game.LEAF_FALL_TIME, abs=game.SIM_DT)
+    assert world.dead_count() == 1
+    stand_by(world, tree)
+    start = world.time
+    world.start_pot_pouring(tree)
+    assert tree.pouring and world.pour_target is tree
+    regrow = run_until(game, world, lambda: tree.regrow_start_time is not None)
+    assert regrow - start == pytest.approx(game.POUR_REGROW_AMOUNT / game.POUR_RATE, abs=game.SIM_DT)
+    grown = run_until(game, world, lambda: tree.has_leaves)
+    assert grown - regrow == pytest.approx(game.REGROW_TIME, abs=game.SIM_DT)
+    assert world.trees_saved == 1 and world.dead_count() == 0
+    # Pouring goes on until the cap, then the tree lets go of the pot
+    capped = run_until(game, world, lambda: not tree.pouring)
+    assert capped - start == pytest.approx(game.POUR_CAP, abs=game.SIM_DT)
+    assert world.pour_target is None and not world.watering_pot_pouring
+    assert "pour_cap" not in tree.timers and "pour" not in tree.timers
+
+
+def test_k_stops_the_poured_tree(game):
+    world = game.GameWorld(1)
+    tree = world.trees[0]
+    stand_by(world, tree)
+    world.start_pot_pouring(tree)
+    cap = tree.timers["pour_cap"]
+    for _ in range(30):
+        world.step(game.SIM_DT)
+    world.key_down(b'k')
+    assert not tree.pouring and tree.pour_start_time is None
+    assert world.pour_target is None and not world.watering_pot_pouring
+    assert not cap[4] and tree.timers == {}
+    fired = world.events.fired
+    for _ in range(int(game.POUR_CAP / game.SIM_DT)):
+        world.step(game.SIM_DT)
+    assert world.events.fired == fired  # the cancelled cap and pour timers never run
+
+
+def half_world_frustum(game):
+    # Sees x from -600 to 0 and everything in y and z
+    clip = game.np.diag([1 / 300, 1 / 1000, 1 / 1000, 1.0])
+    clip[0, 3] = 1.0
+    return game.Frustum(clip, (0.0, 0.0, 0.0))
+
+
+def test_grass_lod_draws_each_chunks_share(game):
+    field = game.GrassField(20000, seed=19)
+    chunks = game.GRASS_CHUNKS * game.GRASS_CHUNKS
+    levels = game.np.array([(i % 4) - 1 for i in range(chunks)], dtype=game.np.int8)
+    counts = game.np.diff(field.chunk_start)
+    for density in (1.0, 0.5):
+        field.build_lod(levels, density)
+        drawn = game.np.zeros(chunks, dtype=int)
+        for width, indices in field.lod_batches:
+            roots, tips = indices[0::2], indices[1::2]
+            assert (roots % 2 == 0).all() and (tips == roots + 1).all()
+            blades = roots // 2
+            chunk = game.np.searchsorted(field.chunk_start, blades, side="right") - 1
+            assert (levels[chunk] >= 0).all()
+            for c in game.np.unique(chunk):
+                _, share, lod_width = game.GRASS_LOD[levels[c]]
+                assert width == lod_width
+                mine = blades[chunk == c]
+                # The first share of the chunk's blades, which are in random order
+                assert mine.tolist() == list(range(field.chunk_start[c], field.chunk_start[c] + len(mine)))
+                drawn[c] = len(mine)
+        for c in range(chunks):
+            expected = 0 if levels[c] < 0 else int(game.np.ceil(counts[c] * game.GRASS_LOD[levels[c]][1] * density))
+            assert drawn[c] == expected
+        assert len(field.active[0]) == drawn.sum()
+    field.build_lod(game.np.zeros(chunks, dtype=game.np.int8))
+    assert field.lod_batches is None and field.active is None
+
+
+def test_grass_lod_rebuilt_only_on_change(game, gl_context, monkeypatch):
+    field = game.GrassField(4000, seed=19)
+    builds = []
+    build_lod = field.build_lod
+    monkeypatch.setattr(field, "build_lod", lambda levels, density=1.0: builds.append(density) or build_lod(levels, density))
+    eye = (0.0, 50.0, 0.0)
+    for _ in range(5):
+        field.draw(eye=eye)
+    assert len(builds) == 1
+    field.draw(eye=(1.0, 50.0, 1.0))  # same level in every chunk
+    assert len(builds) == 1
+    field.draw(eye=(900.0, 50.0, 900.0))
+    assert len(builds) == 2
+    frustum = half_world_frustum(game)
+    field.draw(frustum=frustum, eye=(900.0, 50.0, 900.0))
+    field.draw(frustum=frustum, eye=(900.0, 50.0, 900.0))
+    assert len(builds) == 3
+    visible = field.lod_levels(frustum, (900.0, 50.0, 900.0))[:game.GRASS_CHUNKS] >= 0
+    assert visible[:game.GRASS_CHUNKS // 2].all() and not visible[-2:].any()
+    field.draw(frustum=frustum, eye=(900.0, 50.0, 900.0), density=0.5)
+    assert builds == [1.0, 1.0, 1.0, 0.5]
+    assert game.gl.glGetError() == game.gl.GL_NO_ERROR
+
+
+def batch_shapes(game):
+    gl = game.gl
+    fan = [(100, 100), (200, 100), (220, 180), (150, 240), (80, 180)]
+    return [
+        (gl.GL_TRIANGLE_FAN, fan, [(1, 0, 0), (0, 1, 0), (0, 0, 1), (1, 1, 0), (0, 1, 1)], 1.0),
+        (gl.GL_POLYGON, [(x + 250, y) for x, y in fan], (0.2, 0.6, 0.9), 1.0),
+        (gl.GL_QUADS, [(500, 100), (600, 100), (600, 200), (500, 200),
+                       (650, 100), (700, 100), (700, 250), (650, 250)], (0.9, 0.5, 0.1), 1.0),
+        (gl.GL_LINE_STRIP, [(100, 400), (300, 450), (500, 400), (700, 500)],
+         [(1, 1, 1), (1, 0, 1), (0, 1, 0), (1, 1, 0)], 3.0),
+        (gl.GL_LINE_LOOP, [(100, 600), (300, 600), (200, 750)], (0.5, 1, 0.5), 2.0),
+    ]
+
+
+def test_vertex_batch_expands_primitives(game, gl_context):
+    gl = game.gl
+    batch = game.VertexBatch(use_vbo=False)
+    for shape in batch_shapes(game):
+        batch.add(*shape)
+    triangles = batch.groups[(gl.GL_TRIANGLES, 1.0)]
+    assert [len(vertices) for vertices, _ in triangles] == [9, 9, 12]
+    fan_vertices, fan_colors = triangles[0]
+    assert fan_vertices[:, :2].tolist() == [[100, 100], [200, 100], [220, 180], [100, 100], [220, 180],
+                                            [150, 240], [100, 100], [150, 240], [80, 180]]
+    assert fan_colors.tolist() == [[1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 0, 0], [0, 0, 1],
+                                   [1, 1, 0], [1, 0, 0], [1, 1, 0], [0, 1, 1]]
+    assert (fan_vertices[:, 2] == 0).all()
+    quad_vertices, quad_colors = triangles[2]
+    assert quad_vertices[:6, :2].tolist() == [[500, 100], [600, 100], [600, 200], [500, 100], [600, 200], [500, 200]]
+    assert quad_colors.shape == (3,)
+    (strip_vertices, strip_colors), = batch.groups[(gl.GL_LINES, 3.0)]
+    assert strip_vertices[:, :2].tolist() == [[100, 400], [300, 450], [300, 450], [500, 400], [500, 400], [700, 500]]
+    assert strip_colors.tolist() == [[1, 1, 1], [1, 0, 1], [1, 0, 1], [0, 1, 0], [0, 1, 0], [1, 1, 0]]
+    (loop_vertices, _), = batch.groups[(gl.GL_LINES, 2.0)]
+    assert loop_vertices[:, :2].tolist() == [[100, 600], [300, 600], [300, 600], [200, 750], [200, 750], [100, 600]]
+    batch.flush()
+    assert batch.draw_calls == 3 and batch.vertices == 30 + 6 + 6
+    assert gl.glGetError() == gl.GL_NO_ERROR
+
+
+def render_batch(game, batch):
+    gl = game.gl
+    gl.glViewport(0, 0, game.WINDOW_WIDTH, game.WINDOW_HEIGHT)
+    gl.glMatrixMode(gl.GL_PROJECTION)
+    gl.glLoadIdentity()
+    gl.glOrtho(0, game.WINDOW_WIDTH, 0, game.WINDOW_HEIGHT, -1, 1)
+    gl.glMatrixMode(gl.GL_MODELVIEW)
+    gl.glLoadIdentity()
+    for cap in (gl.GL_DEPTH_TEST, gl.GL_LIGHTING, gl.GL_TEXTURE_2D, gl.GL_BLEND, gl.GL_CULL_FACE):
+        gl.glDisable(cap)
+    gl.glClearColor(0, 0, 0, 1)
+    gl.glClear(gl.GL_COLOR_BUFFER_BIT)
+    for shape in batch_shapes(game):
+        batch.add(*shape)
+    batch.flush()
+    gl.glFinish()
+    pixels = gl.glReadPixels(0, 0, game.WINDOW_WIDTH, game.WINDOW_HEIGHT, gl.GL_RGB, gl.GL_UNSIGNED_BYTE)
+    return game.np.frombuffer(pixels, dtype=game.np.uint8).reshape(game.WINDOW_HEIGHT, game.WINDOW_WIDTH, 3)
+
+
+def test_immediate_batch_draws_the_same_shapes(game, gl_context, monkeypatch):
+    monkeypatch.setattr(game, "RENDERER", "immediate")
+    assert isinstance(game.new_batch(), game.ImmediateBatch)
+    immediate = game.new_batch(use_vbo=False)
+    expected = render_batch(game, immediate)
+    assert immediate.draw_calls == 5 and immediate.vertices == 25
+    monkeypatch.setattr(game, "RENDERER", "batched")
+    batched = game.new_batch(use_vbo=False)
+    assert isinstance(batched, game.VertexBatch)
+    image = render_batch(game, batched)
+    assert expected.any()
+    assert (abs(image.astype(int) - expected).max(axis=2) > 8).mean() < 0.001
+
+
+def test_input_queue_sums_motion_into_one_look_per_tick(game, monkeypatch, tmp_path):
+    monkeypatch.setattr(game, "input_queue", game.InputQueue())
+    monkeypatch.setattr(game, "recorder", None)
+    monkeypatch.setattr(game, "world", game.world)
+    path = str(tmp_path / "session.rec")
+    game.start_recording(path, seed=1)
+    world = game.world
+    yaw, pitch = world.cam_yaw, world.cam_pitch
+    for dx, dy in ((3, 1), (4, -2), (-1, 0), (10, 0)):
+        game.input_queue.move(dx, dy)
+    game.send_input(game.EVENT_KEY_DOWN, ord("w"))
+    game.input_queue.move(2, 0)
+    game.send_input(game.EVENT_KEY_DOWN, ord("a"))
+    game.send_input(game.EVENT_KEY_UP, ord("w"))
+    play(game, 1)
+    assert world.cam_yaw == pytest.approx(yaw + 18 * game.mouse_sensitivity)
+    assert world.cam_pitch == pytest.approx(pitch + 1 * game.mouse_sensitivity)
+    assert world.move_player_left and not world.move_player_forward
+    assert game.input_queue.take() == ([], 0.0, 0.0)
+    play(game, 3)  # no motion: no look recorded
+    game.input_queue.move(5, 5)
+    game.input_queue.move(-5, -5)  # sums to nothing
+    play(game, 1)
+    game.input_queue.move(1, 2)
+    play(game, 1)
+    game.recorder.close(world)
+    _, events, _, _ = game.read_recording(path)
+    assert events == [
+        (0, game.EVENT_KEY_DOWN, ord("w"), 0.0, 0.0),
+        (0, game.EVENT_KEY_DOWN, ord("a"), 0.0, 0.0),
+        (0, game.EVENT_KEY_UP, ord("w"), 0.0, 0.0),
+        (0, game.EVENT_LOOK, 0, 18.0, -1.0),
+        (5, game.EVENT_LOOK, 0, 1.0, 2.0),
+    ]
+
+
+def test_balance_params_expand_to_every_combination(game):
+    defaults = {name: getattr(game, name) for name in game.BALANCE_PARAMS}
+    assert game.parse_balance_params(None) == [defaults]
+    sets = game.parse_balance_params(["MAX_DEAD_TREES=3,5,7", "WATER_BUDGET=20,40"])
+    assert len(sets) == 6
+    assert {(s["MAX_DEAD_TREES"], s["WATER_BUDGET"]) for s in sets} == {(d, w) for d in (3, 5, 7) for w in (20.0, 40.0)}
+    assert all(type(s["MAX_DEAD_TREES"]) is int and type(s["WATER_BUDGET"]) is float for s in sets)
+    assert all(s["FALLING_CHAIN_DELAY"] == defaults["FALLING_CHAIN_DELAY"] for s in sets)
+    with pytest.raises(ValueError):
+        game.parse_balance_params(["GRAVITY=1"])
+
+
+def test_balance_game_runs_in_process(game, monkeypatch):
+    # play_balance_game sets the tuned values as module globals, as it does in a worker
+    for name in game.BALANCE_PARAMS + ("NPC_COUNT",):
+        monkeypatch.setattr(game, name, getattr(game, name))
+    params = game.parse_balance_params(["FALLING_CHAIN_DELAY=2"])[0]
+    games = [game.play_balance_game((params, seed, game.WateringPolicy.name, 60.0)) for seed in (3, 4, 3)]
+    assert games[0] == games[2]  # a fixed seed plays the same game
+    for outcome in games:
+        assert set(outcome) == {"victory", "time", "dead", "saved", "timeout"}
+        assert outcome["time"] <= 60.0 + game.SIM_DT
+        assert outcome["timeout"] == (not outcome["victory"] and outcome["dead"] < params["MAX_DEAD_TREES"])
+    assert game.FALLING_CHAIN_DELAY == 2.0 and game.NPC_COUNT == 0
+    summary = game.summarize_balance(params, games)
+    assert summary["params"] == params and summary["games"] == 3
+    assert sum(summary["dead_trees"]) == 3
+    assert summary["victory_rate"] == sum(g["victory"] for g in games) / 3
+    assert summary["timeout_rate"] == sum(g["timeout"] for g in games) / 3
+    assert summary["trees_saved_mean"] == pytest.approx(sum(g["saved"] for g in games) / 3)
+    assert (summary["victory_time_mean"] is None) == (summary["victory_rate"] == 0)
+
+
+def test_world_cache_round_trip(game, monkeypatch, tmp_path):
+    monkeypatch.setattr(game, "WORLD_CACHE_DIR", str(tmp_path / "cache"))
+    fresh_grass, fresh_stars = game.build_world_content(7, 3000)
+    path = game.world_cache_path(7, 3000)
+    assert game.os.path.exists(path)
+
+    def no_rebuild(self, blade_count=4000):
+        raise AssertionError("seeded world was rebuilt instead of loaded from the cache")
+    monkeypatch.setattr(game.GrassField, "initialize_blades", no_rebuild)
+    grass, stars = game.build_world_content(7, 3000)
+    assert len(grass) == len(fresh_grass) > 0
+    for name in ("x", "z", "color", "chunk_start", "wind_cell", "vertices", "colors"):
+        assert (getattr(grass, name) == getattr(fresh_grass, name)).all(), name
+    assert (stars == fresh_stars).all()
+    # The blade count is part of the key: another count is built and cached separately
+    monkeypatch.undo()
+    monkeypatch.setattr(game, "WORLD_CACHE_DIR", str(tmp_path / "cache"))
+    assert game.world_cache_path(7, 3000) != game.world_cache_path(7, 4000)
+    assert game.world_cache_path(7, 3000) != game.world_cache_path(8, 3000)
+    more, _ = game.build_world_content(7, 4000)
+    assert len(more) > len(grass)
+    assert sorted(game.os.listdir(tmp_path / "cache")) == sorted(
+        game.os.path.basename(game.world_cache_path(7, count)) for count in (3000, 4000))
+    game.build_world_content(None, 3000)  # unseeded worlds are never cached
+    assert len(game.os.listdir(tmp_path / "cache")) == 2